@@ -1,16 +1,14 @@
 import base64
-import struct
 import sys
-import objc
 
-from Cocoa import NSPasteboard, NSPasteboardItem
-from Foundation import NSURL, NSString, NSAppleEventManager, NSApplication, NSObject, NSBundle
-from AppKit import NSWorkspace
-from PySide6.QtWidgets import QMessageBox
-from objc._pycoder import NSData
+# PyObjC is imported by each helper when it is first called, loading Cocoa, Foundation and AppKit
+# takes a noticeable part of the startup time and none of them is needed before the window shows
 
 
 def copy_files_to_clipboard(file_paths):
+    from Cocoa import NSPasteboard, NSPasteboardItem
+    from Foundation import NSURL
+
     # Get the general pasteboard
     pasteboard = NSPasteboard.generalPasteboard()
 
@@ -39,11 +37,16 @@ def copy_files_to_clipboard(file_paths):
 
 def reveal_in_finder(file_path):
     if sys.platform == "darwin":
+        from AppKit import NSWorkspace
+        from Foundation import NSURL
+
         url = NSURL.fileURLWithPath_(file_path)
         NSWorkspace.sharedWorkspace().activateFileViewerSelectingURLs_([url])
 
 
 def create_bookmark(path):
+    from Foundation import NSURL
+
     url = NSURL.fileURLWithPath_(path)
     result_tuple = url.bookmarkDataWithOptions_includingResourceValuesForKeys_relativeToURL_error_(
         1 << 11,  # NSURLBookmarkCreationWithSecurityScope
@@ -61,6 +64,9 @@ def create_bookmark(path):
 
 
 def resolve_bookmark(encoded_data):
+    from Foundation import NSURL
+    from objc._pycoder import NSData
+
     # Decode the base64 string to get the raw data
     byte_array = base64.b64decode(encoded_data)
 
@@ -87,6 +93,9 @@ def resolve_bookmark(encoded_data):
 
 
 def start_accessing_resource(encoded_data):
+    from Foundation import NSURL
+    from objc._pycoder import NSData
+
     # Decode the base64 string to get the raw data
     byte_array = base64.b64decode(encoded_data)
 
@@ -115,6 +124,9 @@ def start_accessing_resource(encoded_data):
 
 
 def stop_accessing_resource(encoded_data):
+    from Foundation import NSURL
+    from objc._pycoder import NSData
+
     # Decode the base64 string to get the raw data
     byte_array = base64.b64decode(encoded_data)
 
@@ -144,6 +156,8 @@ def stop_accessing_resource(encoded_data):
 
 def get_app_version():
     try:
+        from Foundation import NSBundle
+
         bundle = NSBundle.mainBundle()
         info = bundle.localizedInfoDictionary() or bundle.infoDictionary()
         return info.get("CFBundleShortVersionString", "GitHub Source")
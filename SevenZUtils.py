@@ -1,56 +1,13 @@
 import subprocess
 import sys
-import os
 
-import chardet
 from PySide6.QtGui import QDesktopServices, QPixmap
-from PySide6.QtCore import QThread, Signal, Qt
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QDialog, QTextEdit, QPushButton, QVBoxLayout, QProgressDialog, QMessageBox, QFormLayout, \
     QLabel
 
 import SevenZHelperMacOS
-
-
-def resource_path(relative_path):
-    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
-    print(os.path.join(base_path, relative_path))
-    return os.path.join(base_path, relative_path)
-
-
-def determine_7zip_binary():
-    if sys.platform == "win32":
-        return ""  # Path to 7-Zip binary on Windows
-
-    elif sys.platform == "darwin":
-        if 'APP_SANDBOX_CONTAINER_ID' in os.environ:
-            return resource_path('./bin/macos/7zz-mango')
-        return "./bin/macos/7zz"
-
-    elif sys.platform.startswith("linux"):
-        return ""  # Path to 7-Zip binary on Linux
-
-    else:
-        raise Exception("Unsupported OS platform")
-
-
-def get_supported_extensions():
-    return (
-        '.7z', '.apfs', '.img', '.apm', '.ar', '.a', '.deb', '.udeb', '.lib', '.arj', '.b64', '.obj', '.cab',
-        '.chm',
-        '.chi', '.chq', '.chw',
-        '.msi', '.msp', '.doc', '.xls', '.ppt', '.cpio', '.cramfs', '.dmg', '.elf', '.ext', '.ext2', '.ext3',
-        '.ext4',
-        '.fat', '.flv', '.gpt',
-        '.mbr', '.hfs', '.hfsx', '.hxs', '.hxi', '.hxr', '.hxq', '.hxw', '.lit', '.ihex', '.iso', '.lpimg', '.lzh',
-        '.lha', '.mbr', '.macho',
-        '.mslz', '.mub', '.ntfs', '.nsis', '.exe', '.dll', '.sys', '.pmd', '.qcow', '.qcow2', '.qcow2c', '.rar',
-        '.r00',
-        '.rpm', '.swf', '.simg',
-        '.001', '.squashfs', '.te', '.scap', '.uefif', '.udf', '.vdi', '.vhd', '.vhdx', '.avhdx', '.vmdk', '.xar',
-        '.pkg', '.xip', '.z', '.taz', '.zip',
-        '.bz2', '.bzip2', '.tbz2', '.tbz', '.gz', '.gzip', '.tgz', '.tpz', '.apk', '.lzma', '.lzma86', '.tar',
-        '.ova',
-        '.wim', '.swm', '.esd', '.ppkg', '.xz', '.txz')
+from sevenz_engine import resource_path, determine_7zip_binary, TestArchiveWorker
 
 
 def show_file_properties(file_path: str):
@@ -170,43 +127,6 @@ def get_app_version():
         return "Github"
 
 
-class DeleteWorker(QThread):
-    finished = Signal(bool, str)
-
-    def __init__(self, s7zip_bin, archive_path, item_full_path):
-        super().__init__()
-        self.s7zip_bin = s7zip_bin
-        self.archive_path = archive_path
-        self.item_full_path = item_full_path
-
-    def run(self):
-        command = [self.s7zip_bin, 'd', self.archive_path, self.item_full_path]
-        try:
-            subprocess.check_call(command)
-            self.finished.emit(True, "")
-        except subprocess.CalledProcessError:
-            self.finished.emit(False, "Failed to delete the file.")
-
-
-class TestArchiveWorker(QThread):
-    finished = Signal(str)
-
-    def __init__(self, archive_path, s7zip_bin):
-        super().__init__()
-        self.archive_path = archive_path
-        self.s7zip_bin = s7zip_bin
-
-    def run(self):
-        command = [self.s7zip_bin, 't', self.archive_path]
-        try:
-            raw_output = subprocess.check_output(command)
-            encoding_detected = chardet.detect(raw_output)['encoding']
-            output = raw_output.decode(encoding_detected)
-            self.finished.emit(output)
-        except subprocess.CalledProcessError:
-            self.finished.emit("Failed to test the archive.")
-
-
 class ArchiveTester:
     def __init__(self, parent):
         self.parent = parent
@@ -0,0 +1,132 @@
+import os
+import re
+
+from archive_index import ROOT
+from archive_listing import ArchiveEntry
+
+
+class ChangeSet:
+    """Edits made to an archive, applied to the open index and view instead of relisting the archive."""
+
+    def __init__(self, renamed=None, deleted=None, added=None):
+        self.renamed = list(renamed or [])  # (old path, new path) pairs
+        self.deleted = list(deleted or [])  # Paths, directories include everything below them
+        self.added = list(added or [])  # ArchiveEntry, replaces an existing file with the same path
+
+    def __bool__(self):
+        return bool(self.renamed or self.deleted or self.added)
+
+
+def local_entry(local_path, archive_path):
+    stat = os.stat(local_path)
+    is_dir = os.path.isdir(local_path)
+    return ArchiveEntry(
+        path=archive_path,
+        size=None if is_dir else stat.st_size,
+        packed_size=None,
+        mtime=int(stat.st_mtime),
+        attributes='D' if is_dir else 'A',
+        crc=None,
+        method='',
+        encrypted=False,
+        is_dir=is_dir,
+    )
+
+
+def entries_for_local_files(local_paths, sub_dir=None):
+    """Return the ArchiveEntry list `7zz a` creates for local files and folders added below `sub_dir`.
+
+    7zz stores each path under its base name, folders with everything inside them.
+    """
+    entries = []
+    prefix = f"{sub_dir}/" if sub_dir else ""
+    for local_path in local_paths:
+        local_path = local_path.rstrip(os.sep)
+        base_path = prefix + os.path.basename(local_path)
+        try:
+            entries.append(local_entry(local_path, base_path))
+        except OSError:
+            continue
+        if not os.path.isdir(local_path):
+            continue
+        for root, dirs, files in os.walk(local_path):
+            relative_root = os.path.relpath(root, local_path)
+            archive_root = base_path if relative_root == '.' else f"{base_path}/{relative_root.replace(os.sep, '/')}"
+            for name in dirs + files:
+                try:
+                    entries.append(local_entry(os.path.join(root, name), f"{archive_root}/{name}"))
+                except OSError:
+                    continue
+    return entries
+
+
+def names_by_pattern(archive_index, nodes, find, replace, use_regex=False, recursive=False):
+    """Return {node: new name} for the entries whose name changes.
+
+    With use_regex `find` is a regular expression substituted in the name, otherwise it is a prefix
+    that is replaced when the name starts with it. With recursive everything below selected folders is included.
+    Raises re.error for an invalid expression.
+    """
+    pattern = re.compile(find) if use_regex else None
+    targets = dict.fromkeys(nodes)
+    if recursive:
+        for node in list(targets):
+            if archive_index.is_dir(node):
+                targets.update(dict.fromkeys(archive_index.iter_subtree(node)))
+
+    new_names = {}
+    for node in targets:
+        name = archive_index.name(node)
+        if pattern is not None:
+            new_name = pattern.sub(replace, name)
+        elif name.startswith(find):
+            new_name = replace + name[len(find):]
+        else:
+            continue
+        if new_name != name:
+            new_names[node] = new_name
+    return new_names
+
+
+def plan_renames(archive_index, new_names):
+    """Turn {node: new name} into the pairs for a single `7zz rn` call and the ChangeSet for the open index.
+
+    7zz applies the first pair matching an item and a folder pair also matches everything below it,
+    so its pairs go deepest first with final paths. The ChangeSet is applied pair by pair,
+    so it goes shallowest first with paths that already include renamed parents.
+    Raises ValueError for an invalid name or if two entries would end up with the same path.
+    """
+    def new_path(node):
+        parts = []
+        while node != ROOT:
+            parts.append(new_names.get(node, archive_index.name(node)))
+            node = archive_index.parent(node)
+        return '/'.join(reversed(parts))
+
+    def depth(node):
+        count = 0
+        while node != ROOT:
+            count += 1
+            node = archive_index.parent(node)
+        return count
+
+    for new_name in new_names.values():
+        if not new_name or '/' in new_name or new_name in ('.', '..'):
+            raise ValueError(f"'{new_name}' is not a valid name.")
+
+    for parent in {archive_index.parent(node) for node in new_names}:
+        seen = set()
+        for child in archive_index.children(parent):
+            name = new_names.get(child, archive_index.name(child))
+            if name in seen:
+                raise ValueError(f"More than one entry would be named '{new_path(child)}'.")
+            seen.add(name)
+
+    nodes = sorted(new_names, key=depth)
+    archive_pairs = [(archive_index.path(node), new_path(node)) for node in reversed(nodes)]
+    changes = ChangeSet()
+    for node in nodes:
+        parent_path = new_path(archive_index.parent(node))
+        old_name = archive_index.name(node)
+        changes.renamed.append((f"{parent_path}/{old_name}" if parent_path else old_name, new_path(node)))
+    return archive_pairs, changes
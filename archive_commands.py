@@ -0,0 +1,45 @@
+import os
+
+
+def write_listfile(names):
+    """Write one archive path per line to a UTF-8 listfile in the scratch space and return its path.
+
+    Passing names through a listfile keeps the command line short however many entries are edited.
+    The caller removes the file once 7zz is done, a crash leaves it to the next session's cleanup.
+    """
+    from scratch_space import ScratchSpace  # Kept out of startup, only edits write listfiles
+
+    fd, listfile_path = ScratchSpace().create_file(prefix='7zgui-', suffix='.lst')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as listfile:
+        for name in names:
+            listfile.write(name + '\n')
+    return listfile_path
+
+
+def remove_listfile(listfile_path):
+    try:
+        os.remove(listfile_path)
+    except OSError:
+        pass
+
+
+def get_rename_command(s7zip_bin, archive_path, listfile_path, switches=()):
+    # The listfile holds old and new paths on alternating lines, all pairs are applied in one rewrite
+    return [s7zip_bin, 'rn', '-scsUTF-8', '-bsp1', *switches, archive_path, '@' + listfile_path]
+
+
+def rename_listfile_names(pairs):
+    for old_path, new_path in pairs:
+        yield old_path
+        yield new_path
+
+
+def get_stream_command(s7zip_bin, archive_path, entry_path, switches=()):
+    # The entry is written to stdout, stdin is closed so a missing password fails instead of waiting
+    return [s7zip_bin, 'e', '-so', '-bd', *switches, archive_path, entry_path]
+
+
+def get_delete_command(s7zip_bin, archive_path, listfile_path, switches=()):
+    # Folders in the listfile are deleted with everything inside them
+    return [s7zip_bin, 'd', '-scsUTF-8', '-bsp1', *switches, archive_path, '@' + listfile_path]
+
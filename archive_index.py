@@ -0,0 +1,502 @@
+import json
+import struct
+from array import array
+
+ROOT = 0
+NO_NODE = -1
+UNKNOWN = -1  # Stored for sizes that 7zz did not report
+NO_TIME = -(1 << 63)
+
+FLAG_DIR = 1
+FLAG_PLACEHOLDER = 2  # Directory implied by a child path, 7zz did not list it
+FLAG_ENCRYPTED = 4
+FLAG_HAS_CRC = 8
+FLAG_REMOVED = 16  # Unlinked by remove(), the slot is kept so node ids stay stable
+
+# Arrays written by to_bytes(), in this order
+SERIALIZED_ARRAYS = ('name_offsets', 'parents', 'name_ids', 'sizes', 'packed_sizes', 'mtimes', 'crcs', 'attribute_ids',
+                     'method_ids', 'flags', 'first_child', 'last_child', 'next_sibling', 'child_counts',
+                     'child_offsets', 'child_nodes')
+
+
+class ArchiveIndex:
+    """Compact, array backed tree of archive entries.
+
+    Every node is an integer id, node 0 is the invisible root. Per-node data lives in typed arrays.
+    Path components are interned as UTF-8 in one byte buffer, attributes and methods in a small string table.
+    Children are chained through first_child/next_sibling while entries are streamed in;
+    finalize() packs them into an offset table so children(node) is a plain slice.
+    """
+
+    def __init__(self):
+        # Attribute and method strings, only a handful of distinct values per archive
+        self.strings = ['']
+        self.string_ids = {'': 0}
+
+        # Interned path components, name n is name_buffer[name_offsets[n]:name_offsets[n + 1]]
+        self.name_buffer = bytearray()
+        self.name_offsets = array('Q', [0, 0])
+        self.name_lookup = {'': 0}  # Dropped by finalize(), rebuilt on demand
+
+        self.parents = array('i', [ROOT])
+        self.name_ids = array('i', [0])
+        self.sizes = array('q', [UNKNOWN])
+        self.packed_sizes = array('q', [UNKNOWN])
+        self.mtimes = array('q', [NO_TIME])
+        self.crcs = array('I', [0])
+        self.attribute_ids = array('i', [self.intern('D')])
+        self.method_ids = array('i', [0])
+        self.flags = array('B', [FLAG_DIR])
+
+        self.first_child = array('i', [NO_NODE])
+        self.last_child = array('i', [NO_NODE])
+        self.next_sibling = array('i', [NO_NODE])
+        self.child_counts = array('i', [0])
+
+        # Offset table built by finalize(), children of node n are child_nodes[offsets[n]:offsets[n + 1]]
+        self.child_offsets = None
+        self.child_nodes = None
+
+        # (parent << 32 | name_id) -> node, directories only
+        self.dir_lookup = {}
+
+        # Consecutive entries usually share their directory
+        self.last_parent_path = ''
+        self.last_parent = ROOT
+
+    def __len__(self):
+        return len(self.parents)
+
+    def entry_count(self):
+        """Number of entries 7zz listed, without the root and placeholder directories."""
+        return sum(1 for flags in self.flags if not flags & (FLAG_PLACEHOLDER | FLAG_REMOVED)) - 1
+
+    def intern_name(self, name):
+        name_lookup = self.name_lookup
+        if name_lookup is None:
+            name_lookup = self.build_name_lookup()
+        name_id = name_lookup.get(name)
+        if name_id is None:
+            name_id = len(self.name_offsets) - 1
+            self.name_buffer += name.encode('utf-8', 'surrogatepass')
+            self.name_offsets.append(len(self.name_buffer))
+            name_lookup[name] = name_id
+        return name_id
+
+    def build_name_lookup(self):
+        self.name_lookup = {self.name_text(name_id): name_id for name_id in range(len(self.name_offsets) - 1)}
+        return self.name_lookup
+
+    def name_text(self, name_id):
+        return self.name_buffer[self.name_offsets[name_id]:self.name_offsets[name_id + 1]].decode('utf-8',
+                                                                                                    'surrogatepass')
+
+    def intern(self, text):
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self.string_ids[text] = string_id
+        return string_id
+
+    # Building
+
+    def add_node(self, parent, name, flags, size=UNKNOWN, packed_size=UNKNOWN, mtime=NO_TIME, crc=0,
+                 attributes='', method=''):
+        node = len(self.parents)
+        name_id = self.intern_name(name)
+        self.parents.append(parent)
+        self.name_ids.append(name_id)
+        self.sizes.append(size)
+        self.packed_sizes.append(packed_size)
+        self.mtimes.append(mtime)
+        self.crcs.append(crc)
+        self.attribute_ids.append(self.intern(attributes))
+        self.method_ids.append(self.intern(method))
+        self.flags.append(flags)
+        self.first_child.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.child_counts.append(0)
+        self.link_child(parent, node)
+        if flags & FLAG_DIR:
+            self.dir_lookup[parent << 32 | name_id] = node
+        return node
+
+    def link_child(self, parent, node):
+        last = self.last_child[parent]
+        if last == NO_NODE:
+            self.first_child[parent] = node
+        else:
+            self.next_sibling[last] = node
+        self.last_child[parent] = node
+        self.child_counts[parent] += 1
+        self.child_offsets = None
+
+    def unlink_child(self, parent, node):
+        previous = NO_NODE
+        child = self.first_child[parent]
+        while child != node:
+            if child == NO_NODE:
+                return
+            previous = child
+            child = self.next_sibling[child]
+
+        following = self.next_sibling[node]
+        if previous == NO_NODE:
+            self.first_child[parent] = following
+        else:
+            self.next_sibling[previous] = following
+        if self.last_child[parent] == node:
+            self.last_child[parent] = previous
+        self.next_sibling[node] = NO_NODE
+        self.child_counts[parent] -= 1
+        self.child_offsets = None
+
+    def get_dir(self, parts):
+        # Walk down from the root, creating placeholder directories for missing levels
+        node = ROOT
+        for part in parts:
+            child = self.dir_lookup.get(node << 32 | self.intern_name(part))
+            if child is None:
+                child = self.add_node(node, part, FLAG_DIR | FLAG_PLACEHOLDER, attributes='D....')
+            node = child
+        return node
+
+    def add_entry(self, entry):
+        """Add an archive_listing.ArchiveEntry and return its node."""
+        parent_path, _, name = entry.path.rpartition('/')
+        if parent_path == self.last_parent_path:
+            parent = self.last_parent
+        else:
+            parent = self.get_dir(parent_path.split('/')) if parent_path else ROOT
+            self.last_parent_path = parent_path
+            self.last_parent = parent
+        mtime = NO_TIME if entry.mtime is None else entry.mtime
+
+        if entry.is_dir:
+            # Keep a 'D' in the stored attributes, callers check for it
+            attributes = entry.attributes if 'D' in entry.attributes else "D" + entry.attributes
+
+            # Entries arrive in archive order, so the directory may already exist as a placeholder
+            node = self.dir_lookup.get(parent << 32 | self.intern_name(name))
+            if node is not None:
+                self.mtimes[node] = mtime
+                self.attribute_ids[node] = self.intern(attributes)
+                self.flags[node] &= ~FLAG_PLACEHOLDER
+                return node
+            return self.add_node(parent, name, FLAG_DIR, mtime=mtime, attributes=attributes)
+
+        flags = 0
+        if entry.encrypted:
+            flags |= FLAG_ENCRYPTED
+        if entry.crc is not None:
+            flags |= FLAG_HAS_CRC
+        return self.add_node(parent, name, flags,
+                             UNKNOWN if entry.size is None else entry.size,
+                             UNKNOWN if entry.packed_size is None else entry.packed_size,
+                             mtime, entry.crc or 0, entry.attributes, entry.method)
+
+    def add_entries(self, entries):
+        for entry in entries:
+            self.add_entry(entry)
+
+    # Editing
+
+    def forget_parent_cache(self):
+        self.last_parent_path = ''
+        self.last_parent = ROOT
+
+    def update_entry(self, node, entry):
+        """Overwrite the data of an existing file node, e.g. after `7zz a` replaced it."""
+        self.sizes[node] = UNKNOWN if entry.size is None else entry.size
+        self.packed_sizes[node] = UNKNOWN if entry.packed_size is None else entry.packed_size
+        self.mtimes[node] = NO_TIME if entry.mtime is None else entry.mtime
+        self.crcs[node] = entry.crc or 0
+        self.attribute_ids[node] = self.intern(entry.attributes)
+        self.method_ids[node] = self.intern(entry.method)
+        flags = 0
+        if entry.encrypted:
+            flags |= FLAG_ENCRYPTED
+        if entry.crc is not None:
+            flags |= FLAG_HAS_CRC
+        self.flags[node] = flags
+
+    def remove(self, node):
+        """Remove a node and everything below it."""
+        parent = self.parents[node]
+        for child in [node, *self.iter_subtree(node)]:
+            if self.flags[child] & FLAG_DIR:
+                self.dir_lookup.pop(self.parents[child] << 32 | self.name_ids[child], None)
+            self.flags[child] |= FLAG_REMOVED
+        self.unlink_child(parent, node)
+        self.forget_parent_cache()
+
+    def move(self, node, new_path):
+        """Give a node a new path, its subtree follows. Returns False if the target already exists."""
+        if self.find(new_path) is not None:
+            return False
+        if new_path.startswith(self.path(node) + '/'):
+            return False  # Cannot move a directory below itself
+        parent_path, _, name = new_path.rpartition('/')
+        parts = parent_path.split('/') if parent_path else []
+        for depth in range(1, len(parts) + 1):
+            existing = self.find('/'.join(parts[:depth]))
+            if existing is None:
+                break
+            if not self.flags[existing] & FLAG_DIR:
+                return False  # A file is in the way
+        # Only a valid move may create the missing folders
+        parent = self.get_dir(parts)
+
+        old_parent = self.parents[node]
+        name_id = self.intern_name(name)
+        if self.flags[node] & FLAG_DIR:
+            self.dir_lookup.pop(old_parent << 32 | self.name_ids[node], None)
+            self.dir_lookup[parent << 32 | name_id] = node
+        self.unlink_child(old_parent, node)
+        self.parents[node] = parent
+        self.name_ids[node] = name_id
+        self.link_child(parent, node)
+        self.forget_parent_cache()
+        return True
+
+    def finalize(self):
+        """Pack the sibling chains into the children offset table and drop the name lookup."""
+        self.name_lookup = None
+
+        count = len(self.parents)
+        offsets = array('i', bytes(4 * (count + 1)))
+        position = 0
+        for node in range(count):
+            offsets[node] = position
+            position += self.child_counts[node]
+        offsets[count] = position
+
+        child_nodes = array('i', bytes(4 * position))
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        for node in range(count):
+            position = offsets[node]
+            child = first_child[node]
+            while child != NO_NODE:
+                child_nodes[position] = child
+                position += 1
+                child = next_sibling[child]
+
+        self.child_offsets = offsets
+        self.child_nodes = child_nodes
+
+    # Serialization
+
+    def to_bytes(self):
+        """Serialize a finalized index, the raw arrays are written as they are in memory.
+
+        Removed nodes are left out, a patched index is written as if it had been listed that way.
+        """
+        if self.child_offsets is None:
+            self.finalize()
+        index = self.compacted()
+        header = {
+            'strings': index.strings,
+            'name_buffer': len(index.name_buffer),
+            'arrays': [[name, getattr(index, name).typecode, len(getattr(index, name))] for name in SERIALIZED_ARRAYS],
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        parts = [struct.pack('<I', len(header_bytes)), header_bytes, bytes(index.name_buffer)]
+        parts.extend(getattr(index, name).tobytes() for name in SERIALIZED_ARRAYS)
+        return b''.join(parts)
+
+    def compacted(self):
+        """Return a finalized copy without removed nodes, node ids are renumbered. Returns self if none was removed."""
+        flags = self.flags
+        if not any(node_flags & FLAG_REMOVED for node_flags in flags):
+            return self
+        if self.child_offsets is None:
+            self.finalize()
+        kept = [node for node in range(len(flags)) if not flags[node] & FLAG_REMOVED]
+        new_ids = array('i', bytes(4 * len(flags)))
+        for new_id, node in enumerate(kept):
+            new_ids[node] = new_id
+
+        index = ArchiveIndex()
+        index.strings = list(self.strings)
+        index.string_ids = dict(self.string_ids)
+        index.name_buffer = bytearray(self.name_buffer)
+        index.name_offsets = array('Q', self.name_offsets)
+        index.name_lookup = None
+        for name in ('name_ids', 'sizes', 'packed_sizes', 'mtimes', 'crcs', 'attribute_ids', 'method_ids', 'flags',
+                     'child_counts'):
+            values = getattr(self, name)
+            setattr(index, name, array(values.typecode, [values[node] for node in kept]))
+        index.parents = array('i', [new_ids[self.parents[node]] for node in kept])
+
+        # Removed nodes are unlinked from their parents, every child of a kept node is kept as well
+        count = len(kept)
+        index.first_child = array('i', [NO_NODE]) * count
+        index.last_child = array('i', [NO_NODE]) * count
+        index.next_sibling = array('i', [NO_NODE]) * count
+        child_offsets = array('i', bytes(4 * (count + 1)))
+        child_nodes = array('i')
+        for new_id, node in enumerate(kept):
+            child_offsets[new_id] = len(child_nodes)
+            previous = NO_NODE
+            for child in self.children(node):
+                child = new_ids[child]
+                child_nodes.append(child)
+                if previous == NO_NODE:
+                    index.first_child[new_id] = child
+                else:
+                    index.next_sibling[previous] = child
+                previous = child
+            index.last_child[new_id] = previous
+        child_offsets[count] = len(child_nodes)
+        index.child_offsets = child_offsets
+        index.child_nodes = child_nodes
+
+        index.dir_lookup = {index.parents[node] << 32 | index.name_ids[node]: node
+                            for node in range(1, count) if index.flags[node] & FLAG_DIR}
+        return index
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild an index written by to_bytes(), raises ValueError for truncated or foreign data."""
+        index = cls()
+        view = memoryview(data)
+        try:
+            header_size = struct.unpack_from('<I', view)[0]
+            position = 4 + header_size
+            header = json.loads(bytes(view[4:position]).decode('utf-8'))
+
+            index.strings = header['strings']
+            index.string_ids = {text: string_id for string_id, text in enumerate(index.strings)}
+            index.name_buffer = bytearray(view[position:position + header['name_buffer']])
+            position += header['name_buffer']
+
+            for name, typecode, length in header['arrays']:
+                if name not in SERIALIZED_ARRAYS:
+                    raise ValueError(f"Unknown array {name!r}")
+                values = array(typecode)
+                end = position + length * values.itemsize
+                values.frombytes(view[position:end])
+                position = end
+                setattr(index, name, values)
+            if position != len(view) or len(index.parents) != len(index.child_offsets) - 1:
+                raise ValueError("size mismatch")
+        except (struct.error, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid serialized index: {e}") from e
+
+        index.name_lookup = None
+        flags = index.flags
+        parents = index.parents
+        name_ids = index.name_ids
+        index.dir_lookup = {parents[node] << 32 | name_ids[node]: node for node in range(1, len(parents))
+                            if flags[node] & FLAG_DIR and not flags[node] & FLAG_REMOVED}
+        return index
+
+    # Navigation
+
+    def parent(self, node):
+        return self.parents[node]
+
+    def name(self, node):
+        return self.name_text(self.name_ids[node])
+
+    def is_dir(self, node):
+        return self.flags[node] & FLAG_DIR != 0
+
+    def is_encrypted(self, node):
+        return self.flags[node] & FLAG_ENCRYPTED != 0
+
+    def size(self, node):
+        size = self.sizes[node]
+        return None if size == UNKNOWN else size
+
+    def packed_size(self, node):
+        size = self.packed_sizes[node]
+        return None if size == UNKNOWN else size
+
+    def mtime(self, node):
+        mtime = self.mtimes[node]
+        return None if mtime == NO_TIME else mtime
+
+    def crc(self, node):
+        return self.crcs[node] if self.flags[node] & FLAG_HAS_CRC else None
+
+    def attributes(self, node):
+        return self.strings[self.attribute_ids[node]]
+
+    def method(self, node):
+        return self.strings[self.method_ids[node]]
+
+    def child_count(self, node):
+        return self.child_counts[node]
+
+    def children(self, node):
+        if self.child_offsets is not None:
+            return self.child_nodes[self.child_offsets[node]:self.child_offsets[node + 1]]
+        children = []
+        child = self.first_child[node]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def path(self, node):
+        parts = []
+        while node != ROOT:
+            parts.append(self.name_text(self.name_ids[node]))
+            node = self.parents[node]
+        return '/'.join(reversed(parts))
+
+    def find(self, path):
+        """Return the node for a path inside the archive, or None."""
+        if not path:
+            return ROOT
+        name_lookup = self.name_lookup
+        if name_lookup is None:
+            name_lookup = self.build_name_lookup()
+        parts = path.split('/')
+        node = ROOT
+        for part in parts[:-1]:
+            name_id = name_lookup.get(part)
+            node = self.dir_lookup.get(node << 32 | name_id) if name_id is not None else None
+            if node is None:
+                return None
+
+        name_id = name_lookup.get(parts[-1])
+        if name_id is None:
+            return None
+        child = self.dir_lookup.get(node << 32 | name_id)
+        if child is not None:
+            return child
+        for child in self.children(node):
+            if self.name_ids[child] == name_id:
+                return child
+        return None
+
+    # Aggregation
+
+    def iter_subtree(self, node):
+        """Yield every node below `node` (excluding itself), depth first."""
+        stack = [node]
+        while stack:
+            for child in self.children(stack.pop()):
+                yield child
+                if self.flags[child] & FLAG_DIR:
+                    stack.append(child)
+
+    def subtree_totals(self, node=ROOT):
+        """Return (file count, total size, total packed size) of everything below `node`."""
+        files = 0
+        size = 0
+        packed_size = 0
+        for child in self.iter_subtree(node):
+            if self.flags[child] & FLAG_DIR:
+                continue
+            files += 1
+            if self.sizes[child] != UNKNOWN:
+                size += self.sizes[child]
+            if self.packed_sizes[child] != UNKNOWN:
+                packed_size += self.packed_sizes[child]
+        return files, size, packed_size
@@ -0,0 +1,199 @@
+import re
+import time
+from collections import namedtuple
+
+
+# One entry of a `7zz l -slt` technical listing
+ArchiveEntry = namedtuple('ArchiveEntry', [
+    'path',  # Path inside the archive, '/' separated
+    'size',  # Unpacked size in bytes, None when unknown
+    'packed_size',  # Packed size in bytes, None when unknown (e.g. inside a solid block)
+    'mtime',  # Modification time as a unix timestamp, None when not stored
+    'attributes',  # Raw attribute string as printed by 7zz
+    'crc',  # CRC32 as an int, None when not stored
+    'method',  # Compression method, e.g. 'LZMA2:24'
+    'encrypted',  # True if the entry is encrypted
+    'is_dir',
+])
+
+
+# Code pages for the names of archives that do not store them as Unicode, e.g. zips made on an old Windows.
+# The number is passed to 7zz as -mcp, None lets 7zz decide.
+CODE_PAGES = [
+    ("Automatic", None),
+    ("UTF-8", 65001),
+    ("Western, DOS (437)", 437),
+    ("Western, Windows (1252)", 1252),
+    ("Central European (1250)", 1250),
+    ("Cyrillic, Windows (1251)", 1251),
+    ("Cyrillic, DOS (866)", 866),
+    ("Greek (1253)", 1253),
+    ("Turkish (1254)", 1254),
+    ("Hebrew (1255)", 1255),
+    ("Arabic (1256)", 1256),
+    ("Thai (874)", 874),
+    ("Japanese, Shift-JIS (932)", 932),
+    ("Chinese Simplified, GBK (936)", 936),
+    ("Korean (949)", 949),
+    ("Chinese Traditional, Big5 (950)", 950),
+]
+
+NAME_SAMPLE_SIZE = 16 * 1024  # Bytes of non-ASCII names handed to chardet at most
+
+
+def code_page_switches(code_page):
+    return [f'-mcp={code_page}'] if code_page else []
+
+
+def get_list_command(s7zip_bin, archive_path, code_page=None):
+    # -ba drops the banner and the summary, every remaining block describes one entry.
+    # -sccUTF-8 makes 7zz print the names it decoded as UTF-8, whatever the console charset.
+    return [s7zip_bin, 'l', '-slt', '-ba', '-sccUTF-8', *code_page_switches(code_page), archive_path]
+
+
+def get_summary_command(s7zip_bin, archive_path):
+    # The plain listing ends with a totals line, only that line is parsed. 7zz still prints every entry before it.
+    return [s7zip_bin, 'l', archive_path]
+
+
+SUMMARY_SEPARATOR = b'-------------------'
+SUMMARY_COUNTS = re.compile(rb'(?:(\d+) files?)?(?:,\s*)?(?:(\d+) folders?)?\s*$')
+
+
+def parse_summary_line(line):
+    """Return (file count, total size) from the totals line of a plain `7zz l` listing, or None."""
+    match = SUMMARY_COUNTS.search(line.rstrip(b'\r\n'))
+    if match is None or (match.group(1) is None and match.group(2) is None):
+        return None
+    files = int(match.group(1) or 0)
+    # Date and time may be blank, the first plain number is the unpacked size
+    numbers = [token for token in line[:match.start()].split() if token.isdigit()]
+    size = int(numbers[0]) if numbers else 0
+    return files, size
+
+
+def read_summary(lines):
+    """Return the parsed totals line from an iterable of raw `7zz l` output lines, or None."""
+    separators = 0
+    for raw_line in lines:
+        if raw_line.startswith(SUMMARY_SEPARATOR):
+            separators += 1
+        elif separators == 2:
+            return parse_summary_line(raw_line)
+    return None
+
+
+def detect_name_encoding(lines):
+    """Guess the encoding of raw listing lines from the non-ASCII bytes of their names.
+
+    With -sccUTF-8 the names are already UTF-8 and chardet never runs. Only a 7zz that ignored
+    the switch leaves other bytes, then a bounded sample of just those names is detected.
+    """
+    sample = bytearray()
+    for raw_line in lines:
+        if raw_line.startswith(b'Path = ') and not raw_line.isascii():
+            sample += raw_line[7:].rstrip(b'\r\n') + b'\n'
+            if len(sample) >= NAME_SAMPLE_SIZE:
+                break
+    if not sample:
+        return 'utf-8'
+    try:
+        bytes(sample).decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    import chardet  # Slow to import, only needed for this fallback
+    return chardet.detect(bytes(sample[:NAME_SAMPLE_SIZE]))['encoding'] or 'utf-8'
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_mtime(value):
+    # '2023-11-23 10:20:30.1234567' in local time
+    if len(value) < 19:
+        return None
+    try:
+        return int(time.mktime((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                int(value[11:13]), int(value[14:16]), int(value[17:19]), 0, 0, -1)))
+    except (ValueError, OverflowError):
+        return None
+
+
+def format_mtime(mtime):
+    if mtime is None:
+        return ''
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))
+
+
+def make_entry(fields, encoding):
+    attributes = fields.get(b'Attributes', b'').decode(encoding, 'replace')
+    folder = fields.get(b'Folder')
+    if folder is not None:
+        is_dir = folder == b'+'
+    else:
+        is_dir = 'D' in attributes.split(' ')[0]
+
+    crc = fields.get(b'CRC')
+    try:
+        crc = int(crc, 16) if crc else None
+    except ValueError:
+        crc = None
+
+    return ArchiveEntry(
+        path=fields[b'Path'].decode(encoding, 'replace'),
+        size=parse_int(fields.get(b'Size', b'')),
+        packed_size=parse_int(fields.get(b'Packed Size', b'')),
+        mtime=parse_mtime(fields.get(b'Modified', b'')),
+        attributes=attributes,
+        crc=crc,
+        method=fields.get(b'Method', b'').decode(encoding, 'replace'),
+        encrypted=fields.get(b'Encrypted') == b'+',
+        is_dir=is_dir,
+    )
+
+
+def iter_slt_entries(lines, encoding='utf-8'):
+    """Yield an ArchiveEntry for every block of `7zz l -slt` output.
+
+    `lines` is any iterable of raw byte lines, typically the stdout pipe of the 7zz process,
+    so entries are produced while 7zz is still writing and only one block is held in memory.
+    """
+    fields = {}
+    in_header = False
+
+    for raw_line in lines:
+        line = raw_line.rstrip(b'\r\n')
+
+        if not line:
+            # A blank line closes the current block
+            if b'Path' in fields and not in_header:
+                yield make_entry(fields, encoding)
+            fields = {}
+            continue
+
+        if line == b'--':
+            # Archive properties follow until the dashed separator
+            in_header = True
+            fields = {}
+            continue
+
+        if line.startswith(b'----------'):
+            in_header = False
+            fields = {}
+            continue
+
+        # Split on the first ' = ' only, values (paths) are kept verbatim including leading spaces
+        key, separator, value = line.partition(b' = ')
+        if not separator:
+            if line.endswith(b' ='):
+                fields[line[:-2]] = b''
+            continue
+        fields[key] = value
+
+    if b'Path' in fields and not in_header:
+        yield make_entry(fields, encoding)
@@ -0,0 +1,430 @@
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+import archive_listing
+from archive_index import ArchiveIndex, ROOT
+
+
+def format_size(size):
+    """Converts bytes to a human-readable string."""
+    if size is None:
+        return ""
+    units = ["bytes", "KiB", "MiB", "GiB", "TiB"]
+
+    for unit in units:
+        if size < 1024:
+            return f"{size:.2f} {unit}"
+        size /= 1024.0
+    return f"{size:.2f} TiB"
+
+
+class ArchiveTreeModel(QAbstractItemModel):
+    """Lazy tree model over an ArchiveIndex.
+
+    Rows only exist as node ids; text, sizes and icons are produced in data() when the view paints them.
+    Children are sorted and exposed in chunks of FETCH_BATCH the first time their parent is expanded.
+    set_filter() narrows the tree down to search matches and the folders leading to them.
+    """
+    FETCH_BATCH = 1000
+    HEADERS = ["Name", "Size", "Compressed", "DateTime"]
+
+    def __init__(self, folder_icon, file_icon, parent=None):
+        super().__init__(parent)
+        self.folder_icon = folder_icon
+        self.file_icon = file_icon
+        self.archive_index = ArchiveIndex()
+        self.sort_column = 0
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        # Parent node -> child nodes in display order, only for parents the view asked for.
+        # The root is always present so streamed top-level entries are announced to the view.
+        self.orders = {ROOT: []}
+        self.fetched = {ROOT: 0}  # Parent node -> number of rows exposed to the view
+        self.dir_rows = {}  # Directory node -> row inside its parent, used by parent()
+        self.visible = None  # Nodes left by the filter, None shows everything
+        self.visible_counts = {}  # Parent node -> number of its visible children
+
+    def clear(self):
+        self.beginResetModel()
+        self.archive_index = ArchiveIndex()
+        self.orders = {ROOT: []}
+        self.fetched = {ROOT: 0}
+        self.dir_rows = {}
+        self.visible = None
+        self.visible_counts = {}
+        self.endResetModel()
+
+    def set_index(self, archive_index):
+        """Show a complete, already built index (e.g. restored from the listing cache)."""
+        self.beginResetModel()
+        self.archive_index = archive_index
+        self.orders = {}  # Sorted lazily with the current sort settings
+        self.fetched = {}
+        self.dir_rows = {}
+        self.visible = None
+        self.visible_counts = {}
+        self.endResetModel()
+
+    def set_filter(self, nodes):
+        """Only show `nodes` and their ancestors, None shows the whole tree again."""
+        if nodes is None and self.visible is None:
+            return
+        self.beginResetModel()
+        self.orders = {}
+        self.fetched = {}
+        self.dir_rows = {}
+        if nodes is None:
+            self.visible = None
+            self.visible_counts = {}
+        else:
+            parents = self.archive_index.parents
+            visible = set()
+            visible_counts = {}
+            for node in nodes:
+                # Walk up until a folder already known to be visible
+                while node != ROOT and node not in visible:
+                    visible.add(node)
+                    parent_node = parents[node]
+                    visible_counts[parent_node] = visible_counts.get(parent_node, 0) + 1
+                    node = parent_node
+            self.visible = visible
+            self.visible_counts = visible_counts
+        self.endResetModel()
+
+    def child_total(self, node):
+        if self.visible is not None:
+            return self.visible_counts.get(node, 0)
+        return self.archive_index.child_count(node)
+
+    # Node helpers
+
+    def node_of(self, index):
+        return index.internalId() if index.isValid() else ROOT
+
+    def path(self, index):
+        return self.archive_index.path(self.node_of(index))
+
+    def is_dir(self, index):
+        return self.archive_index.is_dir(self.node_of(index))
+
+    def attributes(self, index):
+        return self.archive_index.attributes(self.node_of(index))
+
+    def crc(self, index):
+        return self.archive_index.crc(self.node_of(index))
+
+    def sort_key(self):
+        archive_index = self.archive_index
+        if self.sort_column == 1:
+            return archive_index.sizes.__getitem__
+        if self.sort_column == 2:
+            return archive_index.packed_sizes.__getitem__
+        if self.sort_column == 3:
+            return archive_index.mtimes.__getitem__
+        # Folders first, then case-insensitive names
+        return lambda node: (not archive_index.is_dir(node), archive_index.name(node).casefold())
+
+    def order(self, parent_node):
+        order = self.orders.get(parent_node)
+        if order is None:
+            children = self.archive_index.children(parent_node)
+            if self.visible is not None:
+                children = [node for node in children if node in self.visible]
+            order = sorted(children, key=self.sort_key(),
+                           reverse=self.sort_order == Qt.SortOrder.DescendingOrder)
+            self.orders[parent_node] = order
+            self.update_dir_rows(order)
+        return order
+
+    def update_dir_rows(self, order, start=0):
+        is_dir = self.archive_index.is_dir
+        for row in range(start, len(order)):
+            node = order[row]
+            if is_dir(node):
+                self.dir_rows[node] = row
+
+    def row_of(self, node):
+        row = self.dir_rows.get(node)
+        if row is None:
+            row = self.order(self.archive_index.parent(node)).index(node)
+        return row
+
+    def rows_in(self, parent_node):
+        """Node -> row of every child of parent_node, for looking up many file rows with a single pass."""
+        return {node: row for row, node in enumerate(self.order(parent_node))}
+
+    def index_of(self, node, column=0):
+        if node == ROOT:
+            return QModelIndex()
+        return self.createIndex(self.row_of(node), column, node)
+
+    # Streaming
+
+    def append_entries(self, entries):
+        first_new = len(self.archive_index)
+        self.archive_index.add_entries(entries)
+        self.announce_nodes(range(first_new, len(self.archive_index)))
+
+    def announce_nodes(self, nodes):
+        # Group the new nodes by parent, only parents whose children were already shown need signals
+        new_children = {}
+        parents = self.archive_index.parents
+        for node in nodes:
+            parent_node = parents[node]
+            if parent_node in self.orders:
+                new_children.setdefault(parent_node, []).append(node)
+
+        for parent_node, nodes in new_children.items():
+            order = self.orders[parent_node]
+            start = len(order)
+            if self.fetched.get(parent_node, 0) < start:
+                # Not everything is visible yet, canFetchMore() picks the new rows up
+                order.extend(nodes)
+                self.update_dir_rows(order, start)
+                continue
+            self.beginInsertRows(self.index_of(parent_node), start, start + len(nodes) - 1)
+            order.extend(nodes)
+            self.update_dir_rows(order, start)
+            self.fetched[parent_node] = len(order)
+            self.endInsertRows()
+
+    # Editing
+
+    def apply_changes(self, changes):
+        """Patch the index and the view with an archive_changes.ChangeSet.
+
+        Returns False if a change does not fit the current tree, the caller should relist the archive then.
+        """
+        archive_index = self.archive_index
+        reorder = False
+
+        deleted = []
+        for path in changes.deleted:
+            node = archive_index.find(path)
+            if node is None or node == ROOT:
+                return False
+            deleted.append(node)
+        deleted = self.drop_descendants(deleted)
+        self.remove_rows(deleted)
+        for node in deleted:
+            self.forget_subtree(node)
+            archive_index.remove(node)
+
+        for old_path, new_path in changes.renamed:
+            node = archive_index.find(old_path)
+            if node is None or node == ROOT:
+                return False
+            if old_path.rpartition('/')[0] == new_path.rpartition('/')[0]:
+                # Same folder, the row only changes its name and is moved by the re-sort below
+                if not archive_index.move(node, new_path):
+                    return False
+                reorder = True
+                continue
+            self.remove_rows([node])
+            first_new = len(archive_index)
+            if not archive_index.move(node, new_path):
+                return False
+            # Missing target folders are created as placeholders
+            self.announce_nodes([*range(first_new, len(archive_index)), node])
+            reorder = True
+
+        first_new = len(archive_index)
+        for entry in changes.added:
+            node = archive_index.find(entry.path)
+            if node is None:
+                archive_index.add_entry(entry)
+            elif not entry.is_dir and not archive_index.is_dir(node):
+                archive_index.update_entry(node, entry)
+                self.refresh_row(node)
+            elif entry.is_dir != archive_index.is_dir(node):
+                return False
+        if len(archive_index) > first_new:
+            self.announce_nodes(range(first_new, len(archive_index)))
+            reorder = True
+
+        if reorder:
+            self.sort(self.sort_column, self.sort_order)
+        return True
+
+    def drop_descendants(self, nodes):
+        # Removing a folder already removes everything below it
+        selected = set(nodes)
+        parents = self.archive_index.parents
+        result = []
+        for node in dict.fromkeys(nodes):
+            ancestor = parents[node]
+            while ancestor != ROOT and ancestor not in selected:
+                ancestor = parents[ancestor]
+            if ancestor == ROOT:
+                result.append(node)
+        return result
+
+    def remove_rows(self, nodes):
+        """Take nodes out of their parents' rows, one removal per run of adjacent visible rows."""
+        by_parent = {}
+        for node in nodes:
+            by_parent.setdefault(self.archive_index.parent(node), []).append(node)
+
+        for parent_node, children in by_parent.items():
+            order = self.orders.get(parent_node)
+            if order is None:
+                continue
+            fetched = self.fetched.get(parent_node, 0)
+            child_rows = self.rows_in(parent_node)
+            rows = sorted((child_rows[node] for node in children), reverse=True)
+            for node in children:
+                self.dir_rows.pop(node, None)
+
+            # Bottom up, so the rows still to be removed keep their numbers
+            parent_index = self.index_of(parent_node)
+            position = 0
+            while position < len(rows):
+                last = first = rows[position]
+                position += 1
+                while position < len(rows) and rows[position] == first - 1:
+                    first = rows[position]
+                    position += 1
+                visible = first < fetched
+                if visible:
+                    self.beginRemoveRows(parent_index, first, min(last, fetched - 1))
+                del order[first:last + 1]
+                if visible:
+                    fetched -= min(last, fetched - 1) - first + 1
+                    self.fetched[parent_node] = fetched
+                self.update_dir_rows(order, first)
+                if visible:
+                    self.endRemoveRows()
+
+    def forget_subtree(self, node):
+        archive_index = self.archive_index
+        for child in [node, *archive_index.iter_subtree(node)]:
+            if archive_index.is_dir(child):
+                self.orders.pop(child, None)
+                self.fetched.pop(child, None)
+                self.dir_rows.pop(child, None)
+
+    def refresh_row(self, node):
+        parent_node = self.archive_index.parent(node)
+        if parent_node not in self.orders:
+            return
+        row = self.row_of(node)
+        if row < self.fetched.get(parent_node, 0):
+            self.dataChanged.emit(self.createIndex(row, 0, node),
+                                  self.createIndex(row, len(self.HEADERS) - 1, node))
+
+    # QAbstractItemModel interface
+
+    def index(self, row, column, parent=QModelIndex()):
+        parent_node = self.node_of(parent)
+        order = self.order(parent_node)
+        if row < 0 or row >= len(order) or column < 0 or column >= len(self.HEADERS):
+            return QModelIndex()
+        return self.createIndex(row, column, order[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_of(self.archive_index.parent(index.internalId()))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        parent_node = self.node_of(parent)
+        if not self.archive_index.is_dir(parent_node):
+            return 0
+        return self.fetched.get(parent_node, 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return False
+        return self.child_total(self.node_of(parent)) > 0
+
+    def canFetchMore(self, parent):
+        parent_node = self.node_of(parent)
+        return self.fetched.get(parent_node, 0) < self.child_total(parent_node)
+
+    def fetchMore(self, parent):
+        parent_node = self.node_of(parent)
+        order = self.order(parent_node)
+        start = self.fetched.get(parent_node, 0)
+        end = min(len(order), start + self.FETCH_BATCH)
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        self.fetched[parent_node] = end
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        column = index.column()
+        archive_index = self.archive_index
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return archive_index.name(node)
+            if column == 3:
+                return archive_listing.format_mtime(archive_index.mtime(node))
+            if archive_index.is_dir(node):
+                return '--'
+            if column == 1:
+                return format_size(archive_index.size(node))
+            return format_size(archive_index.packed_size(node))
+
+        if role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self.folder_icon if archive_index.is_dir(node) else self.file_icon
+
+        if role == Qt.ItemDataRole.UserRole:
+            return archive_index.attributes(node)
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = column
+        self.sort_order = order
+        self.resort()
+        self.layoutChanged.emit()
+
+    def resort(self):
+        # Must be wrapped in layoutAboutToBeChanged/layoutChanged
+        old_indexes = self.persistentIndexList()
+        nodes = [(index.internalId(), index.column()) for index in old_indexes]
+
+        key = self.sort_key()
+        reverse = self.sort_order == Qt.SortOrder.DescendingOrder
+        for order in self.orders.values():
+            order.sort(key=key, reverse=reverse)
+        self.dir_rows = {}
+        for order in self.orders.values():
+            self.update_dir_rows(order)
+
+        # Files have no row map of their own, one is built per folder that has persistent file indexes
+        file_rows = {}
+        new_indexes = []
+        for node, column in nodes:
+            parent_node = self.archive_index.parent(node)
+            row = self.dir_rows.get(node)
+            if row is None:
+                child_rows = file_rows.get(parent_node)
+                if child_rows is None:
+                    child_rows = file_rows[parent_node] = self.rows_in(parent_node)
+                row = child_rows[node]
+            if row < self.fetched.get(parent_node, 0):
+                new_indexes.append(self.createIndex(row, column, node))
+            else:
+                # Sorted out of the fetched window
+                new_indexes.append(QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
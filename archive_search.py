@@ -0,0 +1,253 @@
+import bisect
+import re
+import time
+from array import array
+from collections import namedtuple
+
+from PySide6.QtCore import QThread, Signal
+
+from archive_index import FLAG_DIR, FLAG_REMOVED, NO_TIME, UNKNOWN
+
+SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+PREDICATE_PATTERN = re.compile(r'^(size|date)(<=|>=|<|>|=)(.+)$', re.IGNORECASE)
+SIZE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*([bkmgt]?)(?:i?b)?$', re.IGNORECASE)
+REGEX_PREFIX = 're:'
+MAX_VALUE = (1 << 63) - 1
+MAX_CANDIDATES = 50000  # Files left by a size or date that are matched one by one against a regex
+
+# A name matches if it contains substring and regex finds it, either may be empty.
+# A glob has both, its longest literal part is found with str.find before the regex runs.
+SearchQuery = namedtuple('SearchQuery', ['substring', 'regex', 'predicates'])
+# A file matches if low <= its value < high, field names the ArchiveIndex array
+Predicate = namedtuple('Predicate', ['field', 'low', 'high'])
+
+
+def parse_size(text):
+    match = SIZE_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Invalid size {text!r}, e.g. 10m or 512k")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def parse_date(text):
+    """Return the (start, end) timestamps of a year, month or day like 2024, 2024-05 or 2024-05-17."""
+    parts = text.split('-')
+    try:
+        numbers = [int(part) for part in parts]
+        if not 1 <= len(numbers) <= 3:
+            raise ValueError
+        year, month, day = numbers + [1] * (3 - len(numbers))
+        start = time.mktime((year, month, day, 0, 0, 0, 0, 0, -1))
+        if len(numbers) == 1:
+            end = time.mktime((year + 1, 1, 1, 0, 0, 0, 0, 0, -1))
+        elif len(numbers) == 2:
+            end = time.mktime((year + month // 12, month % 12 + 1, 1, 0, 0, 0, 0, 0, -1))
+        else:
+            end = time.mktime((year, month, day + 1, 0, 0, 0, 0, 0, -1))
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid date {text!r}, e.g. 2024, 2024-05 or 2024-05-17") from None
+    return int(start), int(end)
+
+
+def make_predicate(field, operator, value):
+    """Return the Predicate of e.g. size>10m or date>=2024-01, unknown sizes and times never match."""
+    if field.lower() == 'size':
+        start = parse_size(value)
+        end = start + 1
+        lowest = UNKNOWN + 1
+        field = 'sizes'
+    else:
+        # A date stands for the whole period, date>2024 starts in 2025
+        start, end = parse_date(value)
+        lowest = NO_TIME + 1
+        field = 'mtimes'
+    low, high = {'<': (lowest, start), '<=': (lowest, end), '>': (end, MAX_VALUE), '>=': (start, MAX_VALUE),
+                 '=': (start, end)}[operator]
+    return Predicate(field, low, high)
+
+
+def glob_to_regex(pattern):
+    # The whole name has to match, one name per line of the searched text
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append('[^\n]*')
+        elif char == '?':
+            parts.append('[^\n]')
+        else:
+            parts.append(re.escape(char))
+    return re.compile('^' + ''.join(parts) + '$', re.IGNORECASE | re.MULTILINE)
+
+
+def parse_query(text):
+    """Split a search text into a name pattern and size/date predicates, raises ValueError for bad input.
+
+    The name part is a case-insensitive substring, a glob if it holds * or ?, or a regex after `re:`.
+    """
+    words = []
+    predicates = []
+    for word in text.split():
+        match = PREDICATE_PATTERN.match(word)
+        if match is not None:
+            predicates.append(make_predicate(*match.groups()))
+        else:
+            words.append(word)
+    name = ' '.join(words)
+
+    if name.startswith(REGEX_PREFIX):
+        try:
+            regex = re.compile(name[len(REGEX_PREFIX):], re.IGNORECASE | re.MULTILINE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from None
+        return SearchQuery('', regex, predicates)
+    name = name.casefold()
+    if '*' in name or '?' in name:
+        literal = max(re.split(r'[*?]', name), key=len)
+        return SearchQuery(literal, glob_to_regex(name), predicates)
+    return SearchQuery(name, None, predicates)
+
+
+class NameIndex:
+    """The case-folded interned names of an ArchiveIndex in one string, one per line, and the nodes of each name.
+
+    str.find and re run over the whole string in C, a million names are searched in milliseconds.
+    Files are also kept sorted by size and by time, a selective size or date turns into a slice found by bisection.
+    Built once a listing is complete; after the index is edited a new one has to be built.
+    """
+
+    def __init__(self, archive_index):
+        self.archive_index = archive_index
+        name_count = len(archive_index.name_offsets) - 1
+        names = [archive_index.name_text(name_id).casefold().replace('\n', ' ') for name_id in range(name_count)]
+        self.text = '\n'.join(names) + '\n'
+        # Name n is text[starts[n]:starts[n + 1] - 1], the last start is the end of the text
+        self.starts = array('q', bytes(8 * (name_count + 1)))
+        position = 0
+        for name_id, name in enumerate(names):
+            self.starts[name_id] = position
+            position += len(name) + 1
+        self.starts[name_count] = position
+
+        # Nodes of name n are nodes[node_offsets[n]:node_offsets[n + 1]]
+        name_ids = archive_index.name_ids
+        node_offsets = array('i', bytes(4 * (name_count + 1)))
+        for node in range(1, len(name_ids)):
+            node_offsets[name_ids[node] + 1] += 1
+        for name_id in range(name_count):
+            node_offsets[name_id + 1] += node_offsets[name_id]
+        positions = array('i', node_offsets)
+        nodes = array('i', bytes(4 * node_offsets[name_count]))
+        for node in range(1, len(name_ids)):
+            name_id = name_ids[node]
+            nodes[positions[name_id]] = node
+            positions[name_id] += 1
+        self.node_offsets = node_offsets
+        self.nodes = nodes
+
+        # Field -> (files in increasing order of the field, their values)
+        flags = archive_index.flags
+        files = [node for node in range(1, len(flags)) if not flags[node] & FLAG_DIR]
+        self.sorted_files = {}
+        for field in ('sizes', 'mtimes'):
+            values = getattr(archive_index, field)
+            files.sort(key=values.__getitem__)
+            self.sorted_files[field] = (array('i', files), array('q', [values[node] for node in files]))
+
+    def matching_name_ids(self, query):
+        """Yield the ids of the names matching the query in increasing order."""
+        starts = self.starts
+        bisect_right = bisect.bisect_right
+        if query.regex is not None and not query.substring:
+            # A hit only points at a candidate name: a pattern like \s or [^x] can match across the
+            # line breaks, so the name is checked on its own and the next search starts at the next name
+            text = self.text
+            search = query.regex.search
+            name_count = len(starts) - 1
+            position = 0
+            while True:
+                match = search(text, position)
+                if match is None:
+                    return
+                name_id = bisect_right(starts, match.start()) - 1
+                if name_id >= name_count:
+                    return  # The empty line after the last name
+                if self.name_matches(query, name_id):
+                    yield name_id
+                position = starts[name_id + 1]
+        if not query.substring:
+            yield from range(len(starts) - 1)
+            return
+        text = self.text
+        substring = query.substring
+        position = 0
+        while True:
+            position = text.find(substring, position)
+            if position < 0:
+                return
+            name_id = bisect_right(starts, position) - 1
+            if query.regex is None or self.name_matches(query, name_id):
+                yield name_id
+            # Go on with the next name, one match per name is enough
+            position = starts[name_id + 1]
+
+    def candidate_files(self, query):
+        """Return the files passing the most selective predicate if they are fewer than the names to look at."""
+        best = None
+        for predicate in query.predicates:
+            files, values = self.sorted_files[predicate.field]
+            low = bisect.bisect_left(values, predicate.low)
+            high = bisect.bisect_left(values, predicate.high, low)
+            if best is None or high - low < len(best):
+                best = files[low:high]
+        if best is None:
+            return None
+        if query.substring:
+            # Counting is a single pass in C, it bounds the names the other way has to go through
+            return best if len(best) < self.text.count(query.substring) else None
+        if query.regex is not None and len(best) > MAX_CANDIDATES:
+            return None
+        return best
+
+    def name_matches(self, query, name_id):
+        name = self.text[self.starts[name_id]:self.starts[name_id + 1] - 1]
+        return query.substring in name and (query.regex is None or query.regex.search(name) is not None)
+
+    def search(self, query, limit=None):
+        """Return (nodes, complete): the matching nodes, at most `limit`, and whether that is all of them."""
+        flags = self.archive_index.flags
+        checks = [(getattr(self.archive_index, predicate.field), predicate.low, predicate.high)
+                  for predicate in query.predicates]
+        skipped = FLAG_REMOVED | FLAG_DIR if checks else FLAG_REMOVED  # Folders have no size or time of their own
+        candidates = self.candidate_files(query)
+        if candidates is not None:
+            # Few files are the right size or age, only their names are looked at
+            name_ids = self.archive_index.name_ids
+            nodes = (node for node in candidates if self.name_matches(query, name_ids[node]))
+        else:
+            nodes = (node for name_id in self.matching_name_ids(query)
+                     for node in self.nodes[self.node_offsets[name_id]:self.node_offsets[name_id + 1]])
+
+        result = []
+        for node in nodes:
+            if flags[node] & skipped:
+                continue
+            for values, low, high in checks:
+                if not low <= values[node] < high:
+                    break
+            else:
+                if limit is not None and len(result) >= limit:
+                    return result, False
+                result.append(node)
+        return result, True
+
+
+class SearchIndexWorker(QThread):
+    """Builds the NameIndex of a complete listing off the GUI thread."""
+    index_ready = Signal(object)
+
+    def __init__(self, archive_index):
+        super().__init__()
+        self.archive_index = archive_index
+
+    def run(self):
+        self.index_ready.emit(NameIndex(self.archive_index))
@@ -1,336 +1,71 @@
+import json
 import os
-import signal
-import subprocess
 
 from PySide6.QtGui import QPalette
-from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog, QHBoxLayout, QPushButton, QLineEdit, QLabel, \
-    QSpinBox, QComboBox, QVBoxLayout, QDialog, QCheckBox, QProgressBar
-from PySide6.QtCore import QThread, Signal, Qt
-import SevenZUtils
-
-
-class ArchivingThread(QThread):
-    progress_updated = Signal(int, str)
-    archive_failed = Signal(str)
-    archive_finished = Signal()
-    archive_break = Signal()
-
-    def __init__(self, s7zip_bin, source_files, destination, archive_type, password=None, compression_level='normal'):
-        super().__init__()
-        self.stop_requested = None
-        self.s7zip_bin = s7zip_bin
-        self.source_files = source_files
-        self.destination = destination
-        self.archive_type = archive_type
-        self.password = password
-        self.compression_level = compression_level
-        self.process = None
-        self.paused = False
-
-    def run(self):
-        command = [
-            self.s7zip_bin,
-            'a',  # 'a' command to add files to the archive
-            '-t' + self.archive_type,  # Archive type (e.g., zip, 7z)
-            self.destination,  # Destination archive file
-        ]
-
-        # List of source files to be archived
-        command.extend(self.source_files)
-
-        command.append('-bsp1')
-
-        # If password is provided, add it to the command
-        if self.password:
-            command += ['-p' + self.password]
-
-        # Add compression level if provided
-        if self.compression_level:
-            command += ['-mx=' + self.compression_level]
-
-        print(command)
-
-        # Start the 7-Zip process
-        self.process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-
-        hold_on_progress = False
-
-        while True:
-            line = ""
-            while True:
-                char = self.process.stdout.read(1)  # Read one character
-                if not char:  # End of stream
-                    break
-                if char == '\x08':
-                    hold_on_progress = True
-                    continue
-
-                line += char
-                if char == '\n':
-                    hold_on_progress = False
-                    break
-
-                if char == ' ' and hold_on_progress:
-                    hold_on_progress = False
-                    break
-
-                if char == ':':
-                    if "Enter password:" in line:
-                        break
-
-            if not line:
-                break
-
-            if "%" in line:
-                percentage = int(line.split("%")[0].strip().split()[-1])
-                self.progress_updated.emit(percentage, f"Archiving... {line}")
-
-        # After extraction process ends
-        error_message = self.process.stderr.read()
-        # print("return code is ", error_message
-        if not error_message:
-            self.archive_finished.emit()
-        elif "Break signaled" in error_message:
-            self.archive_break.emit()
-        else:
-            self.archive_failed.emit(error_message)
-
-    def pause_archive(self):
-        if self.process:
-            self.process.send_signal(signal.SIGSTOP)
-            self.paused = True
-
-    def resume_archive(self):
-        if self.process and self.paused:
-            self.process.send_signal(signal.SIGCONT)
-            self.paused = False
-
-    def stop_archive(self):
-        if self.process:
-            self.process.send_signal(signal.SIGTERM)
-            self.stop_requested = True
-
-
-class AddFilesThread(QThread):
-    progress_updated = Signal(int, str)
-    add_files_failed = Signal(str)
-    add_files_finished = Signal()
-    archive_break = Signal()
-
-    def __init__(self, s7zip_bin, archive_path, files_to_add, sub_dir=None):
-        super().__init__()
-        self.s7zip_bin = s7zip_bin
-        self.archive_path = archive_path
-        self.files_to_add = files_to_add
-        self.sub_dir = sub_dir  # The subdirectory within the archive where files will be added
-        self.process = None
-        self.process = None
-        self.paused = False
-        self.stop_requested = None
-
-    def run(self):
-
-        command = [
-            self.s7zip_bin,
-            'a',  # 'a' command to add files to the archive
-            self.archive_path,  # Archive to which files will be added
-        ]
-
-        if self.sub_dir:
-            # If a subdirectory is specified, prepend it to each file
-            command.extend([f"{self.sub_dir}/{file}" for file in self.files_to_add])
-        else:
-            command.extend(self.files_to_add)
-
-        command.append('-bsp1')
-
-        self.process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-
-        hold_on_progress = False
-
-        while True:
-            line = ""
-            while True:
-                char = self.process.stdout.read(1)  # Read one character
-                if not char:  # End of stream
-                    break
-                if char == '\x08':
-                    hold_on_progress = True
-                    continue
-
-                line += char
-                if char == '\n':
-                    hold_on_progress = False
-                    break
-
-                if char == ' ' and hold_on_progress:
-                    hold_on_progress = False
-                    break
-
-                if char == ':':
-                    if "Enter password:" in line:
-                        break
-
-            if not line:
-                break
-
-            if "%" in line:
-                percentage = int(line.split("%")[0].strip().split()[-1])
-                self.progress_updated.emit(percentage, f"Adding files... {line}")
-
-        error_message = self.process.stderr.read()
-        if not error_message:
-            self.add_files_finished.emit()
-        else:
-            self.add_files_failed.emit(error_message)
-
-    def pause_archive(self):
-        if self.process:
-            self.process.send_signal(signal.SIGSTOP)
-            self.paused = True
-
-    def resume_archive(self):
-        if self.process and self.paused:
-            self.process.send_signal(signal.SIGCONT)
-            self.paused = False
-
-    def stop_archive(self):
-        if self.process:
-            self.process.send_signal(signal.SIGTERM)
-            self.stop_requested = True
-
-
-class RenameFilesThread(QThread):
-    rename_files_finished = Signal()
-    rename_files_failed = Signal(str)
-
-    def __init__(self, s7zip_bin, files_to_add, archive_path, sub_dir):
-        super().__init__()
-        self.s7zip_bin = s7zip_bin
-        self.files_to_add = files_to_add
-        self.archive_path = archive_path
-        self.sub_dir = sub_dir
-        self.process = None
-
-    def run(self):
-        try:
-            for file in self.files_to_add:
-                # Extract just the filename from the file path
-                filename = os.path.basename(file)
-
-                # Construct the new path for the file
-                new_path = os.path.join(self.sub_dir, filename)
-
-                # Run the 7zz command to rename the file
-                command = [self.s7zip_bin, 'rn', self.archive_path, filename, new_path]
-                subprocess.check_call(command)
-
-            # If all files are renamed successfully, emit the finish signal
-            self.rename_files_finished.emit()
-        except subprocess.CalledProcessError as e:
-            # If an error occurs during the subprocess call, emit the fail signal with the error message
-            self.rename_files_failed.emit(f"Failed to rename files. Error: {str(e)}")
-        except Exception as e:
-            # For other exceptions, emit the fail signal with the error message
-            self.rename_files_failed.emit(str(e))
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QHBoxLayout, QPushButton, QLineEdit, QLabel, \
+    QSpinBox, QComboBox, QVBoxLayout, QDialog, QCheckBox, QInputDialog
+from PySide6.QtCore import Qt
+import compression_tuning
+import sevenz_engine
+import system_resources
+from archive_changes import ChangeSet, entries_for_local_files
+from job_scheduler import Job, JobScheduler, PRIORITY_HIGH
+from qsetting_manager import SettingsManager
+from sevenz_engine import ArchivingThread, AddFilesThread, RenameFilesThread
 
 
 class Archiver:
     def __init__(self, parent):
-        self.archiving_thread = None
-        self.progress_dialog = None
         self.parent = parent
-        self.s7zip_bin = SevenZUtils.determine_7zip_binary()
+        self.s7zip_bin = sevenz_engine.determine_7zip_binary()
+        self.scheduler = JobScheduler()
 
     def is_supported_archive_type(self, archive_type):
         # Implement this method to check if the archive_type is supported
         pass
 
-    def archive_file(self, source_files, destination, archive_type, password=None, compression_level='normal'):
+    def archive_file(self, source_files, destination, archive_type, password=None, compression_level='normal',
+                     switches=()):
         # if not self.is_supported_archive_type(archive_type):
         #     QMessageBox.critical(self.parent, "Error", "Unsupported archive type.")
         #     return
 
-        self.archiving_thread = ArchivingThread(
-            self.s7zip_bin, source_files, destination, archive_type, password, compression_level
+        archiving_thread = ArchivingThread(
+            self.s7zip_bin, source_files, destination, archive_type, password, compression_level, switches
         )
-        self.archiving_thread.progress_updated.connect(self.update_progress)
-        self.archiving_thread.archive_finished.connect(self.finish_archive)
-        self.archiving_thread.archive_failed.connect(self.show_error)
-        self.archiving_thread.archive_break.connect(self.break_archive)
-
-        self.progress_dialog = ArchiverProgressDialog(self.parent)
-        self.progress_dialog.pause_resume_button.clicked.connect(self.toggle_pause_resume)
-        self.progress_dialog.stop_button.clicked.connect(self.archiving_thread.stop_archive)
-
-        self.archiving_thread.start()
+        archiving_thread.archive_failed.connect(self.show_error)
+
+        job = Job(f"Archive {os.path.basename(destination)}", archiving_thread,
+                  finished_signal=archiving_thread.archive_finished,
+                  failed_signal=archiving_thread.archive_failed,
+                  break_signal=archiving_thread.archive_break,
+                  progress_signal=archiving_thread.progress_updated,
+                  pause=archiving_thread.pause_archive,
+                  resume=archiving_thread.resume_archive,
+                  cancel=archiving_thread.stop_archive,
+                  target=destination)
+        return self.scheduler.submit(job)
 
     def add_files_to_archive(self, archive_path, files_to_add, sub_dir=None):
-        self.sub_dir = sub_dir  # Store sub_dir as an instance variable
-        self.files_to_add = files_to_add  # Store files_to_add as an instance variable
-        self.archive_path = archive_path  # Store archive_path as an instance variable
-
-        self.add_files_thread = AddFilesThread(self.s7zip_bin, archive_path, files_to_add)
-        self.add_files_thread.progress_updated.connect(self.update_progress)
-        self.add_files_thread.add_files_failed.connect(self.show_error)
-        self.add_files_thread.add_files_finished.connect(self.on_add_files_finished)
-
-        self.progress_dialog = ArchiverProgressDialog(self.parent)
-        self.progress_dialog.pause_resume_button.clicked.connect(self.toggle_pause_resume_add_files)
-        self.progress_dialog.stop_button.clicked.connect(self.add_files_thread.stop_archive)
-
-        self.add_files_thread.start()
-
-    def toggle_pause_resume_add_files(self):
-        if self.add_files_thread.paused:
-            self.add_files_thread.resume_archive()
-            self.progress_dialog.pause_resume_button.setText("Pause")
-        else:
-            self.add_files_thread.pause_archive()
-            self.progress_dialog.pause_resume_button.setText("Continue")
-
-    def toggle_pause_resume(self):
-        if self.archiving_thread.paused:
-            self.archiving_thread.resume_archive()
-            self.progress_dialog.pause_resume_button.setText("Pause")
-        else:
-            self.archiving_thread.pause_archive()
-            self.progress_dialog.pause_resume_button.setText("Continue")
+        add_files_thread = AddFilesThread(self.s7zip_bin, archive_path, files_to_add)
+        add_files_thread.add_files_failed.connect(self.show_error)
+        add_files_thread.add_files_finished.connect(
+            lambda: self.on_add_files_finished(archive_path, files_to_add, sub_dir))
+
+        job = Job(f"Add files to {os.path.basename(archive_path)}", add_files_thread,
+                  finished_signal=add_files_thread.add_files_finished,
+                  failed_signal=add_files_thread.add_files_failed,
+                  break_signal=add_files_thread.archive_break,
+                  progress_signal=add_files_thread.progress_updated,
+                  pause=add_files_thread.pause_archive,
+                  resume=add_files_thread.resume_archive,
+                  cancel=add_files_thread.stop_archive,
+                  target=archive_path)
+        return self.scheduler.submit(job)
 
     def show_error(self, message):
-        self.progress_dialog.close()
         QMessageBox.critical(self.parent, "Extraction Error", message)
 
-    def update_progress(self, percentage, message):
-        self.progress_dialog.setValue(percentage)
-        self.progress_dialog.setLabelText(message)
-
-    def finish_archive(self):
-        self.progress_dialog.close()
-        msg_box = QMessageBox(self.parent)
-        msg_box.setWindowTitle("Archive Complete")
-        msg_box.setText("Archive Complete")
-        msg_box.setIcon(QMessageBox.Icon.NoIcon)
-        msg_box.exec()
-
-    def break_archive(self):
-        self.progress_dialog.close()
-        msg_box = QMessageBox(self.parent)
-        msg_box.setWindowTitle("Archive Abort")
-        msg_box.setText("Archive Abort")
-        msg_box.setIcon(QMessageBox.Icon.NoIcon)
-        msg_box.exec()
-
     def confirm_add_files(self, archive_path, files_to_add, sub_dir=None):
         message = f'Are you sure you want to add these files to {archive_path}?'
         if sub_dir:
@@ -345,7 +80,7 @@ class Archiver:
             self.add_files_to_archive(archive_path, files_to_add, sub_dir)
 
     def archive_file_by_archive_options(self, input_paths: list):
-        dialog = ArchiveDialog(input_paths[0])
+        dialog = ArchiveDialog(input_paths[0], source_files=input_paths)
         if dialog.exec() != QDialog.DialogCode.Accepted:
             return  # Exit if the user cancels the dialog
 
@@ -356,75 +91,40 @@ class Archiver:
         archive_type = options.get('archive_type', '')
         password = options.get('password', None)
         compression_level = options.get('compression_level', 'normal')
+        switches = options.get('switches', [])
 
-        self.archive_file(source_files, destination, archive_type, password, compression_level)
+        self.archive_file(source_files, destination, archive_type, password, compression_level, switches)
 
-    def on_add_files_finished(self):
-        if self.sub_dir is not None:
-            self.start_rename_files_thread()
+    def on_add_files_finished(self, archive_path, files_to_add, sub_dir):
+        if sub_dir is not None:
+            self.start_rename_files_thread(archive_path, files_to_add, sub_dir)
         else:
-            self.finish_adding_files()
-
-    def start_rename_files_thread(self):
-        self.rename_files_thread = RenameFilesThread(self.s7zip_bin, self.files_to_add, self.archive_path, self.sub_dir)
-        self.rename_files_thread.rename_files_finished.connect(self.finish_adding_files)
-        self.rename_files_thread.rename_files_failed.connect(self.show_error)
-        self.rename_files_thread.start()
-
-    def finish_adding_files(self):
-        self.progress_dialog.close()
-        msg_box = QMessageBox(self.parent)
-        msg_box.setWindowTitle("Add Files Complete")
-        msg_box.setText("Files have been successfully added.")
-        msg_box.setIcon(QMessageBox.Icon.NoIcon)
-        msg_box.exec()
-        self.parent.reload_archive()
-
-
-
-class ArchiverProgressDialog(QProgressDialog):
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAutoClose(False)
-        self.setAutoReset(False)
-        self.setWindowTitle("Archiving Progress")
-        self.setRange(0, 100)
-        self.setCancelButton(None)
-
-        # Create the layout for the buttons
-        btn_layout = QHBoxLayout()
-
-        # Add Pause/Resume and Stop buttons
-        self.pause_resume_button = QPushButton("Pause")
-        self.stop_button = QPushButton("Stop")
-        btn_layout.addWidget(self.pause_resume_button)
-        btn_layout.addWidget(self.stop_button)
-
-        # Create our own label and progress bar
-        self._label = QLabel("Archiving files...")
-        self._bar = QProgressBar()
-        self._bar.setRange(0, 100)
-
-        # Add the button layout to the main layout
-        layout = QVBoxLayout()
-        layout.addWidget(self._label)
-        layout.addWidget(self._bar)
-        layout.addLayout(btn_layout)
-
-        # Apply the custom layout to the QDialog
-        self.setLayout(layout)
-
-    # Expose methods to control the label and bar values
-    def setLabelText(self, text):
-        self._label.setText(text)
-
-    def setValue(self, value):
-        self._bar.setValue(value)
+            self.finish_adding_files(archive_path, files_to_add, sub_dir)
+
+    def start_rename_files_thread(self, archive_path, files_to_add, sub_dir):
+        rename_files_thread = RenameFilesThread(self.s7zip_bin, files_to_add, archive_path, sub_dir)
+        rename_files_thread.rename_files_finished.connect(
+            lambda: self.finish_adding_files(archive_path, files_to_add, sub_dir))
+        rename_files_thread.rename_files_failed.connect(self.show_error)
+
+        # Second half of adding files, it runs ahead of other queued jobs
+        job = Job(f"Move added files into {sub_dir}", rename_files_thread,
+                  finished_signal=rename_files_thread.rename_files_finished,
+                  failed_signal=rename_files_thread.rename_files_failed,
+                  priority=PRIORITY_HIGH,
+                  target=archive_path)
+        self.scheduler.submit(job)
+
+    def finish_adding_files(self, archive_path, files_to_add, sub_dir):
+        # Another archive may have been opened while the job was running
+        if self.parent.current_archive_path() is None or \
+                os.path.realpath(self.parent.current_archive_path()) != os.path.realpath(archive_path):
+            return
+        self.parent.apply_changes(ChangeSet(added=entries_for_local_files(files_to_add, sub_dir)))
 
 
 class ArchiveDialog(QDialog):
-    def __init__(self, input_path, parent=None):
+    def __init__(self, input_path, parent=None, source_files=None):
         super(ArchiveDialog, self).__init__(parent)
         self.setWindowTitle("Archive Options")
 
@@ -432,6 +132,7 @@ class ArchiveDialog(QDialog):
 
         # Initialize with input_path
         self.input_path = input_path
+        self.source_files = source_files or [input_path]
 
         # Directory Line Edit (for displaying the path)
         self.dir_line_edit = QLineEdit()
@@ -444,7 +145,8 @@ class ArchiveDialog(QDialog):
 
         # Archive Type ComboBox
         self.archive_type_combo = QComboBox()
-        self.archive_type_combo.addItems(["7z", "zip"])
+        for archive_format in compression_tuning.FORMATS:
+            self.archive_type_combo.addItem(archive_format.label, archive_format.type)
         self.archive_type_combo.currentIndexChanged.connect(self.update_filename_extension)
 
         # Automatically set default save path based on input_path and archive type
@@ -461,6 +163,18 @@ class ArchiveDialog(QDialog):
         filename_layout.addWidget(QLabel("Filename:"))
         filename_layout.addWidget(self.filename_line_edit)
 
+        # Named sets of format, method, level and tuning, built in or saved by the user
+        self.preset_combo = QComboBox()
+        self.save_preset_button = QPushButton("Save Preset...")
+        self.save_preset_button.clicked.connect(self.save_preset)
+        self.delete_preset_button = QPushButton("Delete Preset")
+        self.delete_preset_button.clicked.connect(self.delete_preset)
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("Preset:"))
+        preset_layout.addWidget(self.preset_combo, 1)
+        preset_layout.addWidget(self.save_preset_button)
+        preset_layout.addWidget(self.delete_preset_button)
+
         # Laying out archive type ComboBox
         archive_type_layout = QHBoxLayout()
         archive_type_layout.addWidget(QLabel("Archive format:"))
@@ -468,8 +182,17 @@ class ArchiveDialog(QDialog):
 
         layout.addLayout(dir_layout)
         layout.addLayout(filename_layout)
+        layout.addLayout(preset_layout)
         layout.addLayout(archive_type_layout)
 
+        # Compression Method
+        self.method_combo = QComboBox()
+        method_layout = QHBoxLayout()
+        method_layout.addWidget(QLabel("Compression Method:"))
+        method_layout.addWidget(self.method_combo)
+
+        layout.addLayout(method_layout)
+
         # Compression Level
         self.compress_level_combo = QComboBox()
         self.compress_level_combo.addItems(["0", "1", "3", "5", "7", "9"])
@@ -480,6 +203,66 @@ class ArchiveDialog(QDialog):
 
         layout.addLayout(compress_level_layout)
 
+        # Threads and dictionary are tuned to this machine unless set by hand
+        self.auto_tune_check_box = QCheckBox("Auto-tune threads and dictionary for this machine")
+        self.auto_tune_check_box.setChecked(True)
+        self.threads_spin_box = QSpinBox()
+        self.threads_spin_box.setRange(1, max(64, 2 * system_resources.cpu_count()))
+        self.dictionary_combo = QComboBox()
+        self.dictionary_combo.addItem("Default", None)
+        for size in compression_tuning.DICTIONARY_SIZES:
+            self.dictionary_combo.addItem(compression_tuning.format_size(size), size)
+        self.word_size_combo = QComboBox()
+        self.solid_block_combo = QComboBox()
+        self.solid_block_combo.addItem("Default", None)
+        for size in compression_tuning.SOLID_BLOCK_SIZES:
+            text = "Non-solid" if size == compression_tuning.SOLID_OFF else compression_tuning.format_size(size)
+            self.solid_block_combo.addItem(text, size)
+        self.memory_label = QLabel()
+
+        tuning_layout = QHBoxLayout()
+        tuning_layout.addWidget(QLabel("Threads:"))
+        tuning_layout.addWidget(self.threads_spin_box)
+        tuning_layout.addWidget(QLabel("Dictionary:"))
+        tuning_layout.addWidget(self.dictionary_combo)
+        tuning_layout.addWidget(QLabel("Word size:"))
+        tuning_layout.addWidget(self.word_size_combo)
+        tuning_layout.addWidget(QLabel("Solid block:"))
+        tuning_layout.addWidget(self.solid_block_combo)
+
+        layout.addWidget(self.auto_tune_check_box)
+        layout.addLayout(tuning_layout)
+        layout.addWidget(self.memory_label)
+
+        self.update_methods()
+        self.update_tuning()
+        self.archive_type_combo.currentIndexChanged.connect(self.update_methods)
+        self.archive_type_combo.currentIndexChanged.connect(self.update_tuning)
+        self.method_combo.currentIndexChanged.connect(self.update_word_sizes)
+        self.method_combo.currentIndexChanged.connect(self.update_tuning)
+        self.compress_level_combo.currentIndexChanged.connect(self.update_tuning)
+        self.auto_tune_check_box.stateChanged.connect(self.update_tuning)
+        self.threads_spin_box.valueChanged.connect(self.update_memory_estimate)
+        self.dictionary_combo.currentIndexChanged.connect(self.update_memory_estimate)
+        self.word_size_combo.currentIndexChanged.connect(self.update_memory_estimate)
+        self.solid_block_combo.currentIndexChanged.connect(self.update_memory_estimate)
+
+        # Any change made by hand turns the preset into a custom setup
+        for combo in (self.archive_type_combo, self.method_combo, self.compress_level_combo, self.dictionary_combo,
+                      self.word_size_combo, self.solid_block_combo):
+            combo.activated.connect(self.mark_custom)
+        self.auto_tune_check_box.clicked.connect(self.mark_custom)
+        self.threads_spin_box.editingFinished.connect(self.mark_custom)
+
+        self.settings_manager = SettingsManager()
+        self.load_presets()
+        self.preset_combo.currentIndexChanged.connect(self.select_preset)
+        last_preset = self.settings_manager.get_value("archive_preset", "")
+        index = self.preset_combo.findText(last_preset) if last_preset else -1
+        if index > 0:
+            self.preset_combo.setCurrentIndex(index)
+        self.delete_preset_button.setEnabled(self.is_user_preset())
+
         # Encryption Option
         self.password_line_edit = QLineEdit()
         self.show_password_check_box = QCheckBox("Show Password")
@@ -490,6 +273,8 @@ class ArchiveDialog(QDialog):
         password_layout.addWidget(self.show_password_check_box)
 
         layout.addLayout(password_layout)
+        self.update_password_field()
+        self.archive_type_combo.currentIndexChanged.connect(self.update_password_field)
 
         # OK and Cancel buttons
         self.ok_button = QPushButton("OK")
@@ -506,13 +291,173 @@ class ArchiveDialog(QDialog):
 
         self.setLayout(layout)
 
+    @property
+    def archive_type(self):
+        return self.archive_type_combo.currentData()
+
+    @property
+    def method(self):
+        return self.method_combo.currentText()
+
+    @property
+    def compression_level(self):
+        return self.compress_level_combo.currentText()
+
+    def update_methods(self):
+        archive_format = compression_tuning.FORMATS_BY_TYPE[self.archive_type]
+        current = self.method_combo.currentText()
+        self.method_combo.blockSignals(True)
+        self.method_combo.clear()
+        self.method_combo.addItems(archive_format.methods)
+        self.method_combo.setCurrentIndex(max(0, self.method_combo.findText(current)))
+        self.method_combo.blockSignals(False)
+        has_levels = compression_tuning.has_levels(self.archive_type)
+        self.method_combo.setEnabled(len(archive_format.methods) > 1)
+        self.compress_level_combo.setEnabled(has_levels)
+        self.update_word_sizes()
+
+    def update_password_field(self):
+        # Only 7z and zip can be encrypted
+        self.password_line_edit.setEnabled(self.archive_type in ('7z', 'zip'))
+
+    def update_word_sizes(self):
+        method = compression_tuning.effective_method(self.archive_type, self.method, self.compression_level)
+        current = self.word_size_combo.currentData()
+        self.word_size_combo.blockSignals(True)
+        self.word_size_combo.clear()
+        self.word_size_combo.addItem("Default", None)
+        for size in compression_tuning.word_sizes(method):
+            self.word_size_combo.addItem(str(size), size)
+        self.word_size_combo.setCurrentIndex(max(0, self.word_size_combo.findData(current)))
+        self.word_size_combo.blockSignals(False)
+
+    def update_tuning(self):
+        archive_type = self.archive_type
+        level = self.compression_level
+        method = compression_tuning.effective_method(archive_type, self.method, level)
+        auto = self.auto_tune_check_box.isChecked()
+        if auto:
+            settings = compression_tuning.auto_tune(archive_type, method, level, self.source_files)
+            self.threads_spin_box.setValue(settings.threads)
+            self.dictionary_combo.setCurrentIndex(max(0, self.dictionary_combo.findData(settings.dictionary)))
+        if method == compression_tuning.COPY or not compression_tuning.word_sizes(method):
+            self.word_size_combo.setCurrentIndex(0)
+        self.threads_spin_box.setEnabled(not auto and method != compression_tuning.COPY)
+        self.dictionary_combo.setEnabled(not auto and compression_tuning.has_dictionary(method))
+        self.word_size_combo.setEnabled(bool(compression_tuning.word_sizes(method)))
+        self.solid_block_combo.setEnabled(compression_tuning.has_solid_blocks(archive_type, method))
+        self.update_memory_estimate()
+
+    def get_compression_settings(self):
+        return compression_tuning.CompressionSettings(
+            threads=self.threads_spin_box.value(),
+            dictionary=self.dictionary_combo.currentData(),
+            word_size=self.word_size_combo.currentData(),
+            solid_block=self.solid_block_combo.currentData(),
+        )
+
+    def update_memory_estimate(self):
+        compression, decompression = compression_tuning.estimate_memory(
+            self.archive_type, self.method, self.compression_level, self.get_compression_settings())
+        text = (f"Estimated memory: {compression_tuning.format_size(compression)} to compress, "
+                f"{compression_tuning.format_size(decompression)} to decompress")
+        available = system_resources.available_memory()
+        if available is not None:
+            text += f" ({compression_tuning.format_size(available)} available)"
+            if compression > available:
+                text = "Warning: " + text
+        self.memory_label.setText(text)
+
+    def get_user_presets(self):
+        try:
+            presets = json.loads(self.settings_manager.get_value("compression_presets", "{}"))
+        except (TypeError, ValueError):
+            return {}
+        return presets if isinstance(presets, dict) else {}
+
+    def load_presets(self):
+        self.preset_combo.blockSignals(True)
+        self.preset_combo.clear()
+        self.preset_combo.addItem("Custom", None)
+        for name in compression_tuning.BUILTIN_PRESETS:
+            self.preset_combo.addItem(name, 'builtin')
+        for name in sorted(self.get_user_presets()):
+            self.preset_combo.addItem(name, 'user')
+        self.preset_combo.blockSignals(False)
+
+    def is_user_preset(self):
+        return self.preset_combo.currentData() == 'user'
+
+    def select_preset(self):
+        name = self.preset_combo.currentText()
+        kind = self.preset_combo.currentData()
+        self.delete_preset_button.setEnabled(kind == 'user')
+        self.settings_manager.set_value("archive_preset", name if kind else "")
+        if kind == 'builtin':
+            self.apply_preset(compression_tuning.BUILTIN_PRESETS[name])
+        elif kind == 'user':
+            self.apply_preset(self.get_user_presets().get(name, {}))
+
+    def apply_preset(self, preset):
+        if preset.get('archive_type') in compression_tuning.FORMATS_BY_TYPE:
+            self.archive_type_combo.setCurrentIndex(self.archive_type_combo.findData(preset['archive_type']))
+        method = preset.get('methods', {}).get(self.archive_type) or preset.get('method')
+        methods = compression_tuning.FORMATS_BY_TYPE[self.archive_type].methods
+        self.method_combo.setCurrentIndex(methods.index(method) if method in methods else 0)
+        level_index = self.compress_level_combo.findText(str(preset.get('compression_level', '5')))
+        self.compress_level_combo.setCurrentIndex(max(0, level_index))
+        self.auto_tune_check_box.setChecked(bool(preset.get('auto_tune', True)))
+        if not self.auto_tune_check_box.isChecked():
+            if preset.get('threads'):
+                self.threads_spin_box.setValue(int(preset['threads']))
+            self.dictionary_combo.setCurrentIndex(max(0, self.dictionary_combo.findData(preset.get('dictionary'))))
+        self.word_size_combo.setCurrentIndex(max(0, self.word_size_combo.findData(preset.get('word_size'))))
+        self.solid_block_combo.setCurrentIndex(max(0, self.solid_block_combo.findData(preset.get('solid_block'))))
+        self.update_tuning()
+
+    def mark_custom(self):
+        self.preset_combo.setCurrentIndex(0)
+
+    def save_preset(self):
+        name, ok = QInputDialog.getText(self, "Save Preset", "Preset name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if name in compression_tuning.BUILTIN_PRESETS or name == "Custom":
+            QMessageBox.warning(self, "Save Preset", f"'{name}' is the name of a built-in preset.")
+            return
+        settings = self.get_compression_settings()
+        presets = self.get_user_presets()
+        presets[name] = {
+            'archive_type': self.archive_type,
+            'method': self.method,
+            'compression_level': self.compression_level,
+            'auto_tune': self.auto_tune_check_box.isChecked(),
+            'threads': settings.threads,
+            'dictionary': settings.dictionary,
+            'word_size': settings.word_size,
+            'solid_block': settings.solid_block,
+        }
+        self.settings_manager.set_value("compression_presets", json.dumps(presets))
+        self.load_presets()
+        self.preset_combo.setCurrentIndex(self.preset_combo.findText(name))
+
+    def delete_preset(self):
+        if not self.is_user_preset():
+            return
+        presets = self.get_user_presets()
+        presets.pop(self.preset_combo.currentText(), None)
+        self.settings_manager.set_value("compression_presets", json.dumps(presets))
+        self.load_presets()
+        self.preset_combo.setCurrentIndex(0)
+
     def set_default_save_path(self, extension):
         default_save_path = os.path.basename(f"{self.input_path}.{extension}")
         self.filename_line_edit.setText(default_save_path)
 
     def update_filename_extension(self):
         current_filename = self.filename_line_edit.text()
-        new_extension = self.archive_type_combo.currentText()
+        new_extension = compression_tuning.FORMATS_BY_TYPE[self.archive_type].extension
 
         # Update the filename extension
         filename_without_extension, _ = os.path.splitext(current_filename)
@@ -534,9 +479,10 @@ class ArchiveDialog(QDialog):
             self.password_line_edit.setEchoMode(QLineEdit.EchoMode.Password)
 
     def get_selected_options(self):
-        archive_type = self.archive_type_combo.currentText()
-        compression_level = self.compress_level_combo.currentText()
-        password = self.password_line_edit.text()
+        archive_type = self.archive_type
+        # Formats that only store files take no level
+        compression_level = self.compression_level if compression_tuning.has_levels(archive_type) else None
+        password = self.password_line_edit.text() if self.password_line_edit.isEnabled() else ''
         save_path = os.path.join(self.dir_line_edit.text(), self.filename_line_edit.text())
         return {
             'source_files': self.input_path,
@@ -544,9 +490,19 @@ class ArchiveDialog(QDialog):
             'compression_level': compression_level,
             'password': password,
             'save_path': save_path,
+            'method': self.method,
+            'switches': compression_tuning.get_switches(archive_type, self.method, compression_level,
+                                                        self.get_compression_settings()),
         }
 
     def accept(self):
+        archive_format = compression_tuning.FORMATS_BY_TYPE[self.archive_type]
+        if archive_format.single_file and (len(self.source_files) != 1 or not os.path.isfile(self.source_files[0])):
+            QMessageBox.warning(self, "Archive Options",
+                                f"The {archive_format.label} format compresses a single file. "
+                                f"Use tar or 7z for folders and several files.")
+            return
+
         options = self.get_selected_options()
         save_path = options['save_path']
         base_path, ext = os.path.splitext(save_path)
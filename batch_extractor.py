@@ -0,0 +1,327 @@
+import os
+import time
+from collections import namedtuple
+
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, \
+    QRadioButton, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QProgressBar, QListWidget, QMessageBox
+from PySide6.QtCore import QObject, Signal, QTimer
+
+import system_resources
+from job_scheduler import JobScheduler, FINISHED, CANCELLED
+
+EACH_TO_OWN_FOLDER = 'each'
+ALL_HERE = 'here'
+
+# What 7zz does with files that already exist, None keeps asking
+CONFLICT_POLICIES = [
+    ("Ask", None),
+    ("Overwrite", '-aoa'),
+    ("Skip existing", '-aos'),
+    ("Rename extracted", '-aou'),
+    ("Rename existing", '-aot'),
+]
+
+BatchItem = namedtuple('BatchItem', ['path', 'password', 'conflict_switch'])
+
+
+def archive_stem(path):
+    """Folder name for an archive, 'photos.tar.gz' and 'photos.7z.001' become 'photos'."""
+    name = os.path.basename(path)
+    stem, extension = os.path.splitext(name)
+    if extension == '.001':
+        stem = os.path.splitext(stem)[0]
+    if stem.lower().endswith('.tar'):
+        stem = stem[:-4]
+    return stem or name
+
+
+def batch_parallelism(paths, destination):
+    """How many archives of a batch to extract at once.
+
+    Bounded by the scheduler's limit, which follows the CPUs and free memory. A spinning disk
+    spends its time seeking between concurrent streams, so it gets one archive at a time.
+    """
+    limit = JobScheduler().max_concurrent
+    folders = {os.path.dirname(path) for path in paths}
+    if destination:
+        folders.add(destination)
+    if any(system_resources.is_rotational(folder) for folder in folders):
+        return 1
+    return limit
+
+
+class BatchExtraction(QObject):
+    """Extracts many archives through the JobScheduler, keeping only as many jobs queued as it may run at once."""
+    changed = Signal()
+
+    def __init__(self, extractor, items, mode, destination=None):
+        super().__init__()
+        self.extractor = extractor
+        self.mode = mode
+        self.destination = destination
+        self.pending = list(items)
+        self.running = {}  # Job -> BatchItem
+        self.sizes = {}
+        for item in items:
+            try:
+                self.sizes[item.path] = os.path.getsize(item.path)
+            except OSError:
+                self.sizes[item.path] = 0
+        self.total = len(items)
+        self.total_bytes = sum(self.sizes.values())
+        self.done_bytes = 0
+        self.succeeded = []
+        self.failures = []  # (path, message)
+        self.cancelled = []
+        self.started_at = None
+        self.finished_at = None
+        self.limit = batch_parallelism([item.path for item in items], destination)
+
+    def destination_for(self, archive_path):
+        base = self.destination or os.path.dirname(archive_path)
+        if self.mode == EACH_TO_OWN_FOLDER:
+            return os.path.join(base, archive_stem(archive_path))
+        return base
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.submit_next()
+
+    def submit_next(self):
+        while self.pending and len(self.running) < self.limit:
+            item = self.pending.pop(0)
+            switches = []
+            if item.password:
+                switches.append('-p' + item.password)
+            if item.conflict_switch:
+                switches.append(item.conflict_switch)
+            job = self.extractor.extract_file(self.destination_for(item.path), item.path, [], 'x',
+                                              switches=switches, report_errors=False)
+            if job is None:
+                self.record(item, 'Unsupported or corrupted file for extraction.')
+                continue
+            self.running[job] = item
+            job.changed.connect(lambda job=job: self.on_job_changed(job))
+        if self.is_finished and self.finished_at is None:
+            self.finished_at = time.monotonic()
+        self.changed.emit()
+
+    def on_job_changed(self, job):
+        if not job.is_done or job not in self.running:
+            return
+        item = self.running.pop(job)
+        if job.state == FINISHED:
+            self.succeeded.append(item.path)
+        elif job.state == CANCELLED:
+            self.cancelled.append(item.path)
+        else:
+            self.failures.append((item.path, job.message or job.state))
+        self.done_bytes += self.sizes[item.path]
+        self.submit_next()
+
+    def record(self, item, message):
+        self.failures.append((item.path, message))
+        self.done_bytes += self.sizes[item.path]
+
+    def cancel(self):
+        self.cancelled.extend(item.path for item in self.pending)
+        self.pending.clear()
+        scheduler = JobScheduler()
+        for job in list(self.running):
+            scheduler.cancel(job)
+        self.submit_next()
+
+    @property
+    def is_finished(self):
+        return not self.pending and not self.running
+
+    @property
+    def completed(self):
+        return len(self.succeeded) + len(self.failures) + len(self.cancelled)
+
+    def processed_bytes(self):
+        # Archive bytes read so far, running jobs count by their progress
+        running = sum(self.sizes[item.path] * job.progress / 100 for job, item in self.running.items())
+        return self.done_bytes + running
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class BatchExtractDialog(QDialog):
+    """Destination, mode and per-archive password and conflict policy for a batch, chosen before it starts."""
+
+    def __init__(self, archive_paths, mode=EACH_TO_OWN_FOLDER, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Extract Archives")
+        self.setMinimumSize(640, 420)
+        self.archive_paths = archive_paths
+
+        self.each_radio = QRadioButton("Extract each archive to its own folder")
+        self.here_radio = QRadioButton("Extract all archives here")
+        (self.each_radio if mode == EACH_TO_OWN_FOLDER else self.here_radio).setChecked(True)
+
+        self.destination_line_edit = QLineEdit()
+        self.destination_line_edit.setPlaceholderText("Next to each archive")
+        browse_button = QPushButton("...")
+        browse_button.clicked.connect(self.browse_destination)
+        destination_layout = QHBoxLayout()
+        destination_layout.addWidget(QLabel("Destination:"))
+        destination_layout.addWidget(self.destination_line_edit)
+        destination_layout.addWidget(browse_button)
+
+        # Values applied to every row at once
+        self.password_all_line_edit = QLineEdit()
+        self.password_all_line_edit.setEchoMode(QLineEdit.EchoMode.Password)
+        self.conflict_all_combo = self.create_conflict_combo()
+        apply_button = QPushButton("Apply to All")
+        apply_button.clicked.connect(self.apply_to_all)
+        defaults_layout = QHBoxLayout()
+        defaults_layout.addWidget(QLabel("Password:"))
+        defaults_layout.addWidget(self.password_all_line_edit)
+        defaults_layout.addWidget(QLabel("If files exist:"))
+        defaults_layout.addWidget(self.conflict_all_combo)
+        defaults_layout.addWidget(apply_button)
+
+        self.table = QTableWidget(len(archive_paths), 3)
+        self.table.setHorizontalHeaderLabels(["Archive", "Password", "If files exist"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        for row, path in enumerate(archive_paths):
+            name_item = QTableWidgetItem(os.path.basename(path))
+            name_item.setToolTip(path)
+            self.table.setItem(row, 0, name_item)
+            password_line_edit = QLineEdit()
+            password_line_edit.setEchoMode(QLineEdit.EchoMode.Password)
+            self.table.setCellWidget(row, 1, password_line_edit)
+            self.table.setCellWidget(row, 2, self.create_conflict_combo())
+
+        ok_button = QPushButton("Extract")
+        ok_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch(1)
+        button_layout.addWidget(ok_button)
+        button_layout.addWidget(cancel_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.each_radio)
+        layout.addWidget(self.here_radio)
+        layout.addLayout(destination_layout)
+        layout.addLayout(defaults_layout)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def create_conflict_combo(self):
+        combo = QComboBox()
+        for name, switch in CONFLICT_POLICIES:
+            combo.addItem(name, switch)
+        return combo
+
+    def browse_destination(self):
+        initial_directory = self.destination_line_edit.text() or os.path.dirname(self.archive_paths[0])
+        destination = QFileDialog.getExistingDirectory(self, "Select Extraction Destination", initial_directory)
+        if destination:
+            self.destination_line_edit.setText(destination)
+
+    def apply_to_all(self):
+        password = self.password_all_line_edit.text()
+        conflict_index = self.conflict_all_combo.currentIndex()
+        for row in range(self.table.rowCount()):
+            self.table.cellWidget(row, 1).setText(password)
+            self.table.cellWidget(row, 2).setCurrentIndex(conflict_index)
+
+    @property
+    def mode(self):
+        return EACH_TO_OWN_FOLDER if self.each_radio.isChecked() else ALL_HERE
+
+    @property
+    def destination(self):
+        return self.destination_line_edit.text() or None
+
+    def get_items(self):
+        return [BatchItem(path, self.table.cellWidget(row, 1).text(), self.table.cellWidget(row, 2).currentData())
+                for row, path in enumerate(self.archive_paths)]
+
+
+class BatchProgressDialog(QDialog):
+    """Non-modal overall progress of a batch, with its throughput and the archives that failed."""
+
+    def __init__(self, batch, parent=None):
+        super().__init__(parent)
+        self.batch = batch
+        self.setWindowTitle("Extracting Archives")
+        self.setMinimumWidth(520)
+
+        self.status_label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.throughput_label = QLabel()
+        self.failures_list = QListWidget()
+
+        self.cancel_button = QPushButton("Cancel All")
+        self.cancel_button.clicked.connect(self.batch.cancel)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.throughput_label)
+        layout.addWidget(QLabel("Failed:"))
+        layout.addWidget(self.failures_list)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.batch.changed.connect(self.update_status)
+        # Running jobs report progress far more often than the display needs
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_status)
+        self.timer.start(500)
+        self.update_status()
+
+    def update_status(self):
+        batch = self.batch
+        processed = batch.processed_bytes()
+        if batch.total_bytes:
+            self.progress_bar.setValue(int(1000 * processed / batch.total_bytes))
+        else:
+            self.progress_bar.setValue(int(1000 * batch.completed / max(1, batch.total)))
+
+        self.status_label.setText(
+            f"{batch.completed} of {batch.total} archives done, {len(batch.running)} running, "
+            f"{len(batch.failures)} failed, {len(batch.cancelled)} cancelled")
+
+        elapsed = batch.elapsed()
+        if elapsed > 0:
+            rate = processed / elapsed
+            archives_per_minute = (batch.completed - len(batch.cancelled)) * 60 / elapsed
+            text = f"{rate / (1024 * 1024):.1f} MiB/s, {archives_per_minute:.1f} archives/min"
+            if rate > 0 and not batch.is_finished:
+                text += f", about {int((batch.total_bytes - processed) / rate)} s left"
+            self.throughput_label.setText(text)
+
+        for path, message in batch.failures[self.failures_list.count():]:
+            self.failures_list.addItem(f"{os.path.basename(path)}: {message}")
+
+        if batch.is_finished:
+            self.timer.stop()
+            self.cancel_button.setEnabled(False)
+            self.setWindowTitle("Extraction Complete")
+
+    def closeEvent(self, event):
+        if not self.batch.is_finished:
+            reply = QMessageBox.question(self, 'Extracting Archives', 'Keep extracting in the background?',
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                         QMessageBox.StandardButton.Yes)
+            if reply != QMessageBox.StandardButton.Yes:
+                self.batch.cancel()
+        super().closeEvent(event)
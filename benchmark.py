@@ -0,0 +1,385 @@
+"""Compression benchmark for this machine.
+
+Runs `7zz b` for the raw CPU rating, then compresses and extracts a synthetic corpus through
+ArchivingThread and ExtractionThread across formats, methods, levels and thread counts.
+Results are JSON, a saved run can be compared with a later one to catch regressions:
+
+    python benchmark.py --output results.json
+    python benchmark.py --compare results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import compression_tuning
+import listing_cache
+import system_resources
+
+CORPUS_VERSION = 1
+CORPUS_SEED = 7
+MIB = compression_tuning.MIB
+
+# name: (path inside the corpus folder, is a single file)
+CORPORA = {
+    'text': ('text.txt', True),
+    'binary': ('binary.bin', True),
+    'media': ('media.dat', True),
+    'small_files': ('small', False),
+}
+
+BenchmarkCase = namedtuple('BenchmarkCase', ['corpus', 'archive_type', 'method', 'level', 'threads'])
+RESULT_KEY = ('corpus', 'archive_type', 'method', 'level', 'threads')
+
+
+def get_benchmark_dir():
+    return os.path.join(listing_cache.get_cache_dir(), 'benchmark')
+
+
+def write_text(path, size, rng):
+    # Words from a fixed vocabulary with a Zipf-like frequency, the way natural language repeats itself
+    syllables = ['ka', 'lo', 'mi', 'ten', 'ra', 'su', 've', 'dor', 'an', 'is', 'po', 'lee', 'ur', 'sha', 'ne']
+    vocabulary = [''.join(rng.choices(syllables, k=rng.randint(1, 4))) for _ in range(3000)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    with open(path, 'w', encoding='utf-8') as text_file:
+        written = 0
+        while written < size:
+            words = rng.choices(vocabulary, weights, k=2000)
+            chunk = '\n'.join(' '.join(words[start:start + 12]) + '.' for start in range(0, len(words), 12)) + '\n'
+            text_file.write(chunk)
+            written += len(chunk)
+
+
+def write_binary(path, size, rng):
+    # Fixed-layout records: a counter, a type tag, a few random bytes and a measurement
+    records = []
+    for index in range(size // 32):
+        records.append(struct.pack('<IH10sd8s', index, index % 7, rng.randbytes(10), rng.random() * 100, b'RECORD\x00\x00'))
+    with open(path, 'wb') as binary_file:
+        binary_file.write(b''.join(records))
+
+
+def write_media(path, size, rng):
+    # Already compressed media looks like random bytes to a compressor
+    with open(path, 'wb') as media_file:
+        for _ in range(size // MIB):
+            media_file.write(rng.randbytes(MIB))
+
+
+def write_small_files(directory, count, rng):
+    for index in range(count):
+        folder = os.path.join(directory, f'dir{index % 25:02d}')
+        os.makedirs(folder, exist_ok=True)
+        if index % 3:
+            content = ' '.join(rng.choice(['alpha', 'beta', 'gamma', 'delta', str(index)]) for _ in range(rng.randint(40, 600)))
+            with open(os.path.join(folder, f'note{index}.txt'), 'w', encoding='utf-8') as small_file:
+                small_file.write(content)
+        else:
+            with open(os.path.join(folder, f'blob{index}.bin'), 'wb') as small_file:
+                small_file.write(rng.randbytes(rng.randint(256, 4096)))
+
+
+def build_corpus(scale=1.0, base_dir=None):
+    """Create the synthetic corpus once per scale and return its folder.
+
+    8 MiB of text, binary records and incompressible media each, plus 2000 small files, times `scale`.
+    """
+    base_dir = base_dir or get_benchmark_dir()
+    corpus_dir = os.path.join(base_dir, f'corpus-v{CORPUS_VERSION}-{scale:g}')
+    if os.path.exists(os.path.join(corpus_dir, '.complete')):
+        return corpus_dir
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    os.makedirs(corpus_dir)
+    size = max(MIB, int(8 * MIB * scale))
+    rng = random.Random(CORPUS_SEED)
+    write_text(os.path.join(corpus_dir, 'text.txt'), size, rng)
+    write_binary(os.path.join(corpus_dir, 'binary.bin'), size, rng)
+    write_media(os.path.join(corpus_dir, 'media.dat'), size, rng)
+    write_small_files(os.path.join(corpus_dir, 'small'), max(50, int(2000 * scale)), rng)
+    open(os.path.join(corpus_dir, '.complete'), 'w').close()
+    return corpus_dir
+
+
+def tree_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def default_cases(quick=False):
+    """Every method of every format at level 5, the levels of 7z LZMA2 and its scaling with threads."""
+    cpus = system_resources.cpu_count()
+    thread_counts = sorted({1, 2, 4, 8, 16, 32, 64, cpus} & set(range(1, cpus + 1)))
+    combinations = []
+    for archive_format in compression_tuning.FORMATS:
+        methods = archive_format.methods if not quick else archive_format.methods[:1]
+        level = '5' if compression_tuning.has_levels(archive_format.type) else None
+        combinations.extend((archive_format.type, method, level, cpus) for method in methods)
+    for level in (['1', '9'] if quick else ['1', '3', '7', '9']):
+        combinations.append(('7z', compression_tuning.LZMA2, level, cpus))
+    for threads in ([1] if quick else thread_counts):
+        combinations.append(('7z', compression_tuning.LZMA2, '5', threads))
+
+    cases = []
+    for corpus, (_, single_file) in CORPORA.items():
+        for archive_type, method, level, threads in dict.fromkeys(combinations):
+            if compression_tuning.FORMATS_BY_TYPE[archive_type].single_file and not single_file:
+                continue
+            cases.append(BenchmarkCase(corpus, archive_type, method, level, threads))
+    return cases
+
+
+def filter_cases(cases, formats=None, methods=None, levels=None, threads=None, corpora=None):
+    return [case for case in cases
+            if (not formats or case.archive_type in formats)
+            and (not methods or case.method in methods)
+            and (not levels or case.level in levels)
+            and (not threads or case.threads in threads)
+            and (not corpora or case.corpus in corpora)]
+
+
+def parse_cpu_benchmark(output):
+    """Ratings from the Avr: and Tot: lines of `7zz b`, in MIPS, and the compression speed in KiB/s."""
+    result = {}
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('7-Zip') and 'version' not in result:
+            result['version'] = stripped.split(':')[0].strip()
+        elif stripped.startswith('Avr:'):
+            compressing, _, decompressing = stripped[4:].partition('|')
+            compressing, decompressing = compressing.split(), decompressing.split()
+            if compressing:
+                result['compress_mips'] = int(compressing[-1])
+                if len(compressing) >= 4:
+                    result['compress_kib_s'] = int(compressing[0])
+            if decompressing:
+                result['decompress_mips'] = int(decompressing[-1])
+                if len(decompressing) >= 4:
+                    result['decompress_kib_s'] = int(decompressing[0])
+        elif stripped.startswith('Tot:'):
+            values = stripped[4:].split()
+            if values:
+                result['total_mips'] = int(values[-1])
+    return result
+
+
+def run_cpu_benchmark(s7zip_bin, threads=None):
+    threads = threads or system_resources.cpu_count()
+    try:
+        completed = subprocess.run([s7zip_bin, 'b', f'-mmt={threads}'], capture_output=True, text=True)
+    except OSError as e:
+        return {'threads': threads, 'error': str(e)}
+    result = parse_cpu_benchmark(completed.stdout)
+    result['threads'] = threads
+    if completed.returncode != 0 and 'total_mips' not in result:
+        result['error'] = completed.stderr.strip() or f'7zz exited with {completed.returncode}'
+    return result
+
+
+def run_case(s7zip_bin, corpus_dir, case, work_dir):
+    """Compress and extract one corpus with the application's own threads and measure both."""
+    # Imported here so loading the module does not need Qt
+    from sevenz_engine import ArchivingThread, ExtractionThread
+
+    source = os.path.join(corpus_dir, CORPORA[case.corpus][0])
+    archive_format = compression_tuning.FORMATS_BY_TYPE[case.archive_type]
+    archive_path = os.path.join(work_dir, f'{case.corpus}.{archive_format.extension}')
+    output_dir = os.path.join(work_dir, 'out')
+    shutil.rmtree(output_dir, ignore_errors=True)
+    if os.path.exists(archive_path):
+        os.remove(archive_path)
+
+    result = dict(case._asdict())
+    result['input_size'] = input_size = tree_size(source)
+    settings = compression_tuning.CompressionSettings(case.threads, None, None, None)
+    switches = compression_tuning.get_switches(case.archive_type, case.method, case.level, settings)
+    errors = []
+
+    archiving_thread = ArchivingThread(s7zip_bin, [source], archive_path, case.archive_type, None, case.level,
+                                       switches)
+    archiving_thread.archive_failed.connect(errors.append)
+    start = time.perf_counter()
+    # run() directly, the measurement should not include thread start-up or signal delivery
+    archiving_thread.run()
+    compress_seconds = time.perf_counter() - start
+    if errors or not os.path.exists(archive_path):
+        result['error'] = errors[0] if errors else 'No archive was created'
+        return result
+
+    extraction_thread = ExtractionThread(s7zip_bin, archive_path, output_dir, [], 'x', ['-y'])
+    extraction_thread.extraction_failed.connect(errors.append)
+    start = time.perf_counter()
+    extraction_thread.run()
+    extract_seconds = time.perf_counter() - start
+    if errors:
+        result['error'] = errors[0]
+        return result
+
+    archive_size = os.path.getsize(archive_path)
+    extracted_size = tree_size(output_dir)
+    result.update({
+        'archive_size': archive_size,
+        'ratio': round(archive_size / input_size, 4) if input_size else None,
+        'compress_seconds': round(compress_seconds, 4),
+        'extract_seconds': round(extract_seconds, 4),
+        'compress_mb_s': round(input_size / MIB / compress_seconds, 2) if compress_seconds else None,
+        'extract_mb_s': round(input_size / MIB / extract_seconds, 2) if extract_seconds else None,
+    })
+    if extracted_size != input_size:
+        result['error'] = f'Extracted {extracted_size} bytes, expected {input_size}'
+    return result
+
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpus': system_resources.cpu_count(),
+        'available_memory': system_resources.available_memory(),
+    }
+
+
+def run_suite(s7zip_bin, cases, scale=1.0, cpu_benchmark=True, on_result=None, should_stop=None):
+    """Run the CPU benchmark and every case, returning the JSON-ready results.
+
+    `on_result` is called with each result as it arrives, `should_stop` is polled between cases.
+    """
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'machine': machine_info(),
+        'scale': scale,
+        'cpu': run_cpu_benchmark(s7zip_bin) if cpu_benchmark else None,
+        'results': [],
+    }
+    if on_result is not None and results['cpu'] is not None:
+        on_result(results['cpu'])
+    # Imported here so loading the module does not need Qt
+    from scratch_space import ScratchSpace
+
+    corpus_dir = build_corpus(scale)
+    scratch_space = ScratchSpace()
+    work_dir = scratch_space.allocate()
+    try:
+        for case in cases:
+            if should_stop is not None and should_stop():
+                break
+            result = run_case(s7zip_bin, corpus_dir, case, work_dir)
+            results['results'].append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        scratch_space.release(work_dir)
+    return results
+
+
+def save_results(results, path=None):
+    if path is None:
+        os.makedirs(get_benchmark_dir(), exist_ok=True)
+        path = os.path.join(get_benchmark_dir(), time.strftime('results-%Y%m%d-%H%M%S.json'))
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as results_file:
+        return json.load(results_file)
+
+
+def compare_results(baseline, current, tolerance=0.1):
+    """Return a description of every case that got slower or compressed worse by more than `tolerance`."""
+    def key(result):
+        return tuple(result.get(name) for name in RESULT_KEY)
+
+    baseline_by_key = {key(result): result for result in baseline.get('results', []) if 'error' not in result}
+    regressions = []
+    for result in current.get('results', []):
+        old = baseline_by_key.get(key(result))
+        if old is None:
+            continue
+        name = '/'.join(str(value) for value in key(result) if value is not None)
+        if 'error' in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+        for field in ('compress_mb_s', 'extract_mb_s'):
+            if old.get(field) and result.get(field) is not None and result[field] < old[field] * (1 - tolerance):
+                regressions.append(f"{name}: {field} {old[field]} -> {result[field]}")
+        if old.get('ratio') and result.get('ratio') is not None and result['ratio'] > old['ratio'] * (1 + tolerance):
+            regressions.append(f"{name}: ratio {old['ratio']} -> {result['ratio']}")
+    return regressions
+
+
+def format_table(results):
+    rows = [('Corpus', 'Format', 'Method', 'Level', 'Threads', 'Ratio', 'Comp MB/s', 'Extr MB/s', 'Status')]
+    for result in results.get('results', []):
+        rows.append((
+            result['corpus'], result['archive_type'], result['method'], result['level'] or '-', str(result['threads']),
+            f"{result['ratio']:.3f}" if result.get('ratio') is not None else '-',
+            str(result.get('compress_mb_s', '-')), str(result.get('extract_mb_s', '-')),
+            result.get('error', 'ok').splitlines()[0],
+        ))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    lines = ['  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows]
+    cpu = results.get('cpu')
+    if cpu:
+        lines.insert(0, f"7zz b: {cpu.get('total_mips', '?')} MIPS total, {cpu.get('compress_mips', '?')} compressing, "
+                        f"{cpu.get('decompress_mips', '?')} decompressing with {cpu['threads']} threads")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark 7zz and the archiving paths of this application.")
+    parser.add_argument('--bin', help="7zz binary to use")
+    parser.add_argument('--output', help="Where to write the JSON results, default: the cache folder")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results to compare with, exits 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=10, help="Allowed slowdown in percent (default 10)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Corpus size factor (default 1.0 = 8 MiB per file)")
+    parser.add_argument('--quick', action='store_true', help="Default methods only and fewer levels and threads")
+    parser.add_argument('--no-cpu', action='store_true', help="Skip the `7zz b` CPU rating")
+    parser.add_argument('--formats', nargs='*')
+    parser.add_argument('--methods', nargs='*')
+    parser.add_argument('--levels', nargs='*')
+    parser.add_argument('--threads', nargs='*', type=int)
+    parser.add_argument('--corpora', nargs='*', choices=list(CORPORA))
+    args = parser.parse_args(argv)
+
+    if args.bin:
+        s7zip_bin = args.bin
+    else:
+        import sevenz_engine
+        s7zip_bin = sevenz_engine.determine_7zip_binary()
+    cases = filter_cases(default_cases(args.quick), args.formats, args.methods, args.levels, args.threads,
+                         args.corpora)
+
+    def report(result):
+        if 'corpus' in result:
+            status = result.get('error', f"ratio {result.get('ratio')}, {result.get('compress_mb_s')} MB/s")
+            print(f"{result['corpus']} {result['archive_type']} {result['method']} "
+                  f"-mx{result['level']} -mmt{result['threads']}: {status}", file=sys.stderr)
+
+    # The archiving threads echo their 7zz commands, keep stdout for the table
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_suite(s7zip_bin, cases, args.scale, not args.no_cpu, on_result=report)
+    path = save_results(results, args.output)
+    print(format_table(results))
+    print(f"\nResults written to {path}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare), results, args.tolerance / 100)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 1 if any('error' in result for result in results['results']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QTableWidget, \
+    QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox
+from PySide6.QtCore import QThread, Signal
+
+import benchmark
+import sevenz_engine
+
+COLUMNS = ["Corpus", "Format", "Method", "Level", "Threads", "Ratio", "Compress MB/s", "Extract MB/s", "Status"]
+
+
+class BenchmarkWorker(QThread):
+    result_ready = Signal(object)
+    cpu_ready = Signal(object)
+    benchmark_finished = Signal(object)
+
+    def __init__(self, s7zip_bin, quick=False):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.quick = quick
+        self.stop_requested = False
+
+    def run(self):
+        def on_result(result):
+            if 'corpus' in result:
+                self.result_ready.emit(result)
+            else:
+                self.cpu_ready.emit(result)
+
+        results = benchmark.run_suite(self.s7zip_bin, benchmark.default_cases(self.quick), on_result=on_result,
+                                      should_stop=lambda: self.stop_requested)
+        self.benchmark_finished.emit(results)
+
+    def stop(self):
+        # The case that is running finishes first
+        self.stop_requested = True
+
+
+class BenchmarkDialog(QDialog):
+    """Runs the benchmark suite and shows throughput and ratio per case."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Benchmark")
+        self.setMinimumSize(820, 480)
+        self.worker = None
+        self.results = None
+
+        self.cpu_label = QLabel("Compresses a synthetic corpus with every format, method, level and thread count.")
+        self.status_label = QLabel()
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(len(COLUMNS) - 1, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        self.quick_check_box = QCheckBox("Quick run")
+        self.run_button = QPushButton("Run")
+        self.run_button.clicked.connect(self.run_benchmark)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_benchmark)
+        load_button = QPushButton("Load...")
+        load_button.clicked.connect(self.load_results)
+        self.save_button = QPushButton("Save As...")
+        self.save_button.setEnabled(False)
+        self.save_button.clicked.connect(self.save_results)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.quick_check_box)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.run_button)
+        button_layout.addWidget(self.stop_button)
+        button_layout.addWidget(load_button)
+        button_layout.addWidget(self.save_button)
+        button_layout.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.cpu_label)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status_label)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def run_benchmark(self):
+        self.table.setRowCount(0)
+        self.results = None
+        self.worker = BenchmarkWorker(sevenz_engine.determine_7zip_binary(), self.quick_check_box.isChecked())
+        self.worker.cpu_ready.connect(self.show_cpu_result)
+        self.worker.result_ready.connect(self.add_result)
+        self.worker.benchmark_finished.connect(self.on_benchmark_finished)
+        self.run_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.save_button.setEnabled(False)
+        self.status_label.setText("Running 7zz b...")
+        self.worker.start()
+
+    def stop_benchmark(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.status_label.setText("Stopping after the current case...")
+
+    def show_cpu_result(self, cpu):
+        if 'error' in cpu:
+            self.cpu_label.setText(f"7zz b failed: {cpu['error']}")
+            return
+        self.cpu_label.setText(
+            f"{cpu.get('version', '7zz')}: {cpu.get('total_mips', '?')} MIPS total, "
+            f"{cpu.get('compress_mips', '?')} compressing, {cpu.get('decompress_mips', '?')} decompressing "
+            f"with {cpu['threads']} threads")
+
+    def add_result(self, result):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        values = [
+            result['corpus'], result['archive_type'], result['method'], result['level'] or '-',
+            str(result['threads']),
+            f"{result['ratio']:.3f}" if result.get('ratio') is not None else '-',
+            str(result.get('compress_mb_s', '-')), str(result.get('extract_mb_s', '-')),
+            result.get('error', 'ok').splitlines()[0],
+        ]
+        for column, value in enumerate(values):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+        self.status_label.setText(f"{row + 1} cases done")
+
+    def on_benchmark_finished(self, results):
+        self.results = results
+        self.run_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.save_button.setEnabled(True)
+        try:
+            path = benchmark.save_results(results)
+        except OSError as e:
+            self.status_label.setText(f"{len(results['results'])} cases done, results not saved: {e}")
+            return
+        self.status_label.setText(f"{len(results['results'])} cases done, results saved to {path}")
+
+    def show_results(self, results):
+        self.results = results
+        self.table.setRowCount(0)
+        if results.get('cpu'):
+            self.show_cpu_result(results['cpu'])
+        for result in results.get('results', []):
+            self.add_result(result)
+        self.save_button.setEnabled(True)
+
+    def load_results(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Benchmark Results", benchmark.get_benchmark_dir(),
+                                              "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.show_results(benchmark.load_results(path))
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Error", f"Failed to load the benchmark results: {e}")
+            return
+        self.status_label.setText(f"Loaded {path}")
+
+    def save_results(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Benchmark Results", benchmark.get_benchmark_dir(),
+                                              "JSON (*.json)")
+        if not path:
+            return
+        try:
+            benchmark.save_results(self.results, path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Failed to save the benchmark results: {e}")
+
+    def closeEvent(self, event):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        super().closeEvent(event)
@@ -0,0 +1,321 @@
+"""Headless batch mode: list, extract, add, test, rename and delete without a window.
+
+Runs the same worker threads as the GUI, synchronously, and prints one JSON object per line on stdout:
+
+    python cli.py extract photos.7z -o out --conflict skip
+    {"event": "progress", "percent": 42, "text": "42% 17 - IMG_0042.jpg"}
+    {"event": "done", "command": "extract", "status": "ok", "elapsed": 1.92}
+
+Exit codes are listed below, 7zz's own output and commands go to stderr.
+"""
+import argparse
+import contextlib
+import getpass
+import json
+import os
+import signal
+import sys
+import time
+
+import archive_listing
+import compression_tuning
+import sevenz_engine
+import sevenz_process
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # 7zz reported an error
+EXIT_USAGE = 2  # Bad arguments, the same code argparse uses
+EXIT_NOT_FOUND = 3  # The archive or a file to add does not exist, or is not an archive
+EXIT_PASSWORD = 4  # A password is needed and none or a wrong one was given
+EXIT_CANCELLED = 130  # Interrupted, as a shell reports SIGINT
+
+# --conflict values, 'ask' answers 7zz's question on a terminal and gives up without one
+CONFLICT_SWITCHES = {
+    'ask': None,
+    'overwrite': '-aoa',
+    'skip': '-aos',
+    'rename': '-aou',
+    'rename-existing': '-aot',
+}
+OVERWRITE_ANSWERS = {'y': 'Y', 'n': 'N', 'a': 'A', 's': 'S', 'u': 'U', 'q': 'Q'}
+
+
+class Output:
+    """Writes JSON lines to the real stdout while everything else printed goes to stderr."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def emit(self, event, **fields):
+        self.stream.write(json.dumps({'event': event, **fields}, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def can_ask(args):
+    return not args.no_input and sys.stdin.isatty()
+
+
+def exit_code_for(message):
+    if 'Wrong password' in message or 'Can not open encrypted archive' in message:
+        return EXIT_PASSWORD
+    if 'Cannot open the file as archive' in message or 'Is not archive' in message:
+        return EXIT_NOT_FOUND
+    return EXIT_FAILED
+
+
+class Run:
+    """Connects a worker's signals to JSON events and records how it ended."""
+
+    def __init__(self, output, command):
+        self.output = output
+        self.command = command
+        self.status = None
+        self.message = ''
+        self.code = EXIT_OK
+        self.started = time.monotonic()
+
+    def progress(self, percent, text=''):
+        self.output.emit('progress', percent=percent, text=text)
+
+    def finished(self):
+        self.status = 'ok'
+
+    def failed(self, message):
+        self.status = 'failed'
+        self.message = message
+        self.code = exit_code_for(message)
+
+    def cancelled(self):
+        self.status = 'cancelled'
+        self.code = EXIT_CANCELLED
+
+    def done(self):
+        if self.status is None:
+            self.failed('7zz ended without a result')
+        fields = {'command': self.command, 'status': self.status, 'elapsed': round(time.monotonic() - self.started, 3)}
+        if self.message:
+            fields['message'] = self.message
+        self.output.emit('done', **fields)
+        return self.code
+
+
+@contextlib.contextmanager
+def stop_on_interrupt(stop):
+    """Let SIGINT and SIGTERM stop the running worker, which then reports a break, instead of raising."""
+    handler = lambda signum, frame: stop()
+    previous = {signum: signal.signal(signum, handler) for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        yield
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
+
+
+def require_archive(output, command, archive_path):
+    if os.path.isfile(archive_path):
+        return True
+    output.emit('done', command=command, status='failed', message=f"No such archive: {archive_path}")
+    return False
+
+
+def command_list(args, s7zip_bin, output):
+    if not require_archive(output, 'list', args.archive):
+        return EXIT_NOT_FOUND
+    run = Run(output, 'list')
+    worker = sevenz_engine.ListArchiveWorker(s7zip_bin, args.archive, force_utf8=args.utf8, code_page=args.code_page)
+    worker.entries_ready.connect(
+        lambda entries: [output.emit('entry', **entry._asdict()) for entry in entries])
+    worker.listing_finished.connect(run.finished)
+    worker.listing_failed.connect(run.failed)
+    with stop_on_interrupt(worker.cancel):
+        worker.run()
+    if worker.cancelled:
+        run.cancelled()
+    return run.done()
+
+
+def command_extract(args, s7zip_bin, output):
+    if not require_archive(output, 'extract', args.archive):
+        return EXIT_NOT_FOUND
+    switches = []
+    if args.password is not None:
+        switches.append('-p' + args.password)
+    if CONFLICT_SWITCHES[args.conflict]:
+        switches.append(CONFLICT_SWITCHES[args.conflict])
+    switches += archive_listing.code_page_switches(args.code_page)
+    destination = args.output or os.path.splitext(args.archive)[0]
+
+    run = Run(output, 'extract')
+    thread = sevenz_engine.ExtractionThread(s7zip_bin, args.archive, destination, args.items,
+                                            'e' if args.flat else 'x', switches)
+
+    # The thread waits in PromptChannel.ask(), answering from the handler returns at once
+    def ask_password():
+        output.emit('prompt', kind=sevenz_process.PROMPT_PASSWORD)
+        if can_ask(args):
+            thread.prompts.answer(getpass.getpass(f"Password for {os.path.basename(args.archive)}: ",
+                                                  stream=sys.stderr))
+        else:
+            thread.prompts.answer('')
+
+    def ask_overwrite(text):
+        output.emit('prompt', kind=sevenz_process.PROMPT_OVERWRITE, text=text)
+        answer = 'Q'
+        if can_ask(args):
+            print(text, file=sys.stderr, end=' ', flush=True)
+            answer = OVERWRITE_ANSWERS.get(sys.stdin.readline().strip()[:1].lower(), 'Q')
+        thread.prompts.answer(answer)
+
+    thread.password_required.connect(ask_password)
+    thread.file_conflict_made.connect(ask_overwrite)
+    thread.progress_updated.connect(run.progress)
+    thread.extraction_finished.connect(run.finished)
+    thread.extraction_failed.connect(run.failed)
+    thread.extraction_break.connect(run.cancelled)
+    with stop_on_interrupt(thread.stop_extraction):
+        thread.run()
+    return run.done()
+
+
+def command_add(args, s7zip_bin, output):
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        output.emit('done', command='add', status='failed', message=f"No such file: {missing[0]}")
+        return EXIT_NOT_FOUND
+
+    run = Run(output, 'add')
+    if os.path.exists(args.archive):
+        if args.password or args.type or args.method or args.threads:
+            print("The archive exists, --type, --method, --threads and --password only apply to a new one",
+                  file=sys.stderr)
+        thread = sevenz_engine.AddFilesThread(s7zip_bin, args.archive, args.files)
+        thread.add_files_finished.connect(run.finished)
+        thread.add_files_failed.connect(run.failed)
+    else:
+        archive_type = args.type or os.path.splitext(args.archive)[1].lstrip('.').lower()
+        archive_type = {'gz': 'gzip', 'bz2': 'bzip2'}.get(archive_type, archive_type)
+        if archive_type not in compression_tuning.FORMATS_BY_TYPE:
+            output.emit('done', command='add', status='failed',
+                        message=f"Unknown archive type '{archive_type}', pass --type")
+            return EXIT_USAGE
+        level = args.level if compression_tuning.has_levels(archive_type) else None
+        settings = compression_tuning.CompressionSettings(args.threads, None, None, None)
+        switches = compression_tuning.get_switches(archive_type, args.method, level or '5', settings)
+        thread = sevenz_engine.ArchivingThread(s7zip_bin, args.files, args.archive, archive_type, args.password,
+                                               level, switches)
+        thread.archive_finished.connect(run.finished)
+        thread.archive_failed.connect(run.failed)
+    thread.progress_updated.connect(run.progress)
+    thread.archive_break.connect(run.cancelled)
+    with stop_on_interrupt(thread.stop_archive):
+        thread.run()
+
+    if run.status == 'ok' and args.sub_dir and os.path.exists(args.archive):
+        # Same follow-up as adding from the GUI, the new items are moved below sub_dir in one rewrite
+        rename_thread = sevenz_engine.RenameFilesThread(s7zip_bin, args.files, args.archive, args.sub_dir)
+        rename_thread.rename_files_failed.connect(run.failed)
+        rename_thread.run()
+    return run.done()
+
+
+def command_test(args, s7zip_bin, output):
+    if not require_archive(output, 'test', args.archive):
+        return EXIT_NOT_FOUND
+    run = Run(output, 'test')
+    worker = sevenz_engine.TestArchiveWorker(args.archive, s7zip_bin)
+    worker.finished.connect(lambda text: print(text, file=sys.stderr))
+    worker.run()
+    if worker.passed:
+        run.finished()
+    else:
+        run.failed("The archive has errors")
+    return run.done()
+
+
+def command_rename(args, s7zip_bin, output):
+    if not require_archive(output, 'rename', args.archive):
+        return EXIT_NOT_FOUND
+    if len(args.names) % 2:
+        output.emit('done', command='rename', status='failed', message="Names must come in OLD NEW pairs")
+        return EXIT_USAGE
+    run = Run(output, 'rename')
+    pairs = list(zip(args.names[0::2], args.names[1::2]))
+    worker = sevenz_engine.RenameWorker(s7zip_bin, args.archive, pairs)
+    worker.progress_updated.connect(run.progress)
+    worker.finished.connect(lambda success, message: run.finished() if success else run.failed(message))
+    worker.run()
+    return run.done()
+
+
+def command_delete(args, s7zip_bin, output):
+    if not require_archive(output, 'delete', args.archive):
+        return EXIT_NOT_FOUND
+    run = Run(output, 'delete')
+    worker = sevenz_engine.DeleteWorker(s7zip_bin, args.archive, args.items)
+    worker.progress_updated.connect(run.progress)
+    worker.finished.connect(lambda success, message: run.finished() if success else run.failed(message))
+    worker.run()
+    return run.done()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="7-Zip Archiver without a window, prints JSON lines")
+    parser.add_argument('--bin', help="7zz binary to use, default: the bundled one")
+    parser.add_argument('--no-input', action='store_true', help="Never ask on the terminal, fail instead")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="One 'entry' event per archive entry")
+    list_parser.add_argument('archive')
+    list_parser.add_argument('--utf8', action='store_true', help="Decode names as UTF-8 instead of detecting")
+    list_parser.add_argument('--code-page', type=int, help="Code page of names not stored as Unicode, e.g. 932")
+    list_parser.set_defaults(handler=command_list)
+
+    extract_parser = commands.add_parser('extract', help="Extract all or the given entries")
+    extract_parser.add_argument('archive')
+    extract_parser.add_argument('items', nargs='*', help="Entries to extract, default: all")
+    extract_parser.add_argument('-o', '--output', help="Destination folder, default: next to the archive")
+    extract_parser.add_argument('-p', '--password')
+    extract_parser.add_argument('--conflict', choices=list(CONFLICT_SWITCHES), default='ask',
+                                help="What to do with existing files (default: ask)")
+    extract_parser.add_argument('--flat', action='store_true', help="Drop the folders inside the archive")
+    extract_parser.add_argument('--code-page', type=int, help="Code page of names not stored as Unicode, e.g. 932")
+    extract_parser.set_defaults(handler=command_extract)
+
+    add_parser = commands.add_parser('add', help="Add files, creating the archive if it does not exist")
+    add_parser.add_argument('archive')
+    add_parser.add_argument('files', nargs='+')
+    add_parser.add_argument('-t', '--type', choices=[archive_format.type for archive_format in compression_tuning.FORMATS])
+    add_parser.add_argument('-l', '--level', choices=['0', '1', '3', '5', '7', '9'], default='5')
+    add_parser.add_argument('-m', '--method', help="Compression method, default: the format's own")
+    add_parser.add_argument('--threads', type=int)
+    add_parser.add_argument('-p', '--password')
+    add_parser.add_argument('--sub-dir', help="Folder inside the archive to put the files in")
+    add_parser.set_defaults(handler=command_add)
+
+    test_parser = commands.add_parser('test', help="Check the archive, 7zz's report goes to stderr")
+    test_parser.add_argument('archive')
+    test_parser.set_defaults(handler=command_test)
+
+    rename_parser = commands.add_parser('rename', help="Rename entries, all pairs in one rewrite")
+    rename_parser.add_argument('archive')
+    rename_parser.add_argument('names', nargs='+', metavar='OLD NEW')
+    rename_parser.set_defaults(handler=command_rename)
+
+    delete_parser = commands.add_parser('delete', help="Delete entries, folders with their contents")
+    delete_parser.add_argument('archive')
+    delete_parser.add_argument('items', nargs='+')
+    delete_parser.set_defaults(handler=command_delete)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    s7zip_bin = args.bin or sevenz_engine.determine_7zip_binary()
+    output = Output(sys.stdout)
+    # The workers print their 7zz commands, keep stdout for the events
+    with contextlib.redirect_stdout(sys.stderr):
+        return args.handler(args, s7zip_bin, output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
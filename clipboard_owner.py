@@ -0,0 +1,106 @@
+import sys
+
+from PySide6.QtCore import QObject, QMimeData, QUrl
+from PySide6.QtWidgets import QApplication
+
+import SevenZHelperMacOS
+from preview_cache import PreviewCache
+from scratch_space import ScratchSpace
+
+URL_MIME_TYPE = 'text/uri-list'
+
+
+class DeferredUrlMimeData(QMimeData):
+    """File URLs put on the clipboard while their files are still being extracted, a paste waits for them."""
+
+    def __init__(self, file_paths, wait_for_files):
+        super().__init__()
+        urls = [QUrl.fromLocalFile(path) for path in file_paths]
+        self.setUrls(urls)
+        self.text_value = '\n'.join(url.toString() for url in urls)
+        self.wait_for_files = wait_for_files
+        self.files_ready = False
+
+    def retrieveData(self, mime_type, preferred_type):
+        # Only reading the file list waits. Qt would answer a text reader from the file list, so text is given here.
+        if mime_type.startswith('text/plain'):
+            return self.text_value
+        if mime_type == URL_MIME_TYPE and not self.files_ready:
+            self.wait_for_files()
+            self.files_ready = True
+        return super().retrieveData(mime_type, preferred_type)
+
+
+class ClipboardOwner(QObject):
+    """Puts files copied out of archives on the clipboard and cleans up after them.
+
+    Extracted folders and cached entries stay pinned while on the clipboard; once something else is copied the
+    folders go back to the scratch space and the entries are unpinned.
+    There is one owner per application, shared like the SettingsManager.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ClipboardOwner, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def __init__(self):
+        pass
+
+    def initialize(self):
+        super().__init__()
+        self.preview_cache = PreviewCache()
+        self.scratch_space = ScratchSpace()
+        self.urls = []
+        self.mime_data = None  # What was set through QClipboard, compared by identity only
+        self.temp_dirs = []  # Removed once the clipboard holds something else
+        self.pinned_paths = []  # Preview cache files on the clipboard, kept from eviction meanwhile
+        QApplication.clipboard().dataChanged.connect(self.on_clipboard_changed)
+
+    def put(self, file_paths, temp_dir=None, pinned_paths=(), wait_for_files=None):
+        """Copy `file_paths`; with `wait_for_files` they may not exist yet, a paste calls it to wait for them."""
+        self.release()
+        self.urls = [QUrl.fromLocalFile(path) for path in file_paths]
+        self.temp_dirs = [temp_dir] if temp_dir else []
+        for folder in self.temp_dirs:
+            self.scratch_space.pin(folder)
+        self.pinned_paths = list(pinned_paths)
+        for path in self.pinned_paths:
+            self.preview_cache.pin(path)
+
+        if wait_for_files is not None:
+            self.mime_data = DeferredUrlMimeData(file_paths, wait_for_files)
+        elif sys.platform == "darwin":
+            SevenZHelperMacOS.copy_files_to_clipboard(file_paths)
+            return
+        else:
+            self.mime_data = QMimeData()
+            self.mime_data.setUrls(self.urls)
+        QApplication.clipboard().setMimeData(self.mime_data)
+
+    def on_clipboard_changed(self):
+        if not self.urls:
+            return
+        clipboard = QApplication.clipboard()
+        # Asking our own deferred data for its URLs would extract it, ownership says enough
+        if clipboard.ownsClipboard():
+            return
+        mime_data = clipboard.mimeData()
+        if mime_data is not None and mime_data is self.mime_data:
+            return
+        if self.mime_data is None and mime_data is not None and mime_data.urls() == self.urls:
+            return  # Written to the pasteboard directly, still ours
+        self.release()
+
+    def release(self):
+        for temp_dir in self.temp_dirs:
+            self.scratch_space.unpin(temp_dir)
+            self.scratch_space.release(temp_dir)
+        for path in self.pinned_paths:
+            self.preview_cache.unpin(path)
+        self.urls = []
+        self.mime_data = None
+        self.temp_dirs = []
+        self.pinned_paths = []
@@ -0,0 +1,241 @@
+import os
+from collections import namedtuple
+
+import system_resources
+
+KIB = 1024
+MIB = 1024 * KIB
+GIB = 1024 * MIB
+
+LZMA2 = 'LZMA2'
+LZMA = 'LZMA'
+PPMD = 'PPMd'
+BZIP2 = 'BZip2'
+DEFLATE = 'Deflate'
+DEFLATE64 = 'Deflate64'
+COPY = 'Copy'
+
+# `type` is the -t value, the first method is what 7zz uses by default, formats with only Copy have no levels
+ArchiveFormat = namedtuple('ArchiveFormat', ['type', 'label', 'extension', 'methods', 'single_file'])
+FORMATS = [
+    ArchiveFormat('7z', '7z', '7z', [LZMA2, LZMA, PPMD, BZIP2, DEFLATE, DEFLATE64, COPY], False),
+    ArchiveFormat('zip', 'zip', 'zip', [DEFLATE, DEFLATE64, BZIP2, LZMA, PPMD, COPY], False),
+    ArchiveFormat('tar', 'tar', 'tar', [COPY], False),
+    ArchiveFormat('gzip', 'gz', 'gz', [DEFLATE], True),
+    ArchiveFormat('xz', 'xz', 'xz', [LZMA2], True),
+    ArchiveFormat('bzip2', 'bzip2', 'bz2', [BZIP2], True),
+    ArchiveFormat('wim', 'wim', 'wim', [COPY], False),
+]
+FORMATS_BY_TYPE = {archive_format.type: archive_format for archive_format in FORMATS}
+
+# Explicit values for the thread, dictionary, word and solid block switches, None leaves the choice to 7zz.
+# For PPMd the dictionary is its model memory and the word size its model order.
+CompressionSettings = namedtuple('CompressionSettings', ['threads', 'dictionary', 'word_size', 'solid_block'])
+SOLID_OFF = 0  # solid_block value for a non-solid archive
+
+# What 7zz uses at each -mx level when no switch says otherwise
+LZMA_DICTIONARIES = {'1': 256 * KIB, '3': 4 * MIB, '5': 16 * MIB, '7': 32 * MIB, '9': 64 * MIB}
+LZMA_WORD_SIZES = {'1': 32, '3': 32, '5': 32, '7': 64, '9': 64}
+PPMD_MEMORY = {'1': MIB, '3': 4 * MIB, '5': 16 * MIB, '7': 64 * MIB, '9': 192 * MIB}
+PPMD_ORDERS = {'1': 4, '3': 4, '5': 6, '7': 16, '9': 32}
+DEFLATE_WORD_SIZES_BY_LEVEL = {'1': 32, '3': 32, '5': 32, '7': 64, '9': 128}
+SOLID_BLOCKS = {'1': 8 * MIB, '3': 128 * MIB, '5': 2 * GIB, '7': 4 * GIB, '9': 4 * GIB}
+
+DICTIONARY_SIZES = [2 ** exponent for exponent in range(16, 31)]  # 64 KiB to 1 GiB
+WORD_SIZES = [8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 273]
+DEFLATE_WORD_SIZES = [size for size in WORD_SIZES if size <= 258]
+MODEL_ORDERS = [2, 3, 4, 6, 8, 12, 16, 24, 32]
+SOLID_BLOCK_SIZES = [SOLID_OFF, MIB, 16 * MIB, 64 * MIB, 256 * MIB, GIB, 4 * GIB, 16 * GIB, 64 * GIB]
+
+MEMORY_BUDGET = 0.5  # Share of the available memory auto mode may plan for
+MIN_DICTIONARY = 64 * KIB
+
+# Presets that come with the application, they keep the chosen format and use its default method
+BUILTIN_PRESETS = {
+    "Fastest": {'compression_level': '1', 'auto_tune': True},
+    "Balanced": {'compression_level': '5', 'auto_tune': True},
+    "Max ratio": {'compression_level': '9', 'auto_tune': True, 'word_size': 273, 'methods': {'zip': DEFLATE64}},
+}
+
+
+def format_size(size):
+    for unit, factor in (('GB', GIB), ('MB', MIB), ('KB', KIB)):
+        if size >= factor:
+            return f"{size // factor} {unit}" if size % factor == 0 else f"{size / factor:.1f} {unit}"
+    return f"{size} B"
+
+
+def size_switch(size):
+    # 7zz size suffixes are binary: k, m, g
+    for suffix, factor in (('g', GIB), ('m', MIB), ('k', KIB)):
+        if size % factor == 0:
+            return f"{size // factor}{suffix}"
+    return f"{size}b"
+
+
+def has_levels(archive_type):
+    return FORMATS_BY_TYPE[archive_type].methods != [COPY]
+
+
+def effective_method(archive_type, method, level):
+    # Level 0 stores the files whatever the method
+    if level == '0' or not has_levels(archive_type):
+        return COPY
+    methods = FORMATS_BY_TYPE[archive_type].methods
+    return method if method in methods else methods[0]
+
+
+def has_dictionary(method):
+    return method in (LZMA2, LZMA, PPMD)
+
+
+def has_solid_blocks(archive_type, method):
+    return archive_type == '7z' and method != COPY
+
+
+def word_sizes(method):
+    """Choices for the word size control of a method, empty if it has none."""
+    if method in (LZMA2, LZMA):
+        return WORD_SIZES
+    if method in (DEFLATE, DEFLATE64):
+        return DEFLATE_WORD_SIZES
+    if method == PPMD:
+        return MODEL_ORDERS
+    return []
+
+
+def effective_settings(archive_type, method, level, settings):
+    """Fill the values left to 7zz with the ones it will pick, so they can be shown and estimated."""
+    method = effective_method(archive_type, method, level)
+    dictionary = word_size = solid_block = None
+    if method in (LZMA2, LZMA):
+        dictionary, word_size = LZMA_DICTIONARIES.get(level), LZMA_WORD_SIZES.get(level)
+    elif method == PPMD:
+        dictionary, word_size = PPMD_MEMORY.get(level), PPMD_ORDERS.get(level)
+    elif method in (DEFLATE, DEFLATE64):
+        word_size = DEFLATE_WORD_SIZES_BY_LEVEL.get(level)
+    if has_solid_blocks(archive_type, method):
+        solid_block = SOLID_BLOCKS.get(level)
+    return CompressionSettings(
+        threads=settings.threads or system_resources.cpu_count(),
+        dictionary=settings.dictionary or dictionary,
+        word_size=settings.word_size or word_size,
+        solid_block=settings.solid_block if settings.solid_block is not None else solid_block,
+    )
+
+
+def estimate_memory(archive_type, method, level, settings):
+    """Return (compression, decompression) peak memory in bytes.
+
+    LZMA2 runs one encoder per pair of threads, each with a binary tree match finder of about
+    11.5 times the dictionary (7.5 for the hash chains of the fast levels) and, when there is
+    more than one, an input block of four dictionaries. LZMA is a single encoder. PPMd needs its
+    model memory on both sides, once per thread in zip. BZip2 needs about 10 MB per thread,
+    Deflate and Copy little whatever the settings.
+    """
+    settings = effective_settings(archive_type, method, level, settings)
+    method = effective_method(archive_type, method, level)
+    if method in (LZMA2, LZMA):
+        encoders = max(1, settings.threads // 2) if method == LZMA2 else 1
+        match_finder_factor = 7.5 if level in ('1', '3') else 11.5
+        per_encoder = settings.dictionary * match_finder_factor
+        if encoders > 1:
+            per_encoder += 4 * settings.dictionary
+        return int(encoders * per_encoder) + 16 * MIB, settings.dictionary + 4 * MIB
+    if method == PPMD:
+        models = settings.threads if archive_type == 'zip' else 1
+        return models * settings.dictionary + 4 * MIB, models * settings.dictionary + 4 * MIB
+    if method == BZIP2:
+        return settings.threads * 10 * MIB, settings.threads * 4 * MIB
+    if method in (DEFLATE, DEFLATE64):
+        return 4 * MIB + settings.threads * 2 * MIB, 4 * MIB
+    return 4 * MIB, 4 * MIB
+
+
+def input_size(paths, limit):
+    """Total size of the files below `paths`, stops counting once it exceeds `limit`."""
+    total = 0
+    for path in paths:
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+                if total > limit:
+                    return total
+        if total > limit:
+            return total
+    return total
+
+
+def auto_tune(archive_type, method, level, source_paths=(), cpus=None, memory=None):
+    """Pick thread count and dictionary size for this machine.
+
+    All usable CPUs get a thread. A dictionary larger than the input buys nothing, so it shrinks
+    to fit small inputs. If the estimate exceeds half the available memory, threads are dropped
+    in encoder pairs and then the dictionary is halved until it fits.
+    """
+    cpus = cpus or system_resources.cpu_count()
+    memory = memory if memory is not None else system_resources.available_memory()
+    method = effective_method(archive_type, method, level)
+    if not has_dictionary(method):
+        return CompressionSettings(cpus, None, None, None)
+
+    dictionary = effective_settings(archive_type, method, level, CompressionSettings(cpus, None, None, None)).dictionary
+    if source_paths:
+        total = input_size(source_paths, dictionary)
+        while dictionary > MIN_DICTIONARY and dictionary // 2 >= total:
+            dictionary //= 2
+
+    threads = cpus
+    if memory is not None:
+        budget = memory * MEMORY_BUDGET
+
+        def fits():
+            settings = CompressionSettings(threads, dictionary, None, None)
+            return estimate_memory(archive_type, method, level, settings)[0] <= budget
+
+        while not fits() and threads > 2:
+            threads -= 2
+        while not fits() and dictionary > MIN_DICTIONARY:
+            dictionary //= 2
+    return CompressionSettings(threads, dictionary, None, None)
+
+
+def get_switches(archive_type, method, level, settings):
+    """7zz switches for the method and the explicit values of `settings`."""
+    method = effective_method(archive_type, method, level)
+    switches = []
+    if method == COPY:
+        # Storing needs no threads, and tar and wim take no method switches at all
+        if archive_type in ('7z', 'zip') and level != '0':
+            switches.append('-m0=Copy' if archive_type == '7z' else '-mm=Copy')
+        return switches
+    if settings.threads:
+        switches.append(f'-mmt={settings.threads}')
+
+    dictionary = settings.dictionary if has_dictionary(method) else None
+    word_size = settings.word_size if settings.word_size in word_sizes(method) else None
+    if archive_type == '7z' and method == PPMD:
+        # 7z takes PPMd's memory and order as parameters of the method
+        parameters = [method]
+        if dictionary:
+            parameters.append(f'mem={size_switch(dictionary)}')
+        if word_size:
+            parameters.append(f'o={word_size}')
+        switches.append('-m0=' + ':'.join(parameters))
+    else:
+        if archive_type == '7z':
+            switches.append(f'-m0={method}')
+        elif archive_type == 'zip':
+            switches.append(f'-mm={method}')
+        if dictionary:
+            switches.append(f'-mmem={size_switch(dictionary)}' if method == PPMD else f'-md={size_switch(dictionary)}')
+        if word_size:
+            switches.append(f'-mo={word_size}' if method == PPMD else f'-mfb={word_size}')
+    if settings.solid_block is not None and has_solid_blocks(archive_type, method):
+        switches.append('-ms=off' if settings.solid_block == SOLID_OFF else f'-ms={size_switch(settings.solid_block)}')
+    return switches
@@ -2,145 +2,23 @@ import os
 import subprocess
 import sys
 
-from PySide6.QtWidgets import QFileDialog, QMessageBox, QWidget, QProgressDialog, QPushButton, QVBoxLayout, QHBoxLayout, \
-    QLabel, QProgressBar, QDialog, QInputDialog, QLineEdit
-from PySide6.QtCore import QThread, Signal, Qt
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, \
+    QLabel, QDialog, QInputDialog, QLineEdit, QApplication
+from PySide6.QtCore import Qt, QEventLoop
 from PySide6 import QtGui
 
-import SevenZUtils
-import pty
-import signal
-import time
-import tempfile
-import SevenZHelperMacOS
-
-
-class ExtractionThread(QThread):
-    progress_updated = Signal(int, str)
-    extraction_finished = Signal()
-    extraction_break = Signal()
-    extraction_failed = Signal(str)
-    file_conflict_made = Signal(str)
-    password_required = Signal()
-
-    def __init__(self, s7zip_bin, file_path, destination, selected_items, command_option):
-        super().__init__()
-        self.s7zip_bin = s7zip_bin
-        self.file_path = file_path
-        self.destination = destination
-        self.master_fd = None
-        self.paused = False
-        self.stop_requested = False
-        self.process = None
-        self.file_conflict_option = None
-        self.extraction_password = None
-        self.command_option = command_option
-        self.selected_items = selected_items
-
-    def run(self):
-        command = [self.s7zip_bin, self.command_option, self.file_path, *self.selected_items, '-o' + self.destination,
-                   '-bsp1']
-
-        print(command)
-
-        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE,
-                                        text=True)
+import listing_cache
+import sevenz_engine
+from clipboard_owner import ClipboardOwner
+from job_scheduler import Job, JobScheduler, PRIORITY_HIGH, PRIORITY_NORMAL, FINISHED
+from preview_cache import PreviewCache
+from scratch_space import ScratchSpace
+from sevenz_engine import ExtractionThread
+from batch_extractor import BatchExtraction, BatchExtractDialog, BatchProgressDialog, EACH_TO_OWN_FOLDER
 
-        lines_to_parse = []
-        hold_on_progress = False
-
-        while True:
-            line = ""
-            while True:
-                char = self.process.stdout.read(1)  # Read one character
-                if not char:  # End of stream
-                    break
-                if char == '\x08':
-                    hold_on_progress = True
-                    continue
-
-                line += char
-                if char == '\n':
-                    hold_on_progress = False
-                    break
-
-                if char == ' ' and hold_on_progress:
-                    hold_on_progress = False
-                    break
-
-                if char == ':':
-                    if "Enter password:" in line:
-                        break
-
-            print(line)
-
-            if not line:
-                break
-            if "Would you like to replace" in line:
-                lines_to_parse.append(line)
-
-                # Buffer to accumulate characters until the prompt is found
-                buffer = ""
-
-                # Prompt string to look for
-                prompt = "? (Y)es / (N)o / (A)lways / (S)kip all / A(u)to rename all / (Q)uit?"
-
-                while prompt not in buffer:
-                    char = self.process.stdout.read(1)  # Read one character
-                    if not char:  # End of stream
-                        break
-                    buffer += char
-                # Split buffer by newlines to get individual lines
-
-                # decision = self.handle_file_conflict(existing_file_info, archive_file_info)
-                self.file_conflict_made.emit(buffer)
-
-                while self.file_conflict_option is None:
-                    time.sleep(0.1)
-
-                self.process.stdin.write(self.file_conflict_option + '\n')
-                self.process.stdin.flush()
-                lines_to_parse = []
-                self.file_conflict_option = None
-
-            elif "%" in line:
-                percentage = int(line.split("%")[0].strip().split()[-1])
-                self.progress_updated.emit(percentage, f"Extracting... {line}")
-
-            elif "Enter password:" in line:
-                self.password_required.emit()
-
-                while self.extraction_password is None:  # Reusing the variable for simplicity
-                    time.sleep(0.1)
-
-                self.process.stdin.write(self.extraction_password + '\n')
-                self.process.stdin.flush()
-                self.file_conflict_option = None
-
-        # After extraction process ends
-        error_message = self.process.stderr.read()
-        # print("return code is ", error_message
-        if not error_message:
-            self.extraction_finished.emit()
-        elif "Break signaled" in error_message:
-            self.extraction_break.emit()
-        else:
-            self.extraction_failed.emit(error_message)
-
-    def pause_extraction(self):
-        if self.process:
-            self.process.send_signal(signal.SIGSTOP)
-            self.paused = True
-
-    def resume_extraction(self):
-        if self.process and self.paused:
-            self.process.send_signal(signal.SIGCONT)
-            self.paused = False
-
-    def stop_extraction(self):
-        if self.process:
-            self.process.send_signal(signal.SIGTERM)
-            self.stop_requested = True
+# Copies at least this large go on the clipboard at once while 7zz extracts them, a paste waits for the rest
+DEFERRED_COPY_ITEMS = 50
+DEFERRED_COPY_SIZE = 64 * 1024 * 1024
 
 
 class FileConflictDialog(QDialog):
@@ -195,47 +73,6 @@ class FileConflictDialog(QDialog):
         self.done(5)
 
 
-class ExtractorProgressDialog(QProgressDialog):
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAutoClose(False)
-        self.setAutoReset(False)
-        self.setWindowTitle("Extraction Progress")
-        self.setRange(0, 100)
-        self.setCancelButton(None)
-
-        # Create the layout for the buttons
-        btn_layout = QHBoxLayout()
-
-        # Add Pause/Resume and Stop buttons
-        self.pause_resume_button = QPushButton("Pause")
-        self.stop_button = QPushButton("Stop")
-        btn_layout.addWidget(self.pause_resume_button)
-        btn_layout.addWidget(self.stop_button)
-
-        # Create our own label and progress bar
-        self._label = QLabel("Extracting files...")
-        self._bar = QProgressBar()
-        self._bar.setRange(0, 100)
-
-        # Add the button layout to the main layout
-        layout = QVBoxLayout()
-        layout.addWidget(self._label)
-        layout.addWidget(self._bar)
-        layout.addLayout(btn_layout)
-
-        # Apply the custom layout to the QDialog
-        self.setLayout(layout)
-
-    # Expose methods to control the label and bar values
-    def setLabelText(self, text):
-        self._label.setText(text)
-
-    def setValue(self, value):
-        self._bar.setValue(value)
-
-
 class CustomFileDialog(QDialog):
     def __init__(self, initial_directory=None, parent=None):
         super().__init__(parent)
@@ -298,52 +135,54 @@ class CustomFileDialog(QDialog):
 
 class Extractor:
     def __init__(self, parent: QWidget):
-        self.selected_items = None
-        self.temp_dir = None
-        self.double_click_file = None
-        self.extraction_thread = None
-        self.double_click_file_temp_dir = None
         self.parent = parent
-        self.s7zip_bin = SevenZUtils.determine_7zip_binary()
-        self.is_from_double_click = False
-        self.extract_mode = None
+        self.s7zip_bin = sevenz_engine.determine_7zip_binary()
+        self.scheduler = JobScheduler()
+        self.preview_cache = PreviewCache()
+        self.scratch_space = ScratchSpace()  # Sessions left behind by a crash are cleaned up here
+        self.batch_dialogs = []
 
     def is_supported_archive(self, file_path):
-        supported_extensions = SevenZUtils.get_supported_extensions()
+        supported_extensions = sevenz_engine.get_supported_extensions()
         _, extension = os.path.splitext(file_path)
         return extension.lower() in supported_extensions
 
-    def extract_file(self, destination: str, file_path: str, selected_items: list, command: str):
+    def extract_file(self, destination: str, file_path: str, selected_items: list, command: str,
+                     priority=PRIORITY_NORMAL, on_finished=None, switches=(), report_errors=True):
+        """Queue an extraction job, `on_finished` is called once it completed successfully.
+
+        Without report_errors a failure only shows in the job state, for callers that collect failures themselves.
+        """
         if not self.is_supported_archive(file_path):
-            QMessageBox.critical(self.parent, "Error", "Unsupported or corrupted file for extraction.")
-            return
+            if report_errors:
+                QMessageBox.critical(self.parent, "Error", "Unsupported or corrupted file for extraction.")
+            return None
 
         if not destination:
-            return
-
-        self.extraction_thread = ExtractionThread(self.s7zip_bin, file_path, destination, selected_items, command)
-        self.extraction_thread.progress_updated.connect(self.update_progress)
-        self.extraction_thread.extraction_finished.connect(self.finish_extraction)
-        self.extraction_thread.extraction_break.connect(self.break_extraction)
-        self.extraction_thread.extraction_failed.connect(self.show_error)
-
-        self.extraction_thread.file_conflict_made.connect(self.handel_file_conflict)
-
-        self.progress_dialog = ExtractorProgressDialog(self.parent)
-
-        self.progress_dialog.pause_resume_button.clicked.connect(self.toggle_pause_resume)
-        self.progress_dialog.stop_button.clicked.connect(self.extraction_thread.stop_extraction)
-
-        self.extraction_thread.password_required.connect(self.prompt_password)
-
-        self.extraction_thread.start()
-
-    def update_progress(self, percentage, message):
-        self.progress_dialog.setValue(percentage)
-        self.progress_dialog.setLabelText(message)
+            return None
+
+        extraction_thread = ExtractionThread(self.s7zip_bin, file_path, destination, selected_items, command,
+                                             switches)
+        if report_errors:
+            extraction_thread.extraction_failed.connect(self.show_error)
+        extraction_thread.file_conflict_made.connect(
+            lambda buffer: self.handel_file_conflict(extraction_thread, buffer))
+        extraction_thread.password_required.connect(lambda: self.prompt_password(extraction_thread))
+        if on_finished is not None:
+            extraction_thread.extraction_finished.connect(on_finished)
+
+        job = Job(f"Extract {os.path.basename(file_path)}", extraction_thread,
+                  finished_signal=extraction_thread.extraction_finished,
+                  failed_signal=extraction_thread.extraction_failed,
+                  break_signal=extraction_thread.extraction_break,
+                  progress_signal=extraction_thread.progress_updated,
+                  pause=extraction_thread.pause_extraction,
+                  resume=extraction_thread.resume_extraction,
+                  cancel=extraction_thread.stop_extraction,
+                  priority=priority)
+        return self.scheduler.submit(job)
 
     def extract_from_navigation_pane(self, file_path: str):
-        self.extract_mode = 'NaviPane'
         # Get the parent directory of file_path
         parent_directory = os.path.dirname(file_path)
         # Pass the parent directory to CustomFileDialog
@@ -354,8 +193,7 @@ class Extractor:
                 return
             self.extract_file(destination, file_path, [], 'x')
 
-    def extract_from_main_pane(self, file_path: str, selected_items: list):
-        self.extract_mode = 'MainPane'
+    def extract_from_main_pane(self, file_path: str, selected_items: list, switches=()):
         # Get the parent directory of file_path
         parent_directory = os.path.dirname(file_path)
         # Pass the parent directory to CustomFileDialog
@@ -365,84 +203,100 @@ class Extractor:
             destination = dialog.path_input.text()
             if not destination:
                 return
-            self.extract_file(destination, file_path, selected_items, 'x')
+            self.extract_file(destination, file_path, selected_items, 'x', switches=switches)
 
-    def finish_extraction(self):
-        self.progress_dialog.close()
-        if self.extract_mode == 'DoubleClick':
-            self.open_double_click_file()
+    def extract_batch_from_navigation_pane(self, file_paths: list, mode=EACH_TO_OWN_FOLDER):
+        archive_paths = sorted(path for path in file_paths if os.path.isfile(path) and self.is_supported_archive(path))
+        if not archive_paths:
+            QMessageBox.warning(self.parent, "Warning", "Please select the archives to extract.")
+            return
 
-        if self.extract_mode == 'CopyToClipboard':
-            self.copy_to_clipboard()
+        dialog = BatchExtractDialog(archive_paths, mode, self.parent)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
 
-        else:
-            msg_box = QMessageBox(self.parent)
-            msg_box.setWindowTitle("Extraction Complete")
-            msg_box.setText("Extraction Complete")
-            msg_box.setIcon(QMessageBox.Icon.NoIcon)
-            msg_box.exec()
-
-        self.extract_mode = None
-
-    def break_extraction(self):
-        self.progress_dialog.close()
-        msg_box = QMessageBox(self.parent)
-        msg_box.setWindowTitle("Extraction Abort")
-        msg_box.setText("Extraction Abort")
-        msg_box.setIcon(QMessageBox.Icon.NoIcon)
-        msg_box.exec()
-
-    def toggle_pause_resume(self):
-        if self.extraction_thread.paused:
-            self.extraction_thread.resume_extraction()
-            self.progress_dialog.pause_resume_button.setText("Pause")
-        else:
-            self.extraction_thread.pause_extraction()
-            self.progress_dialog.pause_resume_button.setText("Continue")
+        batch = BatchExtraction(self, dialog.get_items(), dialog.mode, dialog.destination)
+        progress_dialog = BatchProgressDialog(batch, self.parent)
+        # Keep the dialogs of running batches alive, drop the ones that are done and closed
+        self.batch_dialogs = [d for d in self.batch_dialogs if d.isVisible() or not d.batch.is_finished]
+        self.batch_dialogs.append(progress_dialog)
+        progress_dialog.show()
+        batch.start()
 
     def show_error(self, message):
-        self.progress_dialog.close()
         QMessageBox.critical(self.parent, "Extraction Error", message)
 
-    def handel_file_conflict(self, buffer):
+    def handel_file_conflict(self, extraction_thread, buffer):
         conflict_dialog = FileConflictDialog(buffer)
         result = conflict_dialog.exec()
         decisions = ['Y', 'N', 'A', 'S', 'U', 'Q']
-        self.extraction_thread.file_conflict_option = decisions[result]
+        extraction_thread.prompts.answer(decisions[result])
 
-    def prompt_password(self):
-        self.progress_dialog.setVisible(False)
+    def prompt_password(self, extraction_thread):
         password, ok = QInputDialog.getText(
             self.parent,
             "Password Required",
-            "Enter password for the archive:",
+            f"Enter password for {os.path.basename(extraction_thread.file_path)}:",
             echo=QLineEdit.EchoMode.Password
         )
         if ok and password:
-            self.extraction_thread.extraction_password = password
+            extraction_thread.prompts.answer(password)
         else:
-            self.extraction_thread.extraction_password = ''
-        self.progress_dialog.setVisible(True)
-
-    def extract_and_open_double_click_file(self, archive_path, file_path):
-        temp_dir = tempfile.mkdtemp()
-        self.extract_mode = "DoubleClick"
-        self.double_click_file_temp_dir = temp_dir
-        self.double_click_file = file_path
-        self.extract_file(temp_dir, archive_path, [file_path], 'e')
-
-    def open_double_click_file(self):
-        if self.double_click_file_temp_dir is None or self.double_click_file is None:
+            extraction_thread.prompts.answer('')
+
+    def extract_and_open_double_click_file(self, archive_path, file_path, switches=(), crc=None):
+        # Opened entries stay in the preview cache, opening one again runs no 7zz at all
+        identity = listing_cache.get_identity(archive_path)
+        if identity is None:
+            return
+        cached_path = self.preview_cache.lookup(identity, file_path, crc)
+        if cached_path is not None:
+            self.open_double_click_file(cached_path)
             return
 
-        is_archive = self.is_supported_archive(self.double_click_file)
-        extracted_file_path = os.path.join(self.double_click_file_temp_dir, os.path.basename(self.double_click_file))
+        partial_folder = self.preview_cache.reserve()
+        # The user is waiting for this one, it goes ahead of queued background jobs
+        job = self.extract_file(
+            partial_folder, archive_path, [file_path], 'e', PRIORITY_HIGH,
+            lambda: self.open_double_click_file(self.preview_cache.commit(identity, file_path, crc, partial_folder)),
+            switches)
+        self.discard_unless_finished(job, partial_folder)
+
+    def stream_nested_archive(self, archive_path, entry_path, on_ready, switches=(), crc=None, size=None):
+        """Stream an archive inside an archive into the preview cache, `on_ready` gets the path of its copy."""
+        identity = listing_cache.get_identity(archive_path)
+        if identity is None:
+            return
+        cached_path = self.preview_cache.lookup(identity, entry_path, crc)
+        if cached_path is not None:
+            on_ready(cached_path)
+            return
 
-        if is_archive:
-            self.parent.close_and_clear()
-            self.parent.display_archive_contents(extracted_file_path)
+        partial_folder = self.preview_cache.reserve()
+        stream_worker = sevenz_engine.StreamEntryWorker(
+            self.s7zip_bin, archive_path, entry_path, os.path.join(partial_folder, os.path.basename(entry_path)),
+            switches, size)
+        stream_worker.stream_failed.connect(self.show_error)
+        stream_worker.stream_finished.connect(
+            lambda: on_ready(self.preview_cache.commit(identity, entry_path, crc, partial_folder)))
+
+        job = Job(f"Open {os.path.basename(entry_path)}", stream_worker,
+                  finished_signal=stream_worker.stream_finished,
+                  failed_signal=stream_worker.stream_failed,
+                  break_signal=stream_worker.stream_break,
+                  progress_signal=stream_worker.progress_updated,
+                  cancel=stream_worker.cancel,
+                  priority=PRIORITY_HIGH)
+        self.discard_unless_finished(self.scheduler.submit(job), partial_folder)
+
+    def discard_unless_finished(self, job, partial_folder):
+        if job is None:
+            self.preview_cache.discard(partial_folder)
             return
+        job.changed.connect(
+            lambda: job.is_done and job.state != FINISHED and self.preview_cache.discard(partial_folder))
 
+    def open_double_click_file(self, extracted_file_path):
         # Open the file (this will open the file with the default application associated with its file type)
         if os.path.exists(extracted_file_path):
             if sys.platform == "win32":
@@ -455,23 +309,75 @@ class Extractor:
         else:
             return
 
-    def extract_and_copy_files_to_clipboard(self, archive_path: str, selected_items: list):
-        temp_dir = tempfile.mkdtemp()
-        self.extract_mode = "CopyToClipboard"
-        self.temp_dir = temp_dir
-        self.selected_items = selected_items
-        self.extract_file(temp_dir, archive_path, selected_items, 'x')
+    def extract_and_copy_files_to_clipboard(self, archive_path: str, archive_index, nodes: list, switches=()):
+        # Files opened or prefetched before are copied straight from the preview cache
+        identity = listing_cache.get_identity(archive_path)
+        cached_paths = []
+        missing_items = []
+        missing_size = 0
+        for node in nodes:
+            entry_path = archive_index.path(node)
+            if archive_index.is_dir(node):
+                missing_items.append(entry_path)
+                missing_size += archive_index.subtree_totals(node)[1]
+                continue
+            cached_path = None
+            if identity is not None:
+                cached_path = self.preview_cache.lookup(identity, entry_path, archive_index.crc(node))
+            if cached_path is not None:
+                cached_paths.append(cached_path)
+            else:
+                missing_items.append(entry_path)
+                missing_size += archive_index.size(node) or 0
 
-    def copy_to_clipboard(self):
-        if self.temp_dir is None or self.selected_items is None:
+        clipboard = ClipboardOwner()
+        if not missing_items:
+            clipboard.put(cached_paths, pinned_paths=cached_paths)
             return
 
-        file_path_items = []
+        temp_dir = self.scratch_space.allocate(missing_size)
+        file_paths = cached_paths + [os.path.join(temp_dir, item) for item in missing_items]
+        deferred = len(missing_items) >= DEFERRED_COPY_ITEMS or missing_size >= DEFERRED_COPY_SIZE
+
+        # Pinned while 7zz writes into it, a second copy making room must not take it away
+        self.scratch_space.pin(temp_dir)
+        on_finished = None if deferred else lambda: clipboard.put(file_paths, temp_dir, cached_paths)
+        job = self.extract_file(temp_dir, archive_path, missing_items, 'x', PRIORITY_HIGH, on_finished, switches)
+        self.unpin_when_done(job, temp_dir)
+        if job is not None and deferred:
+            clipboard.put(file_paths, temp_dir, cached_paths, lambda: self.wait_for_job(job))
+
+    def unpin_when_done(self, job, temp_dir):
+        """Drop the job's pin of a scratch folder once it is done, the folder is released unless the job finished."""
+        if job is None:
+            self.scratch_space.unpin(temp_dir)
+            self.scratch_space.release(temp_dir)
+            return
 
-        for item in self.selected_items:
-            extracted_file_path = os.path.join(self.temp_dir, item)
-            file_path_items.append(extracted_file_path)
+        def on_changed():
+            if not job.is_done:
+                return
+            job.changed.disconnect(on_changed)
+            self.scratch_space.unpin(temp_dir)
+            if job.state != FINISHED:
+                self.scratch_space.release(temp_dir)
 
-        print(file_path_items)
+        job.changed.connect(on_changed)
 
-        SevenZHelperMacOS.copy_files_to_clipboard(file_path_items)
+    def wait_for_job(self, job):
+        """Keep the event loop running until a job is done, for files a paste needs before it may return."""
+        if job.is_done:
+            return
+        loop = QEventLoop()
+
+        def on_changed():
+            if job.is_done:
+                loop.quit()
+
+        job.changed.connect(on_changed)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            loop.exec()
+        finally:
+            QApplication.restoreOverrideCursor()
+            job.changed.disconnect(on_changed)
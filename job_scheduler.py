@@ -0,0 +1,219 @@
+import itertools
+import os
+
+from PySide6.QtCore import QObject, Signal
+
+import system_resources
+from qsetting_manager import SettingsManager
+
+PRIORITY_LOW = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NAMES = {PRIORITY_HIGH: "High", PRIORITY_NORMAL: "Normal", PRIORITY_LOW: "Low"}
+
+QUEUED = 'Queued'
+RUNNING = 'Running'
+PAUSED = 'Paused'
+FINISHED = 'Finished'
+FAILED = 'Failed'
+CANCELLED = 'Cancelled'
+DONE_STATES = (FINISHED, FAILED, CANCELLED)
+
+MEMORY_PER_JOB = system_resources.GIB  # Rough peak of one 7zz run with default dictionary sizes
+
+
+def default_max_concurrent():
+    """Half the CPUs, since 7zz is multithreaded itself, but no more jobs than GiBs of free memory."""
+    limit = max(1, system_resources.cpu_count() // 2)
+    memory = system_resources.available_memory()
+    if memory is not None:
+        limit = min(limit, max(1, memory // MEMORY_PER_JOB))
+    return limit
+
+
+class Job(QObject):
+    """One 7zz operation run by a worker thread under the control of the JobScheduler.
+
+    The thread's outcome signals set the final state. `pause`, `resume` and `cancel` are
+    callables of the thread, a job without them cannot be paused or cancelled once it runs.
+    `target` is the archive the job writes, jobs with the same target never run at the same time.
+    A `background` job does work nobody asked for (prefetching): it is not listed, is dropped once done
+    and gives way to any other job that waits for a slot.
+    """
+    changed = Signal()
+
+    def __init__(self, title, thread, finished_signal, failed_signal=None, break_signal=None, progress_signal=None,
+                 pause=None, resume=None, cancel=None, priority=PRIORITY_NORMAL, target=None, background=False):
+        super().__init__()
+        self.job_id = None
+        self.title = title
+        self.thread = thread
+        self.priority = priority
+        self.background = background
+        self.target = os.path.realpath(target) if target else None
+        self.state = QUEUED
+        self.progress = 0
+        self.message = ''
+        self.pause_callback = pause
+        self.resume_callback = resume
+        self.cancel_callback = cancel
+        self.cancel_requested = False
+
+        finished_signal.connect(lambda: self.set_outcome(FINISHED))
+        if failed_signal is not None:
+            failed_signal.connect(lambda message: self.set_outcome(FAILED, message))
+        if break_signal is not None:
+            break_signal.connect(lambda: self.set_outcome(CANCELLED))
+        if progress_signal is not None:
+            progress_signal.connect(self.set_progress)
+
+    @property
+    def is_done(self):
+        return self.state in DONE_STATES
+
+    @property
+    def can_pause(self):
+        return self.state == QUEUED or (self.state == RUNNING and self.pause_callback is not None)
+
+    @property
+    def can_cancel(self):
+        return self.state in (QUEUED, PAUSED) or (self.state == RUNNING and self.cancel_callback is not None)
+
+    def set_state(self, state, message=None):
+        self.state = state
+        if message is not None:
+            self.message = message
+        self.changed.emit()
+
+    def set_progress(self, percent, message):
+        self.progress = percent
+        self.message = message
+        self.changed.emit()
+
+    def set_outcome(self, state, message=''):
+        if self.is_done:
+            return
+        if state == FINISHED:
+            self.progress = 100
+        # A thread that ends with an error after being cancelled was cancelled
+        if state == FAILED and self.cancel_requested:
+            state = CANCELLED
+        self.set_state(state, message.splitlines()[0] if message else '')
+
+
+class JobScheduler(QObject):
+    """Queue of jobs, started by priority and then in submission order while a slot is free.
+
+    Paused jobs keep their slot, a stopped 7zz still holds its memory.
+    There is one scheduler per application, shared like the SettingsManager.
+    """
+    job_added = Signal(object)
+    job_changed = Signal(object)
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(JobScheduler, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def __init__(self):
+        pass
+
+    def initialize(self):
+        super().__init__()
+        self.settings_manager = SettingsManager()
+        self.jobs = []
+        self.job_ids = itertools.count(1)
+
+    @property
+    def max_concurrent(self):
+        # 0 means the limit is derived from the machine
+        limit = int(self.settings_manager.get_value("max_concurrent_jobs", 0))
+        return limit if limit > 0 else default_max_concurrent()
+
+    def set_max_concurrent(self, limit):
+        self.settings_manager.set_value("max_concurrent_jobs", int(limit))
+        self.schedule()
+
+    def submit(self, job):
+        job.job_id = next(self.job_ids)
+        job.thread.finished.connect(lambda: self.on_thread_finished(job))
+        job.changed.connect(lambda: self.job_changed.emit(job))
+        self.jobs.append(job)
+        if not job.background:
+            self.job_added.emit(job)
+        self.schedule()
+        return job
+
+    def active_jobs(self):
+        return [job for job in self.jobs if job.state == RUNNING or (job.state == PAUSED and job.thread.isRunning())]
+
+    def schedule(self):
+        self.jobs = [job for job in self.jobs if not (job.background and job.is_done)]
+        active = self.active_jobs()
+        busy_targets = {job.target for job in active if job.target}
+        free_slots = self.max_concurrent - len(active)
+        queued = sorted((job for job in self.jobs if job.state == QUEUED), key=lambda job: (-job.priority, job.job_id))
+        for job in queued:
+            if free_slots <= 0:
+                break
+            if job.target and job.target in busy_targets:
+                continue
+            if job.target:
+                busy_targets.add(job.target)
+            free_slots -= 1
+            job.set_state(RUNNING, 'Starting...')
+            job.thread.start()
+
+        if any(job.state == QUEUED and not job.background for job in queued):
+            # Background work gives way to anything that waits for a slot
+            for job in active:
+                if job.background:
+                    self.cancel(job)
+
+    def on_thread_finished(self, job):
+        # A thread that ended without reporting an outcome is treated as finished
+        if not job.is_done:
+            job.set_outcome(CANCELLED if job.cancel_requested else FINISHED)
+        self.schedule()
+
+    def pause(self, job):
+        if job.state == QUEUED:
+            job.set_state(PAUSED, 'Held in queue')
+        elif job.state == RUNNING and job.pause_callback is not None:
+            job.pause_callback()
+            job.set_state(PAUSED)
+
+    def resume(self, job):
+        if job.state != PAUSED:
+            return
+        if job.thread.isRunning():
+            job.resume_callback()
+            job.set_state(RUNNING)
+        else:
+            job.set_state(QUEUED, '')
+            self.schedule()
+
+    def cancel(self, job):
+        if not job.can_cancel:
+            return
+        job.cancel_requested = True
+        if not job.thread.isRunning():
+            job.set_outcome(CANCELLED)
+            return
+        if job.state == PAUSED and job.resume_callback is not None:
+            # A stopped process cannot act on the termination request
+            job.resume_callback()
+        job.cancel_callback()
+
+    def set_priority(self, job, priority):
+        job.priority = priority
+        job.changed.emit()
+        self.schedule()
+
+    def clear_done(self):
+        self.jobs = [job for job in self.jobs if not job.is_done]
+
+    def has_unfinished_jobs(self):
+        return any(not job.is_done and not job.background for job in self.jobs)
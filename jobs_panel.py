@@ -0,0 +1,133 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton, QComboBox, \
+    QScrollArea, QFrame
+
+from job_scheduler import JobScheduler, PRIORITY_NAMES, PAUSED, QUEUED
+
+
+class JobRow(QFrame):
+    def __init__(self, job, scheduler, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.scheduler = scheduler
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+
+        self.title_label = QLabel(job.title)
+        self.state_label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+
+        self.priority_combo = QComboBox()
+        for priority, name in PRIORITY_NAMES.items():
+            self.priority_combo.addItem(name, priority)
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(job.priority))
+        self.priority_combo.currentIndexChanged.connect(self.change_priority)
+
+        self.pause_resume_button = QPushButton("Pause")
+        self.pause_resume_button.clicked.connect(self.toggle_pause_resume)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(lambda: self.scheduler.cancel(self.job))
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(self.title_label, 1)
+        top_layout.addWidget(self.state_label)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.progress_bar, 1)
+        bottom_layout.addWidget(self.priority_combo)
+        bottom_layout.addWidget(self.pause_resume_button)
+        bottom_layout.addWidget(self.cancel_button)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addLayout(top_layout)
+        layout.addLayout(bottom_layout)
+        self.setLayout(layout)
+
+        self.update_row()
+
+    def update_row(self):
+        job = self.job
+        self.progress_bar.setValue(job.progress)
+        self.state_label.setText(f"{job.state}: {job.message}" if job.message else job.state)
+        self.state_label.setToolTip(job.message)
+        self.pause_resume_button.setText("Resume" if job.state == PAUSED else "Pause")
+        self.pause_resume_button.setEnabled(job.state == PAUSED or job.can_pause)
+        self.cancel_button.setEnabled(job.can_cancel)
+        self.priority_combo.setEnabled(job.state in (QUEUED, PAUSED) and not job.thread.isRunning())
+
+    def toggle_pause_resume(self):
+        if self.job.state == PAUSED:
+            self.scheduler.resume(self.job)
+        else:
+            self.scheduler.pause(self.job)
+
+    def change_priority(self):
+        self.scheduler.set_priority(self.job, self.priority_combo.currentData())
+
+
+class JobsPanel(QWidget):
+    """Every queued, running and finished job with its progress, pause, cancel and priority controls."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = JobScheduler()
+        self.rows = {}
+
+        self.summary_label = QLabel()
+        self.clear_button = QPushButton("Clear Finished")
+        self.clear_button.clicked.connect(self.clear_finished)
+
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.summary_label, 1)
+        header_layout.addWidget(self.clear_button)
+
+        self.rows_layout = QVBoxLayout()
+        self.rows_layout.addStretch(1)
+        rows_widget = QWidget()
+        rows_widget.setLayout(self.rows_layout)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(rows_widget)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(header_layout)
+        layout.addWidget(scroll_area)
+        self.setLayout(layout)
+
+        for job in self.scheduler.jobs:
+            if not job.background:
+                self.add_job(job)
+        self.scheduler.job_added.connect(self.add_job)
+        self.scheduler.job_changed.connect(self.update_job)
+        self.update_summary()
+
+    def add_job(self, job):
+        if job in self.rows:
+            return
+        row = JobRow(job, self.scheduler)
+        self.rows[job] = row
+        # Keep the stretch at the end
+        self.rows_layout.insertWidget(self.rows_layout.count() - 1, row)
+        self.update_summary()
+
+    def update_job(self, job):
+        row = self.rows.get(job)
+        if row is not None:
+            row.update_row()
+        self.update_summary()
+
+    def update_summary(self):
+        jobs = self.scheduler.jobs
+        running = sum(1 for job in self.scheduler.active_jobs() if not job.background)
+        waiting = sum(1 for job in jobs if job.state == QUEUED and not job.background)
+        self.summary_label.setText(
+            f"{running} running, {waiting} queued, at most {self.scheduler.max_concurrent} at a time")
+
+    def clear_finished(self):
+        self.scheduler.clear_done()
+        for job in [job for job in self.rows if job.is_done]:
+            row = self.rows.pop(job)
+            self.rows_layout.removeWidget(row)
+            row.deleteLater()
+        self.update_summary()
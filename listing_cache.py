@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+APP_NAME = "7zGUI"
+DEFAULT_MAX_SIZE_MB = 512
+
+# What an archive looked like on disk when its listing was cached
+ArchiveIdentity = namedtuple('ArchiveIdentity', ['path', 'size', 'mtime_ns', 'inode'])
+
+
+def get_cache_dir():
+    if sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    elif sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, APP_NAME)
+
+
+def get_identity(archive_path):
+    """Return the ArchiveIdentity of a file, or None if it cannot be stat'ed."""
+    path = os.path.realpath(archive_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return ArchiveIdentity(path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+class ListingCache:
+    """Serialized ArchiveIndex blobs in a sqlite database, evicted least recently used first.
+
+    An entry is only returned while the archive still has the same size, mtime and inode,
+    any other row for the same path is stale and dropped on lookup.
+    Every call opens its own connection so the cache can be used from worker threads.
+    """
+
+    def __init__(self, max_size_mb=DEFAULT_MAX_SIZE_MB, db_path=None):
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        self.db_path = db_path or os.path.join(get_cache_dir(), 'listings.sqlite3')
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, variant TEXT, "
+            "data BLOB, data_size INTEGER, last_used REAL)")
+        # Chosen by the user per archive, kept when the archive changes or its listing is evicted
+        connection.execute("CREATE TABLE IF NOT EXISTS code_pages (path TEXT PRIMARY KEY, code_page INTEGER)")
+        return connection
+
+    def load(self, identity, variant=''):
+        """Return the cached bytes for `identity`, or None.
+
+        `variant` names the listing options (e.g. the forced encoding), a different variant is a miss.
+        """
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error):
+            return None
+        try:
+            with connection:
+                row = connection.execute(
+                    "SELECT size, mtime_ns, inode, variant, data FROM listings WHERE path = ?",
+                    (identity.path,)).fetchone()
+                if row is None:
+                    return None
+                if tuple(row[:4]) != (identity.size, identity.mtime_ns, identity.inode, variant):
+                    # The archive changed since it was cached
+                    connection.execute("DELETE FROM listings WHERE path = ?", (identity.path,))
+                    return None
+                connection.execute("UPDATE listings SET last_used = ? WHERE path = ?",
+                                   (time.time(), identity.path))
+                return row[4]
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+
+    def store(self, identity, data, variant=''):
+        if len(data) > self.max_size:
+            return
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error):
+            return
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (identity.path, identity.size, identity.mtime_ns, identity.inode, variant,
+                     sqlite3.Binary(data), len(data), time.time()))
+                self.evict(connection)
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+    def evict(self, connection):
+        total = connection.execute("SELECT COALESCE(SUM(data_size), 0) FROM listings").fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = connection.execute("SELECT path, data_size FROM listings ORDER BY last_used").fetchall()
+        for path, data_size in rows:
+            if total <= self.max_size:
+                break
+            connection.execute("DELETE FROM listings WHERE path = ?", (path,))
+            total -= data_size
+
+    def load_code_page(self, archive_path):
+        """Return the code page remembered for the names of an archive, or None."""
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error):
+            return None
+        try:
+            row = connection.execute("SELECT code_page FROM code_pages WHERE path = ?",
+                                     (os.path.realpath(archive_path),)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+
+    def store_code_page(self, archive_path, code_page):
+        """Remember the code page of an archive, None goes back to letting 7zz decide."""
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error):
+            return
+        try:
+            with connection:
+                if code_page:
+                    connection.execute("INSERT OR REPLACE INTO code_pages VALUES (?, ?)",
+                                       (os.path.realpath(archive_path), code_page))
+                else:
+                    connection.execute("DELETE FROM code_pages WHERE path = ?", (os.path.realpath(archive_path),))
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+    def invalidate(self, archive_path):
+        """Forget the listing of an archive, e.g. after it was modified by this application."""
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error):
+            return
+        try:
+            with connection:
+                connection.execute("DELETE FROM listings WHERE path = ?", (os.path.realpath(archive_path),))
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+    def purge(self):
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM listings")
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
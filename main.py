@@ -1,12 +1,19 @@
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QSplitter, QWidget, QLineEdit, QMessageBox
-from PySide6.QtCore import Qt, QDir, QEvent, QSettings
+from startup_profile import profile
+
+with profile.step("import Qt"):
+    from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QSplitter, QWidget, QLineEdit, \
+        QMessageBox, QDockWidget
+    from PySide6.QtCore import Qt, QDir, QEvent, QSettings, QObject
+
+with profile.step("import application modules"):
+    from menu_bar import MenuBar
+    from tool_bar import ToolBar
+    from navigation_pane import NavigationContainer
+    from main_pane import MainPane
+    from jobs_panel import JobsPanel
+    from job_scheduler import JobScheduler
 
-from menu_bar import MenuBar
-from tool_bar import ToolBar
-from navigation_pane import NavigationContainer
-from main_pane import MainPane
-from SevenZHelperMacOS import get_app_version
 
 class CustomApplication(QApplication):
     def __init__(self, argv):
@@ -29,14 +36,18 @@ class SevenZipGUI(QMainWindow):
         self.setGeometry(100, 100, 800, 600)
 
         # Set up Menu Bar and Toolbar
-        self.menuBarInstance = MenuBar(self)
-        self.setMenuBar(self.menuBarInstance)
+        with profile.step("menu bar"):
+            self.menuBarInstance = MenuBar(self)
+            self.setMenuBar(self.menuBarInstance)
 
-        self.addToolBar(ToolBar())
+        with profile.step("tool bar"):
+            self.addToolBar(ToolBar())
 
         # Set up Navigation Pane (Left) and Main Pane (Right)
-        self.nav_pane = NavigationContainer(self)
-        self.main_pane = MainPane()
+        with profile.step("navigation pane"):
+            self.nav_pane = NavigationContainer(self)
+        with profile.step("main pane"):
+            self.main_pane = MainPane()
         self.nav_pane.nav_pane.set_main_pane(self.main_pane)
 
         # Create a horizontal splitter for adjustable width
@@ -53,10 +64,56 @@ class SevenZipGUI(QMainWindow):
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
-        self.show()
+
+        # Non-modal list of extraction and archiving jobs, built and shown when the first one is submitted
+        self.jobs_dock = QDockWidget("Jobs", self)
+        self.jobs_dock.setObjectName("jobs_dock")
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+        JobScheduler().job_added.connect(lambda job: self.show_jobs())
+
+        with profile.step("show window"):
+            self.show()
+
+    def show_jobs(self):
+        if self.jobs_dock.widget() is None:
+            self.jobs_dock.setWidget(JobsPanel())
+        self.jobs_dock.show()
+
+    def closeEvent(self, event):
+        if JobScheduler().has_unfinished_jobs():
+            reply = QMessageBox.question(self, 'Quit', 'Some jobs have not finished yet. Quit anyway?',
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                         QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        super().closeEvent(event)
+
+
+class FirstPaintReporter(QObject):
+    """Prints the startup profile once the window has been painted, then quits."""
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and watched is self.window:
+            self.window.removeEventFilter(self)
+            profile.report()
+            QApplication.instance().quit()
+        return False
+
 
 if __name__ == '__main__':
-    app = CustomApplication(sys.argv)
-    window = SevenZipGUI()
+    # --profile-startup prints where the time to the first paint goes and exits
+    with profile.step("create QApplication"):
+        app = CustomApplication([arg for arg in sys.argv if arg != '--profile-startup'])
+    with profile.step("create window"):
+        window = SevenZipGUI()
     app.main_window = window
+    if profile.enabled:
+        reporter = FirstPaintReporter(window)
+        window.installEventFilter(reporter)
     sys.exit(app.exec())
@@ -1,19 +1,33 @@
+import re
 import shutil
+from collections import namedtuple
 
-from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem, QStyle, QProgressDialog, QMenu, QLabel, QWidget, \
+from PySide6.QtWidgets import QTreeView, QStyle, QProgressDialog, QMenu, QLabel, QWidget, \
     QVBoxLayout, \
-    QLineEdit, QMessageBox, QInputDialog, QApplication
+    QLineEdit, QMessageBox, QInputDialog, QApplication, QHBoxLayout, QPushButton, QDialog, QComboBox, \
+    QCheckBox, QListWidget, QSplitter
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QDrag, QAction
-import subprocess
 import sys
 import os
 import tempfile
-import SevenZUtils
-from extractor import Extractor
+import sevenz_engine
+import archive_listing
+import archive_search
+import listing_cache
+from archive_changes import ChangeSet, names_by_pattern, plan_renames
+from archive_index import ROOT
+from archive_model import ArchiveTreeModel
 from archiver import Archiver
 from qsetting_manager import SettingsManager
-import chardet
+
+MAX_SHOWN_MATCHES = 5000  # The tree shows no more search matches than this, extracting takes all of them
+EXPAND_MATCHES = 200  # Up to this many matches are shown with their folders expanded
+SUMMARY_CHECK_MAX_ENTRIES = 20000  # Larger edited archives are not checked against `7zz l`, it costs about a relist
+
+# An outer archive kept in memory while an archive inside it is browsed, entry_path is that inner archive
+ArchiveLevel = namedtuple('ArchiveLevel', ['archive_path', 'entry_path', 'archive_index', 'code_page',
+                                           'listing_variant', 'is_partial_listing'])
 
 
 class MainPane(QWidget):
@@ -24,45 +38,92 @@ class MainPane(QWidget):
         self.current_folder_label = QLineEdit("     Open archive from the left or Drop archive below")
         self.current_folder_label.setReadOnly(True)
 
-        self.tree_widget = QTreeWidget()
+        # Shown while a listing is streaming in, keeps what was read so far
+        self.cancel_listing_button = QPushButton("Cancel")
+        self.cancel_listing_button.clicked.connect(self.cancel_listing)
+        self.cancel_listing_button.setVisible(False)
+
+        self.tree_view = QTreeView()
+
+        # Breadcrumbs of the outer archives, shown while browsing an archive inside an archive
+        self.up_button = QPushButton(self)
+        self.up_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogToParent))
+        self.up_button.setToolTip("Back to the outer archive")
+        self.up_button.clicked.connect(self.go_up)
+        self.up_button.setVisible(False)
+        self.breadcrumb_layout = QHBoxLayout()
+        self.breadcrumb_layout.setSpacing(0)
+
+        label_layout = QHBoxLayout()
+        label_layout.setSpacing(3)
+        label_layout.addWidget(self.up_button)
+        label_layout.addLayout(self.breadcrumb_layout)
+        label_layout.addWidget(self.current_folder_label)
+        label_layout.addWidget(self.cancel_listing_button)
+
+        # Filters the tree while typing, answered from a name index built once the listing is complete
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText("Search names, *.glob or re:regex, with size>10m date>=2024-01")
+        self.search_field.setClearButtonEnabled(True)
+        self.search_field.textChanged.connect(self.run_search)
+        self.search_status_label = QLabel()
+        self.extract_matches_button = QPushButton("Extract All Matches")
+        self.extract_matches_button.clicked.connect(self.extract_all_matches)
+        self.extract_matches_button.setEnabled(False)
+
+        search_layout = QHBoxLayout()
+        search_layout.setSpacing(3)
+        search_layout.addWidget(self.search_field)
+        search_layout.addWidget(self.search_status_label)
+        search_layout.addWidget(self.extract_matches_button)
+
+        # Preview of the selected entry next to the tree, built when it is first needed
+        self.preview_pane = None
+        self.preview_splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.preview_splitter.addWidget(self.tree_view)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.current_folder_label)
-        layout.addWidget(self.tree_widget)
+        layout.addLayout(label_layout)
+        layout.addLayout(search_layout)
+        layout.addWidget(self.preview_splitter)
 
         layout.setSpacing(8)
         layout.setContentsMargins(5, 4, 0, 0)
 
         self.setLayout(layout)
 
-        self.s7zip_bin = SevenZUtils.determine_7zip_binary()
-
-        # Setup tree columns and reordered headers
-        self.tree_widget.setColumnCount(4)  # Merging date & time reduces it to 4 columns
-        self.tree_widget.setHeaderLabels(["Name", "Size", "Compressed", "DateTime"])
-
-        # Enable sorting
-        self.tree_widget.setSortingEnabled(True)
-        self.tree_widget.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.s7zip_bin = sevenz_engine.determine_7zip_binary()
 
         # Fetch the standard folder icon provided by PyQt
         self.folder_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_DirIcon)
         self.file_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_FileIcon)
-        self.tree_widget.setColumnWidth(0, int(0.4 * self.width()))
+
+        # The model only holds the entry tree, rows are built when the view paints them
+        self.archive_model = ArchiveTreeModel(self.folder_icon, self.file_icon, self)
+        self.tree_view.setModel(self.archive_model)
+        self.tree_view.setUniformRowHeights(True)
+
+        # Enable sorting
+        self.tree_view.setSortingEnabled(True)
+        self.tree_view.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+
+        self.tree_view.setColumnWidth(0, int(0.4 * self.width()))
 
         # set the drag-drop mode
         self.setAcceptDrops(True)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
-        #self.tree_widget.setDragEnabled(True)
-        self.tree_widget.setDragDropMode(QTreeWidget.DragDropMode.DropOnly)
+        #self.tree_view.setDragEnabled(True)
+        self.tree_view.setDragDropMode(QTreeView.DragDropMode.DropOnly)
 
         # Allow multi-selection
-        self.tree_widget.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.tree_view.setSelectionMode(QTreeView.SelectionMode.ExtendedSelection)
 
-        # Connect the itemDoubleClicked signal to the custom slot
-        self.tree_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
+        # Connect the doubleClicked signal to the custom slot
+        self.tree_view.doubleClicked.connect(self.on_item_double_clicked)
 
-        self.tree_widget.itemSelectionChanged.connect(self.update_folder_label)
+        self.tree_view.selectionModel().selectionChanged.connect(self.update_folder_label)
+        self.tree_view.selectionModel().selectionChanged.connect(self.update_preview)
+        self.tree_view.selectionModel().selectionChanged.connect(self.prefetch_nearby)
 
         # Create context menu actions
         self.pasteAction = QAction("Paste", self)
@@ -73,6 +134,10 @@ class MainPane(QWidget):
         self.renameAction.triggered.connect(self.rename_item)
         self.renameAction.setEnabled(False)
 
+        self.bulkRenameAction = QAction("Bulk Rename...", self)
+        self.bulkRenameAction.triggered.connect(self.bulk_rename_items)
+        self.bulkRenameAction.setEnabled(False)
+
         self.deleteAction = QAction("Delete", self)
         self.deleteAction.triggered.connect(self.delete_item)
         self.deleteAction.setEnabled(False)
@@ -89,239 +154,474 @@ class MainPane(QWidget):
         self.copy_action.triggered.connect(self.copy_files_to_clipboard)
         self.copy_action.setEnabled(False)
 
+        self.name_encoding_action = QAction("Name Encoding...", self)
+        self.name_encoding_action.triggered.connect(self.choose_name_encoding)
+        self.name_encoding_action.setEnabled(False)
+
         self.archiver = Archiver(self)
 
-        self.extractor = Extractor(self)
+        self.extractor = None  # Built when an entry is first opened, copied or extracted
+        self.prefetcher = None  # Built when prefetching is first turned on or used
         self.archive_path = None
 
+        self.listing_worker = None
+        self.retired_listing_workers = []
+        self.entry_count = 0
+        self.is_partial_listing = False
+
         self.settings_manager = SettingsManager()
+        self.listing_cache = listing_cache.ListingCache(
+            int(self.settings_manager.get_value("listing_cache_size_mb", listing_cache.DEFAULT_MAX_SIZE_MB)))
+        self.store_listing_workers = []
+        self.listing_variant = None
+        self.code_page = None  # -mcp the open archive is listed and edited with
+        self.summary_worker = None
+        self.retired_summary_workers = []
+        self.archive_levels = []  # ArchiveLevel of every outer archive, the outermost first
+        self.name_index = None  # archive_search.NameIndex of the shown listing, None until it is built
+        self.search_index_worker = None
+        self.retired_search_index_workers = []
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_C and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
             self.copy_files_to_clipboard()
+        elif event.key() == Qt.Key.Key_F and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+            self.search_field.setFocus()
+            self.search_field.selectAll()
         else:
             super().keyPressEvent(event)
 
-    def get_full_path(self, item):
-        """Construct the full path for the given item in the tree view."""
-        parts = []
-        while item:
-            parts.insert(0, item.text(0))
-            item = item.parent()
-        return '/'.join(parts)
-
-    def format_size(self, size):
-        try:
-            int(size)
-        except:
-            return ""
-
-        """Converts bytes to a human-readable string."""
-        size = int(size)  # Make sure the size is an integer
-        units = ["bytes", "KiB", "MiB", "GiB", "TiB"]
-
-        for unit in units:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024.0
-        return f"{size:.2f} TiB"
+    def get_full_path(self, index):
+        """Construct the full path for the given index in the tree view."""
+        return self.archive_model.path(index)
 
     def display_archive_contents(self, archive_path):
+        self.leave_archive_levels()
+        self.clear_search()
+        self.list_archive(archive_path)
 
+    def list_archive(self, archive_path):
         chardet_option = self.settings_manager.get_value("chardet_option", False)
 
+        # Drop any listing still running for the previously opened archive
+        self.stop_listing_worker()
+        self.stop_summary_worker()
+        self.stop_search_index_worker()
+        self.name_index = None
+
         self.archive_path = archive_path
         if self.archive_path is None:
             return
 
-        command = [self.s7zip_bin, 'l', archive_path]
-        try:
-            raw_output = subprocess.check_output(command)
+        self.enable_archive_actions()
+        self.clear_preview()
+        self.cancel_prefetch()
+
+        identity = listing_cache.get_identity(archive_path)
+        if identity is not None:
+            # Entries opened before the archive changed are dropped once per open, not on every lookup
+            self.ensure_extractor().preview_cache.drop_other_identities(identity)
+
+        self.archive_model.clear()  # Clear existing items
+        self.entry_count = 0
+        self.is_partial_listing = False
+
+        self.code_page = self.listing_cache.load_code_page(archive_path)
+        self.listing_worker = sevenz_engine.ListArchiveWorker(self.s7zip_bin, archive_path, bool(chardet_option),
+                                                            self.listing_cache, self.code_page)
+        self.listing_worker.entries_ready.connect(self.add_entries)
+        self.listing_worker.index_loaded.connect(self.set_index)
+        self.listing_worker.listing_finished.connect(self.on_listing_finished)
+        self.listing_worker.listing_failed.connect(self.on_listing_failed)
+        self.listing_variant = self.listing_worker.cache_variant
+        self.listing_worker.start()
 
-            if chardet_option:
-                output = raw_output.decode('utf-8')
-            else:
-                encoding_detected = chardet.detect(raw_output)['encoding']
-                output = raw_output.decode(encoding_detected)
-
-        except subprocess.CalledProcessError:
-            QMessageBox.critical(self, "Error",
-                                 "Failed to open the archive. It might be corrupted or not a supported archive file.")
-            self.close_and_clear()
-            return
+        # Update the QLineEdit to display the current folder
+        self.cancel_listing_button.setVisible(True)
+        self.update_folder_label()
 
+    def enable_archive_actions(self):
         # Check the file extension to enable or disable write-related actions
-        file_extension = os.path.splitext(archive_path)[1]
-        if file_extension.lower() in ['.7z', '.zip']:
-            self.pasteAction.setEnabled(True)
-            self.renameAction.setEnabled(True)
-            self.deleteAction.setEnabled(True)
-        else:
-            self.pasteAction.setEnabled(False)
-            self.renameAction.setEnabled(False)
-            self.deleteAction.setEnabled(False)
+        file_extension = os.path.splitext(self.archive_path)[1]
+        # A nested archive is a copy in the preview cache, editing it would not change the outer archive
+        writable = file_extension.lower() in ['.7z', '.zip'] and not self.archive_levels
+        self.pasteAction.setEnabled(writable)
+        self.renameAction.setEnabled(writable)
+        self.bulkRenameAction.setEnabled(writable)
+        self.deleteAction.setEnabled(writable)
 
         self.openAction.setEnabled(True)
         self.extractAction.setEnabled(True)
         self.copy_action.setEnabled(True)
+        self.name_encoding_action.setEnabled(True)
+
+    def open_nested_archive(self, index):
+        archive_path = self.archive_path
+        entry_path = self.get_full_path(index)
+        node = self.archive_model.node_of(index)
+        self.ensure_extractor().stream_nested_archive(
+            archive_path, entry_path,
+            lambda nested_path: self.enter_nested_archive(archive_path, entry_path, nested_path),
+            self.archive_switches(), self.archive_model.archive_index.crc(node),
+            self.archive_model.archive_index.size(node))
+
+    def enter_nested_archive(self, archive_path, entry_path, nested_path):
+        if archive_path != self.archive_path:
+            return  # Another archive was opened while the inner one was read
+        if self.listing_worker is not None:
+            self.cancel_listing()
+        self.stop_summary_worker()
+
+        # The outer index stays as it is, going back up needs no listing at all
+        self.archive_levels.append(ArchiveLevel(self.archive_path, entry_path, self.archive_model.archive_index,
+                                                self.code_page, self.listing_variant, self.is_partial_listing))
+        self.ensure_extractor().preview_cache.pin(nested_path)
+        self.clear_search()
+        self.list_archive(nested_path)
+        self.update_breadcrumbs()
+
+    def go_up(self):
+        if self.archive_levels:
+            self.go_up_to(len(self.archive_levels) - 1)
+
+    def go_up_to(self, depth):
+        """Show the outer archive at `depth` of the breadcrumbs again, 0 is the outermost one."""
+        if depth >= len(self.archive_levels):
+            return
+        self.stop_listing_worker()
+        self.stop_summary_worker()
+
+        level = self.archive_levels[depth]
+        preview_cache = self.ensure_extractor().preview_cache
+        preview_cache.unpin(self.archive_path)
+        for inner_level in self.archive_levels[depth + 1:]:
+            preview_cache.unpin(inner_level.archive_path)
+        del self.archive_levels[depth:]
+
+        self.clear_preview()
+        self.cancel_prefetch()
+        self.clear_search()
+        self.archive_path = level.archive_path
+        self.code_page = level.code_page
+        self.listing_variant = level.listing_variant
+        self.is_partial_listing = level.is_partial_listing
+        self.enable_archive_actions()
+        self.set_index(level.archive_index)
+        self.finish_entries()
+        self.build_search_index()
+        self.reveal_entry(level.entry_path)
+        self.update_breadcrumbs()
+        self.update_folder_label()
+
+    def leave_archive_levels(self):
+        if not self.archive_levels:
+            return
+        preview_cache = self.ensure_extractor().preview_cache
+        preview_cache.unpin(self.archive_path)
+        for level in self.archive_levels[1:]:
+            preview_cache.unpin(level.archive_path)
+        self.archive_levels = []
+        self.update_breadcrumbs()
+
+    def update_breadcrumbs(self):
+        while self.breadcrumb_layout.count():
+            self.breadcrumb_layout.takeAt(0).widget().deleteLater()
+        for depth, level in enumerate(self.archive_levels):
+            button = QPushButton(os.path.basename(level.archive_path) + " ›", self)
+            button.setFlat(True)
+            button.setToolTip(level.entry_path)
+            button.clicked.connect(lambda checked=False, depth=depth: self.go_up_to(depth))
+            self.breadcrumb_layout.addWidget(button)
+        self.up_button.setVisible(bool(self.archive_levels))
+
+    def reveal_entry(self, entry_path):
+        # Select the inner archive that was left, its folders are expanded on the way
+        node = self.archive_model.archive_index.find(entry_path)
+        if node is None or node == ROOT:
+            return
+        ancestors = []
+        parent_node = self.archive_model.archive_index.parent(node)
+        while parent_node != ROOT:
+            ancestors.append(parent_node)
+            parent_node = self.archive_model.archive_index.parent(parent_node)
+        for ancestor in reversed(ancestors):
+            self.tree_view.expand(self.archive_model.index_of(ancestor))
+
+        parent_index = self.archive_model.index_of(self.archive_model.archive_index.parent(node))
+        row = self.archive_model.row_of(node)
+        while row >= self.archive_model.rowCount(parent_index) and self.archive_model.canFetchMore(parent_index):
+            self.archive_model.fetchMore(parent_index)
+        index = self.archive_model.index_of(node)
+        self.tree_view.setCurrentIndex(index)
+        self.tree_view.scrollTo(index)
+
+    def stop_listing_worker(self):
+        worker = self.listing_worker
+        if worker is None:
+            return
+        self.listing_worker = None
+        self.cancel_listing_button.setVisible(False)
+
+        worker.entries_ready.disconnect(self.add_entries)
+        worker.index_loaded.disconnect(self.set_index)
+        worker.listing_finished.disconnect(self.on_listing_finished)
+        worker.listing_failed.disconnect(self.on_listing_failed)
+        worker.cancel()
+        self.retire_listing_worker(worker)
+
+    def retire_listing_worker(self, worker):
+        # Keep a reference until the thread is really gone, the outcome signals arrive before run() returns
+        if worker.isFinished():
+            return
+        self.retired_listing_workers.append(worker)
+        worker.finished.connect(lambda: self.retired_listing_workers.remove(worker))
 
-        entries = self.parse_7zip_output(output)
+    def cancel_listing(self):
+        if self.listing_worker is None:
+            return
+        self.stop_listing_worker()
+        self.is_partial_listing = True
+        self.finish_entries()
+        self.build_search_index()
+        self.update_folder_label()
+
+    def on_listing_finished(self):
+        worker = self.listing_worker
+        self.listing_worker = None
+        self.cancel_listing_button.setVisible(False)
+        if worker is not None:
+            self.retire_listing_worker(worker)
+        self.finish_entries()
+        self.build_search_index()
+        self.update_folder_label()
+        if worker is not None and not worker.from_cache and worker.identity is not None:
+            self.store_listing(worker.identity, worker.cache_variant)
+
+    def store_listing(self, identity, variant):
+        # Serializing is a handful of array copies, only the sqlite write goes to a thread
+        data = self.archive_model.archive_index.to_bytes()
+        worker = sevenz_engine.StoreListingWorker(self.listing_cache, identity, data, variant)
+        self.store_listing_workers.append(worker)
+        worker.finished.connect(lambda: self.store_listing_workers.remove(worker))
+        worker.start()
+
+    def on_listing_failed(self, message):
+        if self.listing_worker is not None:
+            self.retire_listing_worker(self.listing_worker)
+        self.listing_worker = None
+        self.cancel_listing_button.setVisible(False)
+        QMessageBox.critical(self, "Error",
+                             "Failed to open the archive. It might be corrupted or not a supported archive file.")
+        if self.archive_levels:
+            self.go_up()
+        else:
+            self.close_and_clear()
 
-        entries.sort(key=lambda x: (x['name'], 'D' in x['attr']))
+    def finish_entries(self):
+        # Streamed rows are appended unsorted, apply the header's sort order once the listing stops
+        if self.archive_model.archive_index.child_offsets is None:
+            self.archive_model.archive_index.finalize()
+        header = self.tree_view.header()
+        self.archive_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
 
-        self.archive_path = archive_path
-        self.tree_widget.clear()  # Clear existing items
+    def apply_changes(self, changes):
+        """Patch the open listing after this application modified the archive, relisting only if needed."""
+        if self.archive_path is None:
+            return
+        # The filter would hide changed rows, the search runs again on the new index
+        self.archive_model.set_filter(None)
+        if self.listing_worker is not None or self.is_partial_listing or not self.archive_model.apply_changes(changes):
+            self.reload_archive()
+            return
+        self.entry_count = self.archive_model.archive_index.entry_count()
+        self.build_search_index()
+        self.update_folder_label()
+        self.verify_listing()
+
+    def verify_listing(self):
+        # Check that the patched index matches the archive, relist on any disagreement. `7zz l` prints every
+        # entry before its totals, so the check is only cheap for small archives. Larger ones rely on 7zz having
+        # exited without an error, which apply_changes callers made sure of, and are cached as they are.
+        self.stop_summary_worker()
+        if self.entry_count > SUMMARY_CHECK_MAX_ENTRIES:
+            identity = listing_cache.get_identity(self.archive_path)
+            if identity is not None:
+                self.store_listing(identity, self.listing_variant)
+            return
+        self.summary_worker = sevenz_engine.ArchiveSummaryWorker(self.s7zip_bin, self.archive_path)
+        self.summary_worker.summary_ready.connect(self.on_summary_ready)
+        self.summary_worker.start()
 
-        # Update the QLineEdit to display the current folder
-        folder_name = os.path.basename(archive_path)
-        self.current_folder_label.setText(f" {folder_name}")
-
-        # Dictionary to keep track of directories and their corresponding QTreeWidgetItems
-        dir_dict = {}
-
-        # Dictionary to keep track of orphan files (NEW)
-        orphan_files = {}
-
-        for entry in entries:
-            parts = entry['name'].split('/')
-            current_path = ''
-            parent_item = None  # This will be used to keep track of the parent item in the nested structure
-
-            # Create or retrieve directory items for all parts except the last one
-            for i, part in enumerate(parts[:-1]):
-                current_path = '/'.join(parts[:i + 1])
-                if current_path not in dir_dict:
-                    item = QTreeWidgetItem([part, '--', '--', ''])
-                    item.setIcon(0, self.folder_icon)
-                    item.setData(0, Qt.ItemDataRole.UserRole, "D....")
-                    if parent_item:
-                        parent_item.addChild(item)
-                    else:
-                        self.tree_widget.addTopLevelItem(item)
-
-                    dir_dict[current_path] = item
-                parent_item = dir_dict[current_path]
-
-            # For the current entry (last part), decide whether it's a file or directory
-            item_name = parts[-1]
-            if 'D' in entry['attr']:
-                dir_item = QTreeWidgetItem([item_name, '--', '--', entry['datetime']])
-                dir_item.setData(0, Qt.ItemDataRole.UserRole, entry['attr'])
-                dir_item.setIcon(0, self.folder_icon)
-                if parent_item:
-                    parent_item.addChild(dir_item)
-                else:
-                    self.tree_widget.addTopLevelItem(dir_item)
-                dir_dict[entry['name']] = dir_item
-
-                # Check if this directory has any orphan files (NEW)
-                if entry['name'] in orphan_files:
-                    for orphan in orphan_files[entry['name']]:
-                        dir_item.addChild(orphan)
-                    del orphan_files[entry['name']]
-            else:
-                size = self.format_size(entry['size'])
-                compressed = self.format_size(entry['compressed'])
-                file_item = QTreeWidgetItem([item_name, size, compressed, entry['datetime']])
-                file_item.setData(0, Qt.ItemDataRole.UserRole, entry['attr'])  # Set the 'attr'
-                file_item.setIcon(0, self.file_icon)  # Setting the file icon
-                if parent_item:
-                    parent_item.addChild(file_item)
-                else:
-                    self.tree_widget.addTopLevelItem(file_item)
-
-                # If parent_item is None, this is an orphan file (NEW)
-                if parent_item is None:
-                    parent_path = '/'.join(parts[:-1])
-                    if parent_path not in orphan_files:
-                        orphan_files[parent_path] = []
-                    orphan_files[parent_path].append(file_item)
-
-    def parse_7zip_output(self, output):
-        lines = output.strip().split('\n')
-
-        # Extract lines between dashes, which contain file/folder info
-        start_index = None
-        end_index = None
-        for idx, line in enumerate(lines):
-            if "-----------" in line:
-                if start_index is None:
-                    start_index = idx
-                else:
-                    end_index = idx
-                    break
-
-        # Extract column indices based on the first dashed line
-        dash_line = lines[start_index]
-        date_time_end = dash_line.find(" ")
-        attr_start = date_time_end + 1
-        attr_end = attr_start + dash_line[attr_start:].find(" ")
-        size_start = attr_end + 1
-        size_end = size_start + dash_line[size_start:].find(" ")
-        compressed_start = size_end + 1
-        compressed_end = compressed_start + dash_line[compressed_start:].find(" ")
-        name_start = compressed_end + 2  # 2 spaces before the name column
-
-        content_lines = lines[start_index + 1:end_index]
-        entries = []
-        for line in content_lines:
-            date_time = line[:date_time_end].strip()
-            attr = line[attr_start:attr_end].strip()
-            size = line[size_start:size_end].strip()
-            compressed = line[compressed_start:compressed_end].strip()
-            name = line[name_start:].strip()
-
-            # for directories, set size and compressed to "--"
-            if 'D' in attr:
-                size = "--"
-                compressed = "--"
-
-            entry = {
-                "datetime": date_time,
-                "attr": attr,
-                "size": size,
-                "compressed": compressed,
-                "name": name
-            }
-            entries.append(entry)
-
-        return entries
+    def stop_summary_worker(self):
+        worker = self.summary_worker
+        if worker is None:
+            return
+        self.summary_worker = None
+        worker.summary_ready.disconnect(self.on_summary_ready)
+        self.retired_summary_workers.append(worker)
+        worker.finished.connect(lambda: self.retired_summary_workers.remove(worker))
+
+    def on_summary_ready(self, summary):
+        self.stop_summary_worker()
+        if self.listing_worker is not None:
+            return  # A full relist is already running
+        files, size, _ = self.archive_model.archive_index.subtree_totals()
+        if summary is None or summary[1:] != (files, size):
+            self.reload_archive()
+            return
+        self.store_listing(summary[0], self.listing_variant)
+
+    def build_search_index(self):
+        self.stop_search_index_worker()
+        self.name_index = None
+        self.search_index_worker = archive_search.SearchIndexWorker(self.archive_model.archive_index)
+        self.search_index_worker.index_ready.connect(self.on_search_index_ready)
+        self.search_index_worker.start()
+
+    def stop_search_index_worker(self):
+        worker = self.search_index_worker
+        if worker is None:
+            return
+        self.search_index_worker = None
+        worker.index_ready.disconnect(self.on_search_index_ready)
+        # Keep a reference until the thread is really gone
+        if worker.isFinished():
+            return
+        self.retired_search_index_workers.append(worker)
+        worker.finished.connect(lambda: self.retired_search_index_workers.remove(worker))
+
+    def on_search_index_ready(self, name_index):
+        self.stop_search_index_worker()
+        self.name_index = name_index
+        if self.search_field.text().strip():
+            self.run_search()
+
+    def search_query(self):
+        """Parse the search field, None if it is empty or invalid."""
+        text = self.search_field.text().strip()
+        self.search_status_label.setToolTip("")
+        if not text:
+            return None
+        try:
+            return archive_search.parse_query(text)
+        except ValueError as e:
+            self.search_status_label.setText("Invalid search")
+            self.search_status_label.setToolTip(str(e))
+            return None
+
+    def run_search(self):
+        self.extract_matches_button.setEnabled(False)
+        if self.archive_path is None:
+            return
+        query = self.search_query()
+        if query is None:
+            if not self.search_field.text().strip():
+                self.search_status_label.clear()
+            self.archive_model.set_filter(None)
+            return
+        if self.name_index is None:
+            self.search_status_label.setText("Indexing…")
+            return
+
+        nodes, complete = self.name_index.search(query, MAX_SHOWN_MATCHES)
+        self.archive_model.set_filter(nodes)
+        if len(nodes) <= EXPAND_MATCHES:
+            self.tree_view.expandAll()
+        if complete:
+            self.search_status_label.setText(f"{len(nodes)} matches")
+        else:
+            self.search_status_label.setText(f"First {len(nodes)} matches")
+        self.extract_matches_button.setEnabled(bool(nodes))
+
+    def clear_search(self):
+        self.search_field.blockSignals(True)
+        self.search_field.clear()
+        self.search_field.blockSignals(False)
+        self.search_status_label.clear()
+        self.extract_matches_button.setEnabled(False)
+        self.archive_model.set_filter(None)
+
+    def extract_all_matches(self):
+        query = self.search_query()
+        if query is None or self.name_index is None:
+            return
+        # Not only the matches shown, one job for all of them
+        nodes, _ = self.name_index.search(query)
+        nodes = self.archive_model.drop_descendants(nodes)
+        if not nodes:
+            return
+        item_full_paths = [self.archive_model.archive_index.path(node) for node in nodes]
+        self.ensure_extractor().extract_from_main_pane(self.archive_path, item_full_paths, self.archive_switches())
+
+    def set_index(self, archive_index):
+        self.archive_model.set_index(archive_index)
+        self.entry_count = archive_index.entry_count()
+
+    def add_entries(self, entries):
+        self.archive_model.append_entries(entries)
+        self.entry_count += len(entries)
+        self.update_folder_label()
 
     def current_archive_path(self):
         return self.archive_path
 
     def get_selected_items(self):
         """Returns a list of full file paths of the selected items."""
-        selected_items = self.tree_widget.selectedItems()
-        return [self.get_full_path(item) for item in selected_items]
-
-    def is_file_item(self, item):
-        # Your code to determine whether the item is a file or folder
-        # For example, you could use the 'attr' value you've stored in the QTreeWidgetItem
-        attr = item.data(0, Qt.ItemDataRole.UserRole)
-        if attr is None:
+        selected_items = self.tree_view.selectionModel().selectedRows()
+        return [self.get_full_path(index) for index in selected_items]
+
+    def is_file_item(self, index):
+        if not index.isValid():
             return False
-        return 'D' not in attr
+        return not self.archive_model.is_dir(index)
 
-    def on_item_double_clicked(self, item, column):
-        file_path = self.get_full_path(item)
-        is_file = self.is_file_item(item)
+    def on_item_double_clicked(self, index):
+        file_path = self.get_full_path(index)
+        is_file = self.is_file_item(index)
 
         if is_file and file_path:  # Check if the path is not empty and the item is a file
-            self.extract_and_open_file(file_path)
+            self.open_entry(index)
 
     def on_item_open(self):
-        selected_items = self.tree_widget.selectedItems()
+        selected_items = self.tree_view.selectionModel().selectedRows()
         if len(selected_items) == 0:
             return
         file_path = self.get_full_path(selected_items[0])
         is_file = self.is_file_item(selected_items[0])
 
         if is_file and file_path:  # Check if the path is not empty and the item is a file
-            self.extract_and_open_file(file_path)
+            self.open_entry(selected_items[0])
+
+    def open_entry(self, index):
+        file_path = self.get_full_path(index)
+        if self.ensure_extractor().is_supported_archive(file_path):
+            self.open_nested_archive(index)
+        else:
+            self.extract_and_open_file(file_path, self.archive_model.crc(index))
+
+    def extract_and_open_file(self, file_path, crc=None):
+        self.ensure_extractor().extract_and_open_double_click_file(self.archive_path, file_path,
+                                                                   self.archive_switches(), crc)
 
-    def extract_and_open_file(self, file_path):
-        self.extractor.extract_and_open_double_click_file(self.archive_path, file_path)
+    def archive_switches(self):
+        # Entry names are passed back to 7zz as they were listed, so it has to decode them the same way
+        return archive_listing.code_page_switches(self.code_page)
+
+    def choose_name_encoding(self):
+        if self.archive_path is None:
+            return
+        labels = [label for label, _ in archive_listing.CODE_PAGES]
+        current = next((i for i, (_, code_page) in enumerate(archive_listing.CODE_PAGES)
+                        if code_page == self.code_page), 0)
+        label, ok = QInputDialog.getItem(self, "Name Encoding",
+                                         "Code page of the names in this archive:", labels, current, False)
+        if not ok:
+            return
+        code_page = dict(archive_listing.CODE_PAGES)[label]
+        if code_page == self.code_page:
+            return
+        self.listing_cache.store_code_page(self.archive_path, code_page)
+        self.reload_archive()
 
     def contextMenuEvent(self, event):
         context_menu = QMenu(self)
@@ -336,18 +636,27 @@ class MainPane(QWidget):
 
         context_menu.addAction(self.pasteAction)
         context_menu.addAction(self.renameAction)
+        context_menu.addAction(self.bulkRenameAction)
         context_menu.addAction(self.deleteAction)
 
+        context_menu.addSeparator()
+        context_menu.addAction(self.name_encoding_action)
+
         context_menu.exec(event.globalPos())
 
     def copy_files_to_clipboard(self):
-        self.extractor.extract_and_copy_files_to_clipboard(self.archive_path, self.get_selected_items())
+        selected_items = self.tree_view.selectionModel().selectedRows()
+        if not selected_items or self.archive_path is None:
+            return
+        nodes = self.archive_model.drop_descendants([self.archive_model.node_of(index) for index in selected_items])
+        self.ensure_extractor().extract_and_copy_files_to_clipboard(self.archive_path, self.archive_model.archive_index,
+                                                                    nodes, self.archive_switches())
         # print(self.get_selected_items())
 
     def extract_selected_item(self):
         file_path = self.current_archive_path()
         selected_items = self.get_selected_items()
-        self.extractor.extract_from_main_pane(file_path, selected_items)
+        self.ensure_extractor().extract_from_main_pane(file_path, selected_items, self.archive_switches())
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
@@ -373,6 +682,8 @@ class MainPane(QWidget):
             else:
                 # Call display_archive_contents for the single dropped file
                 self.display_archive_contents(file_paths[0])
+        elif self.archive_levels:
+            QMessageBox.warning(self, "Warning", "Files cannot be added to an archive inside another archive.")
         else:
             # Your existing logic for handling drops when an archive is already open
             print(self.current_inside_path)
@@ -380,111 +691,321 @@ class MainPane(QWidget):
             pass
 
     def close_and_clear(self):
+        self.stop_listing_worker()
+        self.stop_summary_worker()
+        self.stop_search_index_worker()
+        self.leave_archive_levels()
+        self.clear_search()
+        self.name_index = None
+        self.is_partial_listing = False
+
         self.pasteAction.setEnabled(False)
         self.renameAction.setEnabled(False)
+        self.bulkRenameAction.setEnabled(False)
         self.deleteAction.setEnabled(False)
         self.openAction.setEnabled(False)
         self.extractAction.setEnabled(False)
         self.copy_action.setEnabled(False)
+        self.name_encoding_action.setEnabled(False)
 
-        self.tree_widget.clear()  # Clear all items from the QTreeWidget
+        self.archive_model.clear()  # Clear all items from the tree
+        self.clear_preview()
+        self.cancel_prefetch()
         self.archive_path = None  # Reset the archive path
+        self.code_page = None
         self.current_folder_label.setText("     Open archive from the left or Drop archive below")
 
     def update_folder_label(self):
-        selected_items = self.tree_widget.selectedItems()
+        if self.archive_path is None:
+            return
+
+        selected_items = self.tree_view.selectionModel().selectedRows()
         # Extract ZIP filename from self.archive_path
         zip_filename = os.path.basename(self.archive_path)
 
         if selected_items:  # Check if any item is selected
-            item = selected_items[0]  # Get the first selected item
-            attr = item.data(0, Qt.ItemDataRole.UserRole)
-            if 'D' in attr:  # Check if the item is a directory
-                folder_name = self.get_full_path(item)
+            index = selected_items[0]  # Get the first selected item
+            if self.archive_model.is_dir(index):  # Check if the item is a directory
+                folder_name = self.get_full_path(index)
             else:  # It's a file
-                folder_name = os.path.dirname(self.get_full_path(item))
+                folder_name = os.path.dirname(self.get_full_path(index))
 
             if folder_name == '':
-                self.current_folder_label.setText(f" {zip_filename}")
+                label_text = f" {zip_filename}"
             else:
-                self.current_folder_label.setText(f" {zip_filename}/{folder_name}")
+                label_text = f" {zip_filename}/{folder_name}"
 
             self.current_inside_path = folder_name
 
         else:
-            self.current_folder_label.setText(f" {zip_filename}")
+            label_text = f" {zip_filename}"
             self.current_inside_path = None
 
+        if self.listing_worker is not None:
+            label_text += f" - Reading archive… {self.entry_count} entries"
+        elif self.is_partial_listing:
+            label_text += " (partial listing)"
+        self.current_folder_label.setText(label_text)
+
+    def is_preview_shown(self):
+        return self.settings_manager.get_value("show_preview", False) in (True, 'true')
+
+    def ensure_preview_pane(self):
+        if self.preview_pane is None:
+            from preview_pane import PreviewPane  # Image and font support, only loaded once a preview is shown
+
+            self.preview_pane = PreviewPane(self.s7zip_bin)
+            self.preview_splitter.addWidget(self.preview_pane)
+            self.preview_splitter.setStretchFactor(0, 3)
+            self.preview_splitter.setStretchFactor(1, 2)
+        return self.preview_pane
+
+    def clear_preview(self):
+        if self.preview_pane is not None:
+            self.preview_pane.clear()
+
+    def set_preview_visible(self, visible):
+        self.settings_manager.set_value("show_preview", visible)
+        if visible:
+            self.ensure_preview_pane().setVisible(True)
+            self.update_preview()
+        elif self.preview_pane is not None:
+            self.preview_pane.setVisible(False)
+            self.preview_pane.clear()
+
+    def update_preview(self):
+        if not self.is_preview_shown() or self.archive_path is None:
+            return
+        self.ensure_preview_pane()
+        # Selecting anything else stops the running preview before the next one starts
+        selected_items = self.tree_view.selectionModel().selectedRows()
+        if len(selected_items) != 1 or not self.is_file_item(selected_items[0]):
+            self.preview_pane.clear()
+            return
+        index = selected_items[0]
+        self.preview_pane.show_entry(self.archive_path, self.get_full_path(index),
+                                     self.archive_model.archive_index.size(self.archive_model.node_of(index)),
+                                     self.archive_switches())
+
+    def prefetch_nearby(self, selected, deselected):
+        indexes = [index for index in selected.indexes() if index.column() == 0]
+        if self.archive_path is None or not indexes:
+            return
+        if self.prefetcher is None and self.settings_manager.get_value("prefetch_enabled", False) not in (True, 'true'):
+            return
+        from prefetcher import RADIUS
+
+        # The newly selected row first, then its neighbours by distance
+        index = indexes[-1]
+        parent = index.parent()
+        row_count = self.archive_model.rowCount(parent)
+        rows = [index.row()]
+        for distance in range(1, RADIUS + 1):
+            rows += [index.row() + distance, index.row() - distance]
+        nodes = [self.archive_model.node_of(self.archive_model.index(row, 0, parent))
+                 for row in rows if 0 <= row < row_count]
+        self.ensure_prefetcher().prefetch(self.archive_path, self.archive_model.archive_index, nodes,
+                                          self.archive_switches())
+
+    def ensure_prefetcher(self):
+        if self.prefetcher is None:
+            from prefetcher import Prefetcher
+
+            self.prefetcher = Prefetcher(self.s7zip_bin, self)
+        return self.prefetcher
+
+    def ensure_extractor(self):
+        if self.extractor is None:
+            from extractor import Extractor  # Brings in the job scheduler, caches and scratch space
+
+            self.extractor = Extractor(self)
+        return self.extractor
+
+    def set_prefetch_enabled(self, enabled):
+        self.ensure_prefetcher().set_enabled(enabled)
+
+    def cancel_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+
     def reload_archive(self):
-        self.display_archive_contents(self.archive_path)
+        self.list_archive(self.archive_path)
 
     def paste_from_clipboard(self):
         # Get file paths from clipboard
         clipboard = QApplication.clipboard()
         mime_data = clipboard.mimeData()
 
-        if mime_data.hasFormat("text/uri-list"):
+        if mime_data.hasFormat("text/uri-list") and not self.archive_levels:
             # Extract file paths from the URLs
             file_paths = [url.toLocalFile() for url in mime_data.urls()]
             print(file_paths)
             self.archiver.confirm_add_files(self.archive_path, file_paths, self.current_inside_path)
 
     def rename_item(self):
-        item = self.tree_widget.currentItem()
-        item_full_path = self.get_full_path(item)
-        if item:
-            old_name = item.text(0)
-            new_name, ok = QInputDialog.getText(self, 'Rename File', 'Enter new name:', text=old_name)
-
-            if ok and new_name:
-                # Perform the renaming operation using 7z command
-                if self.archive_path:
-                    # Extract the directory of the old file
-                    old_file_dir = os.path.dirname(item_full_path)
-
-                    # Create the new full path
-                    new_full_path = os.path.join(old_file_dir, new_name) if old_file_dir else new_name
-
-                    # Run the 7z command to rename the file
-                    command = [self.s7zip_bin, 'rn', self.archive_path, item_full_path, new_full_path]
-                    try:
-                        subprocess.check_call(command)
-                        # Update the item's text and full path in the tree widget
-                        item.setText(0, new_name)
-                    except subprocess.CalledProcessError:
-                        QMessageBox.critical(self, "Error", "Failed to rename the file.")
-        self.reload_archive()
+        index = self.tree_view.currentIndex()
+        if not index.isValid() or not self.archive_path:
+            return
+        old_name = os.path.basename(self.get_full_path(index))
+        new_name, ok = QInputDialog.getText(self, 'Rename File', 'Enter new name:', text=old_name)
+        if not ok or not new_name or new_name == old_name:
+            return
+        self.rename_entries({self.archive_model.node_of(index): new_name})
+
+    def bulk_rename_items(self):
+        selected_items = self.tree_view.selectionModel().selectedRows()
+        if not selected_items or not self.archive_path:
+            return
+        nodes = [self.archive_model.node_of(index) for index in selected_items]
+        dialog = BulkRenameDialog(self.archive_model.archive_index, nodes, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted or not dialog.new_names:
+            return
+        self.rename_entries(dialog.new_names)
+
+    def rename_entries(self, new_names):
+        # All renames go to one `7zz rn`, the archive is rewritten once
+        try:
+            rename_pairs, changes = plan_renames(self.archive_model.archive_index, new_names)
+        except ValueError as e:
+            QMessageBox.warning(self, "Rename", str(e))
+            return
+
+        self.progress_dialog = QProgressDialog("Renaming...", "Cancel", 0, 100, self)
+        self.progress_dialog.setCancelButton(None)
+        self.progress_dialog.setModal(True)
+        self.progress_dialog.show()
+
+        self.rename_changes = changes
+        self.rename_worker = sevenz_engine.RenameWorker(self.s7zip_bin, self.archive_path, rename_pairs,
+                                                        self.archive_switches())
+        self.rename_worker.progress_updated.connect(self.progress_dialog.setValue)
+        self.rename_worker.finished.connect(self.on_rename_finished)
+        self.rename_worker.start()
+
+    def on_rename_finished(self, success, message):
+        self.progress_dialog.close()
+        if not success:
+            QMessageBox.critical(self, "Error", message)
+            self.reload_archive()
+            return
+
+        self.apply_changes(self.rename_changes)
 
     def delete_item(self):
-        item = self.tree_widget.currentItem()
-        item_full_path = self.get_full_path(item)
-        if item:
-            # Show a confirmation dialog
-            reply = QMessageBox.question(self, 'Delete File',
-                                         f'Are you sure you want to delete {item_full_path}?',
-                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                                         QMessageBox.StandardButton.No)
-
-            if reply == QMessageBox.StandardButton.Yes:
-                # Show a progress dialog
-                self.progress_dialog = QProgressDialog("Deleting...", "Cancel", 0, 0, self)
-                self.progress_dialog.setCancelButton(None)  # Disable the cancel button
-                self.progress_dialog.setModal(True)
-                self.progress_dialog.show()
-
-                # Create a worker thread for the delete operation
-                self.delete_worker = SevenZUtils.DeleteWorker(self.s7zip_bin, self.archive_path, item_full_path)
-                self.delete_worker.finished.connect(self.on_delete_finished)
-                self.delete_worker.start()
+        selected_items = self.tree_view.selectionModel().selectedRows()
+        if not selected_items or not self.archive_path:
+            return
+        nodes = self.archive_model.drop_descendants([self.archive_model.node_of(index) for index in selected_items])
+        item_full_paths = [self.archive_model.archive_index.path(node) for node in nodes]
+
+        # Show a confirmation dialog
+        if len(item_full_paths) == 1:
+            message = f'Are you sure you want to delete {item_full_paths[0]}?'
+        else:
+            message = f'Are you sure you want to delete these {len(item_full_paths)} items?'
+        reply = QMessageBox.question(self, 'Delete File', message,
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+
+        if reply == QMessageBox.StandardButton.Yes:
+            # Show a progress dialog
+            self.progress_dialog = QProgressDialog("Deleting...", "Cancel", 0, 100, self)
+            self.progress_dialog.setCancelButton(None)  # Disable the cancel button
+            self.progress_dialog.setModal(True)
+            self.progress_dialog.show()
+
+            # All selected paths go to one `7zz d`, the archive is rewritten once
+            self.delete_worker = sevenz_engine.DeleteWorker(self.s7zip_bin, self.archive_path, item_full_paths,
+                                                            self.archive_switches())
+            self.delete_worker.progress_updated.connect(self.progress_dialog.setValue)
+            self.delete_worker.finished.connect(self.on_delete_finished)
+            self.delete_worker.start()
 
     def on_delete_finished(self, success, message):
         self.progress_dialog.close()  # Close the progress dialog
-        if success:
-            # Remove the item from the tree widget
-            item = self.tree_widget.currentItem()
-            root = self.tree_widget.invisibleRootItem()
-            (item.parent() or root).removeChild(item)
-        else:
+        if not success:
             QMessageBox.critical(self, "Error", message)
+            self.reload_archive()
+            return
 
-        self.reload_archive()
+        self.apply_changes(ChangeSet(deleted=self.delete_worker.item_full_paths))
+
+
+class BulkRenameDialog(QDialog):
+    PREVIEW_LIMIT = 200
+
+    def __init__(self, archive_index, nodes, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Bulk Rename")
+        self.archive_index = archive_index
+        self.nodes = nodes
+        self.new_names = {}
+
+        layout = QVBoxLayout()
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Replace prefix", "Regular expression"])
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Match:"))
+        mode_layout.addWidget(self.mode_combo)
+        layout.addLayout(mode_layout)
+
+        self.find_line_edit = QLineEdit()
+        find_layout = QHBoxLayout()
+        find_layout.addWidget(QLabel("Find:"))
+        find_layout.addWidget(self.find_line_edit)
+        layout.addLayout(find_layout)
+
+        self.replace_line_edit = QLineEdit()
+        replace_layout = QHBoxLayout()
+        replace_layout.addWidget(QLabel("Replace with:"))
+        replace_layout.addWidget(self.replace_line_edit)
+        layout.addLayout(replace_layout)
+
+        self.recursive_check_box = QCheckBox("Include everything inside selected folders")
+        layout.addWidget(self.recursive_check_box)
+
+        self.preview_list = QListWidget()
+        self.status_label = QLabel()
+        layout.addWidget(self.preview_list)
+        layout.addWidget(self.status_label)
+
+        self.ok_button = QPushButton("Rename")
+        self.ok_button.setEnabled(False)
+        self.cancel_button = QPushButton("Cancel")
+        self.ok_button.clicked.connect(self.accept)
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.ok_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+        self.mode_combo.currentIndexChanged.connect(self.update_preview)
+        self.find_line_edit.textChanged.connect(self.update_preview)
+        self.replace_line_edit.textChanged.connect(self.update_preview)
+        self.recursive_check_box.stateChanged.connect(self.update_preview)
+        self.update_preview()
+
+    def update_preview(self):
+        self.preview_list.clear()
+        self.new_names = {}
+        find = self.find_line_edit.text()
+        use_regex = self.mode_combo.currentIndex() == 1
+        if use_regex and not find:
+            self.status_label.setText("")
+            self.ok_button.setEnabled(False)
+            return
+        try:
+            self.new_names = names_by_pattern(self.archive_index, self.nodes, find, self.replace_line_edit.text(),
+                                              use_regex, self.recursive_check_box.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid expression: {e}")
+            self.ok_button.setEnabled(False)
+            return
+
+        for node, new_name in list(self.new_names.items())[:self.PREVIEW_LIMIT]:
+            self.preview_list.addItem(f"{self.archive_index.path(node)}  →  {new_name}")
+        self.status_label.setText(f"{len(self.new_names)} entries will be renamed")
+        self.ok_button.setEnabled(bool(self.new_names))
@@ -1,7 +1,9 @@
 import os
 import sys
 
-from PySide6.QtWidgets import QMenuBar, QMenu, QFileDialog, QMessageBox
+import sqlite3
+
+from PySide6.QtWidgets import QMenuBar, QMenu, QFileDialog, QMessageBox, QInputDialog
 from PySide6.QtGui import QAction, QDesktopServices
 from qsetting_manager import SettingsManager
 from SevenZHelperMacOS import create_bookmark, resolve_bookmark, start_accessing_resource, stop_accessing_resource
@@ -66,6 +68,21 @@ class MenuBar(QMenuBar):
         file_menu.addAction(close_archive_action)
         close_archive_action.triggered.connect(lambda: self.close_archive())
 
+        file_menu.addSeparator()
+
+        if self.get_show_preview():
+            show_preview_text = "✔️ Show Preview"
+        else:
+            show_preview_text = "Show Preview"
+
+        show_preview_action = QAction(show_preview_text, self.window)
+        file_menu.addAction(show_preview_action)
+        show_preview_action.triggered.connect(lambda: self.toggle_show_preview())
+
+        show_jobs_action = QAction("Show Jobs", self.window)
+        file_menu.addAction(show_jobs_action)
+        show_jobs_action.triggered.connect(lambda: self.window.show_jobs())
+
         self.addMenu(file_menu)
 
         settings_menu = QMenu("Settings", self)
@@ -79,6 +96,43 @@ class MenuBar(QMenuBar):
         settings_menu.addAction(use_chardet_option)
         use_chardet_option.triggered.connect(lambda: self.toggle_chardet())
 
+        if self.get_prefetch_option():
+            prefetch_option_text = "✔️ Prefetch Nearby Entries"
+        else:
+            prefetch_option_text = "Prefetch Nearby Entries"
+
+        prefetch_option = QAction(prefetch_option_text, self.window)
+        settings_menu.addAction(prefetch_option)
+        prefetch_option.triggered.connect(lambda: self.toggle_prefetch())
+
+        cache_size_option = QAction("Listing Cache Size...", self.window)
+        settings_menu.addAction(cache_size_option)
+        cache_size_option.triggered.connect(lambda: self.set_listing_cache_size())
+
+        purge_cache_option = QAction("Purge Listing Cache", self.window)
+        settings_menu.addAction(purge_cache_option)
+        purge_cache_option.triggered.connect(lambda: self.purge_listing_cache())
+
+        preview_cache_size_option = QAction("Preview Cache Size...", self.window)
+        settings_menu.addAction(preview_cache_size_option)
+        preview_cache_size_option.triggered.connect(lambda: self.set_preview_cache_size())
+
+        purge_preview_cache_option = QAction("Purge Preview Cache", self.window)
+        settings_menu.addAction(purge_preview_cache_option)
+        purge_preview_cache_option.triggered.connect(lambda: self.purge_preview_cache())
+
+        scratch_quota_option = QAction("Scratch Space Quota...", self.window)
+        settings_menu.addAction(scratch_quota_option)
+        scratch_quota_option.triggered.connect(lambda: self.set_scratch_quota())
+
+        max_jobs_option = QAction("Concurrent Jobs...", self.window)
+        settings_menu.addAction(max_jobs_option)
+        max_jobs_option.triggered.connect(lambda: self.set_max_concurrent_jobs())
+
+        benchmark_option = QAction("Benchmark...", self.window)
+        settings_menu.addAction(benchmark_option)
+        benchmark_option.triggered.connect(lambda: self.show_benchmark())
+
         reset_option = QAction("Reset to default", self.window)
         settings_menu.addAction(reset_option)
         reset_option.triggered.connect(lambda: self.toggle_reset())
@@ -145,6 +199,79 @@ class MenuBar(QMenuBar):
         self.update_menu_bar()
         self.window.main_pane.reload_archive()
 
+    def get_show_preview(self):
+        return self.settings_manager.get_value("show_preview", False) in (True, 'true')
+
+    def toggle_show_preview(self):
+        self.window.main_pane.set_preview_visible(not self.get_show_preview())
+        self.update_menu_bar()
+
+    def get_prefetch_option(self):
+        return self.settings_manager.get_value("prefetch_enabled", False) in (True, 'true')
+
+    def toggle_prefetch(self):
+        self.window.main_pane.set_prefetch_enabled(not self.get_prefetch_option())
+        self.update_menu_bar()
+
+    def set_listing_cache_size(self):
+        import listing_cache
+
+        current_size = int(self.settings_manager.get_value("listing_cache_size_mb", listing_cache.DEFAULT_MAX_SIZE_MB))
+        size, ok = QInputDialog.getInt(self.window, "Listing Cache Size", "Maximum cache size (MiB):",
+                                       current_size, 1, 1024 * 1024)
+        if ok:
+            self.settings_manager.set_value("listing_cache_size_mb", size)
+            self.window.main_pane.listing_cache.max_size = size * 1024 * 1024
+
+    def purge_listing_cache(self):
+        try:
+            self.window.main_pane.listing_cache.purge()
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.warning(self.window, "Error", f"Failed to purge the listing cache: {e}")
+            return
+        QMessageBox.information(self.window, "Listing Cache", "The listing cache has been purged.")
+
+    def set_preview_cache_size(self):
+        from preview_cache import PreviewCache  # The caches and scratch space are built on first use
+
+        preview_cache = PreviewCache()
+        size, ok = QInputDialog.getInt(self.window, "Preview Cache Size", "Maximum size of opened entries kept (MiB):",
+                                       preview_cache.max_size // (1024 * 1024), 1, 1024 * 1024)
+        if ok:
+            preview_cache.set_max_size_mb(size)
+
+    def purge_preview_cache(self):
+        from preview_cache import PreviewCache
+
+        PreviewCache().purge()
+        QMessageBox.information(self.window, "Preview Cache", "The preview cache has been purged.")
+
+    def set_scratch_quota(self):
+        from scratch_space import ScratchSpace
+
+        scratch_space = ScratchSpace()
+        quota, ok = QInputDialog.getInt(self.window, "Scratch Space Quota",
+                                        "Maximum size of temporary extractions, e.g. for the clipboard (MiB):",
+                                        scratch_space.quota // (1024 * 1024), 16, 1024 * 1024)
+        if ok:
+            scratch_space.set_quota_mb(quota)
+
+    def set_max_concurrent_jobs(self):
+        current_limit = int(self.settings_manager.get_value("max_concurrent_jobs", 0))
+        limit, ok = QInputDialog.getInt(self.window, "Concurrent Jobs",
+                                        "Jobs run at the same time (0 = based on CPUs and free memory):",
+                                        current_limit, 0, 64)
+        if ok:
+            from job_scheduler import JobScheduler
+
+            JobScheduler().set_max_concurrent(limit)
+
+    def show_benchmark(self):
+        from benchmark_dialog import BenchmarkDialog  # Brings in the benchmark corpus code, only needed here
+
+        self.benchmark_dialog = BenchmarkDialog(self.window)
+        self.benchmark_dialog.show()
+
     def toggle_reset(self):
         reply = QMessageBox.question(None, 'Reset to Default', 'Do you want to reset to default?',
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
@@ -9,6 +9,7 @@ from PySide6.QtWidgets import QFileSystemModel
 
 from PySide6.QtGui import QAction
 import SevenZUtils
+import sevenz_engine
 from archiver import Archiver
 from qsetting_manager import SettingsManager
 from SevenZHelperMacOS import create_bookmark, resolve_bookmark
@@ -123,6 +124,7 @@ class NavigationPane(QTreeView):
         super().__init__(*args, **kwargs)
         self.archiver = None
         self.main_pane = None
+        self.extractor = None  # Built when something is first extracted
         self.setAcceptDrops(True)
 
         self.settings_manager = SettingsManager()
@@ -146,7 +148,7 @@ class NavigationPane(QTreeView):
         file_path = self.model().filePath(index)
 
         # List of supported extensions
-        supported_extensions = SevenZUtils.get_supported_extensions()
+        supported_extensions = sevenz_engine.get_supported_extensions()
 
         # Check if it's a valid archive
         if file_path.endswith(supported_extensions):
@@ -161,6 +163,14 @@ class NavigationPane(QTreeView):
         open_action = context_menu.addAction("Open as Archive")
         open_action.triggered.connect(self.open_item)
 
+        from batch_extractor import EACH_TO_OWN_FOLDER, ALL_HERE
+
+        extract_each_action = context_menu.addAction("Extract Each to Own Folder...")
+        extract_each_action.triggered.connect(lambda: self.extract_selected_archives(EACH_TO_OWN_FOLDER))
+
+        extract_here_action = context_menu.addAction("Extract All Here...")
+        extract_here_action.triggered.connect(lambda: self.extract_selected_archives(ALL_HERE))
+
         context_menu.addSeparator()
 
         reveal_in_finder_action = QAction("Reveal in Finder")
@@ -223,6 +233,16 @@ class NavigationPane(QTreeView):
             selected_files.add(self.model().filePath(index))
         return list(selected_files)
 
+    def ensure_extractor(self):
+        if self.extractor is None:
+            from extractor import Extractor  # Brings in the job scheduler, caches and scratch space
+
+            self.extractor = Extractor(self)
+        return self.extractor
+
+    def extract_selected_archives(self, mode):
+        self.ensure_extractor().extract_batch_from_navigation_pane(self.get_current_selected_files(), mode)
+
     def compress_files(self):
         self.archiver = Archiver(self)
         file_list = self.get_current_selected_files()
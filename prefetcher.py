@@ -0,0 +1,129 @@
+import os
+
+from PySide6.QtCore import QObject, QTimer
+
+import listing_cache
+import sevenz_engine
+from job_scheduler import Job, JobScheduler, PRIORITY_LOW, FINISHED
+from preview_cache import PreviewCache
+from qsetting_manager import SettingsManager
+
+DEFAULT_MAX_ENTRY_KB = 4096  # Larger entries are left to a real open
+DEFAULT_BUDGET_MB = 32  # Bytes extracted for one selection at most
+RADIUS = 4  # Rows above and below the selection that are prefetched
+DELAY_MS = 150  # Arrowing through the list only prefetches where it stops
+
+
+class Prefetcher(QObject):
+    """Extracts small entries around the selection into the preview cache, so opening them runs no 7zz.
+
+    Off unless the prefetch setting is on. Each round is one low priority background job, a new selection
+    cancels the round before it and anything the user starts takes its slot.
+    """
+
+    def __init__(self, s7zip_bin, parent=None):
+        super().__init__(parent)
+        self.s7zip_bin = s7zip_bin
+        self.settings_manager = SettingsManager()
+        self.scheduler = JobScheduler()
+        self.preview_cache = PreviewCache()
+        self.job = None
+        self.pending = None  # (archive_path, archive_index, nodes, switches) of the next round
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.start_round)
+
+    @property
+    def enabled(self):
+        return self.settings_manager.get_value("prefetch_enabled", False) in (True, 'true')
+
+    def set_enabled(self, enabled):
+        self.settings_manager.set_value("prefetch_enabled", enabled)
+        if not enabled:
+            self.cancel()
+
+    def prefetch(self, archive_path, archive_index, nodes, switches=()):
+        """Prefetch `nodes`, the most likely to be opened first, after a short pause of the selection."""
+        self.cancel()
+        if not self.enabled or not nodes:
+            return
+        self.pending = (archive_path, archive_index, nodes, switches)
+        self.timer.start(DELAY_MS)
+
+    def cancel(self):
+        self.timer.stop()
+        self.pending = None
+        if self.job is not None:
+            self.scheduler.cancel(self.job)
+            self.job = None
+
+    def budget(self):
+        budget = int(self.settings_manager.get_value("prefetch_budget_mb", DEFAULT_BUDGET_MB)) * 1024 * 1024
+        # Never more than a quarter of the cache, prefetching must not evict what was really opened
+        return min(budget, self.preview_cache.max_size // 4)
+
+    def choose_entries(self, identity, archive_index, nodes):
+        max_entry_size = int(self.settings_manager.get_value("prefetch_max_entry_kb", DEFAULT_MAX_ENTRY_KB)) * 1024
+        budget = self.budget()
+        chosen = []
+        names = set()
+        total = 0
+        for node in nodes:
+            if archive_index.is_dir(node) or archive_index.is_encrypted(node):
+                continue
+            size = archive_index.size(node)
+            if size is None or size > max_entry_size:
+                continue
+            entry_path = archive_index.path(node)
+            name = os.path.basename(entry_path)
+            if name in names:
+                continue  # `7zz e` drops the folders, one name per round
+            crc = archive_index.crc(node)
+            if self.preview_cache.contains(identity, entry_path, crc):
+                continue
+            if total + size > budget:
+                break
+            names.add(name)
+            total += size
+            chosen.append((entry_path, crc))
+        return chosen
+
+    def start_round(self):
+        if self.pending is None:
+            return
+        archive_path, archive_index, nodes, switches = self.pending
+        self.pending = None
+        identity = listing_cache.get_identity(archive_path)
+        if identity is None:
+            return
+        chosen = self.choose_entries(identity, archive_index, nodes)
+        if not chosen:
+            return
+
+        partial_folder = self.preview_cache.reserve()
+        thread = sevenz_engine.ExtractionThread(self.s7zip_bin, archive_path, partial_folder,
+                                                [entry_path for entry_path, _ in chosen], 'e', switches)
+        # Nobody is there to answer, skip rather than wait
+        thread.password_required.connect(lambda: thread.prompts.answer(''))
+        thread.file_conflict_made.connect(lambda buffer: thread.prompts.answer('S'))
+        thread.extraction_finished.connect(lambda: self.store_entries(identity, chosen, partial_folder))
+
+        job = Job(f"Prefetch {len(chosen)} entries", thread,
+                  finished_signal=thread.extraction_finished,
+                  failed_signal=thread.extraction_failed,
+                  break_signal=thread.extraction_break,
+                  pause=thread.pause_extraction,
+                  resume=thread.resume_extraction,
+                  cancel=thread.stop_extraction,
+                  priority=PRIORITY_LOW,
+                  background=True)
+        job.changed.connect(
+            lambda: job.is_done and job.state != FINISHED and self.preview_cache.discard(partial_folder))
+        self.job = self.scheduler.submit(job)
+
+    def store_entries(self, identity, chosen, partial_folder):
+        for entry_path, crc in chosen:
+            file_path = os.path.join(partial_folder, os.path.basename(entry_path))
+            if os.path.isfile(file_path):
+                self.preview_cache.add_file(identity, entry_path, crc, file_path)
+        self.preview_cache.discard(partial_folder)
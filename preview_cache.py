@@ -0,0 +1,194 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import listing_cache
+from qsetting_manager import SettingsManager
+
+DEFAULT_MAX_SIZE_MB = 1024
+PARTIAL_PREFIX = 'partial-'
+STALE_PARTIAL_AGE = 3600  # Seconds after which an unfinished extraction of another run is removed
+
+
+def get_preview_dir():
+    return os.path.join(listing_cache.get_cache_dir(), 'previews')
+
+
+def short_hash(*parts):
+    text = '\0'.join(str(part) for part in parts)
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+
+
+def tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class PreviewCache:
+    """Entries extracted to be opened, kept on disk so opening one again needs no 7zz run.
+
+    Every entry has its own folder named after the archive path, the archive identity and the entry
+    path with its CRC, so a changed archive never serves an old entry. The folder mtime records the
+    last use, the least recently used folders go once the total exceeds max_size.
+    There is one cache per application, shared like the SettingsManager.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PreviewCache, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self.settings_manager = SettingsManager()
+        self.root = get_preview_dir()
+        self.max_size = int(self.settings_manager.get_value("preview_cache_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024
+        self.pinned = {}  # Folder -> users of a file in it (a nested archive, the clipboard), never evicted
+        self.remove_stale_partials()
+
+    def set_max_size_mb(self, size_mb):
+        self.settings_manager.set_value("preview_cache_size_mb", size_mb)
+        self.max_size = size_mb * 1024 * 1024
+        self.evict()
+
+    def identity_keys(self, identity):
+        return short_hash(identity.path), short_hash(identity.size, identity.mtime_ns, identity.inode)
+
+    def folder_name(self, identity, entry_path, crc):
+        archive_key, identity_key = self.identity_keys(identity)
+        return f"{archive_key}-{identity_key}-{short_hash(entry_path, crc)}"
+
+    def lookup(self, identity, entry_path, crc=None):
+        """Return the cached file of an entry, or None."""
+        folder = os.path.join(self.root, self.folder_name(identity, entry_path, crc))
+        path = os.path.join(folder, os.path.basename(entry_path))
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(folder)
+        except OSError:
+            return None
+        return path
+
+    def contains(self, identity, entry_path, crc=None):
+        """Like lookup() without counting as a use."""
+        folder = os.path.join(self.root, self.folder_name(identity, entry_path, crc))
+        return os.path.exists(os.path.join(folder, os.path.basename(entry_path)))
+
+    def reserve(self):
+        """Return a new empty folder to extract an entry into, hand it to commit() or discard() afterwards."""
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkdtemp(prefix=PARTIAL_PREFIX, dir=self.root)
+
+    def commit(self, identity, entry_path, crc, partial_folder):
+        """Move an extracted entry into the cache and return the path of its file."""
+        folder = os.path.join(self.root, self.folder_name(identity, entry_path, crc))
+        try:
+            os.rename(partial_folder, folder)
+        except OSError:
+            # Extracted twice at the same time, the first copy is kept
+            self.discard(partial_folder)
+        self.evict(keep=folder)
+        return os.path.join(folder, os.path.basename(entry_path))
+
+    def pin(self, path):
+        folder = os.path.dirname(path)
+        self.pinned[folder] = self.pinned.get(folder, 0) + 1
+
+    def unpin(self, path):
+        folder = os.path.dirname(path)
+        count = self.pinned.pop(folder, 0) - 1
+        if count > 0:
+            self.pinned[folder] = count
+
+    def add_file(self, identity, entry_path, crc, file_path):
+        """Move a file extracted together with other entries into the cache, return its cached path."""
+        partial_folder = self.reserve()
+        try:
+            os.rename(file_path, os.path.join(partial_folder, os.path.basename(entry_path)))
+        except OSError:
+            self.discard(partial_folder)
+            return None
+        return self.commit(identity, entry_path, crc, partial_folder)
+
+    def discard(self, partial_folder):
+        shutil.rmtree(partial_folder, ignore_errors=True)
+
+    def drop_other_identities(self, identity):
+        """Remove the entries extracted before the archive changed, called once when it is opened."""
+        archive_key, identity_key = self.identity_keys(identity)
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            parts = name.split('-')
+            folder = os.path.join(self.root, name)
+            if len(parts) == 3 and parts[0] == archive_key and parts[1] != identity_key and folder not in self.pinned:
+                shutil.rmtree(folder, ignore_errors=True)
+
+    def invalidate(self, archive_path):
+        """Forget every entry of an archive."""
+        archive_key = short_hash(os.path.realpath(archive_path))
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(archive_key + '-'):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def entries(self):
+        """(last use, size, folder) of every cached entry."""
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            if name.startswith(PARTIAL_PREFIX):
+                continue
+            folder = os.path.join(self.root, name)
+            try:
+                last_used = os.stat(folder).st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, tree_size(folder), folder))
+        return entries
+
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, folder in entries:
+            if total <= self.max_size:
+                break
+            if folder == keep or folder in self.pinned:
+                continue
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+
+    def remove_stale_partials(self):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            folder = os.path.join(self.root, name)
+            try:
+                if name.startswith(PARTIAL_PREFIX) and now - os.stat(folder).st_mtime > STALE_PARTIAL_AGE:
+                    shutil.rmtree(folder, ignore_errors=True)
+            except OSError:
+                pass
+
+    def purge(self):
+        shutil.rmtree(self.root, ignore_errors=True)
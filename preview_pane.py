@@ -0,0 +1,246 @@
+import codecs
+import os
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QStackedWidget, \
+    QPlainTextEdit, QScrollArea
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFontDatabase, QImageReader, QPixmap
+
+import sevenz_engine
+from archive_model import format_size
+
+TEXT_CHUNK = 1024 * 1024  # Read first and each time the text is scrolled to its end
+HEX_CHUNK = 64 * 1024
+MAX_BUFFER = 64 * 1024 * 1024  # Nothing past this is read, whatever the size of the entry
+MAX_IMAGE_SIZE = 32 * 1024 * 1024
+SNIFF_SIZE = 8 * 1024  # A NUL byte in here makes Auto show hex instead of text
+HEX_WIDTH = 16
+
+MODE_AUTO = 'Auto'
+MODE_TEXT = 'Text'
+MODE_HEX = 'Hex'
+MODE_IMAGE = 'Image'  # Chosen by Auto from the extension
+
+
+def format_hex_lines(data, offset):
+    """Format `data` starting at `offset` as hex dump lines of HEX_WIDTH bytes."""
+    lines = []
+    for start in range(0, len(data), HEX_WIDTH):
+        row = data[start:start + HEX_WIDTH]
+        hex_part = ' '.join(f'{byte:02x}' for byte in row)
+        text_part = ''.join(chr(byte) if 32 <= byte < 127 else '.' for byte in row)
+        lines.append(f'{offset + start:08x}  {hex_part:<{HEX_WIDTH * 3 - 1}}  |{text_part}|')
+    return '\n'.join(lines)
+
+
+def is_image_entry(entry_path):
+    extension = os.path.splitext(entry_path)[1][1:].lower().encode()
+    return bool(extension) and extension in [bytes(name) for name in QImageReader.supportedImageFormats()]
+
+
+class PreviewPane(QWidget):
+    """Shows the selected entry as text, image or hex, read through 7zz into memory only.
+
+    Text and hex start with the first chunk of the entry, scrolling to the end reads the next one,
+    up to MAX_BUFFER. Selecting something else kills the running 7zz at once.
+    """
+
+    def __init__(self, s7zip_bin, parent=None):
+        super().__init__(parent)
+        self.s7zip_bin = s7zip_bin
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([MODE_AUTO, MODE_TEXT, MODE_HEX])
+        self.mode_combo.currentIndexChanged.connect(self.render)
+        self.status_label = QLabel()
+
+        fixed_font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        self.text_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text_view.setFont(fixed_font)
+        self.text_view.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_area = QScrollArea()
+        self.image_area.setWidgetResizable(True)
+        self.image_area.setWidget(self.image_label)
+
+        self.message_label = QLabel()
+        self.message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.message_label.setWordWrap(True)
+
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.message_label)
+        self.stack.addWidget(self.text_view)
+        self.stack.addWidget(self.image_area)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(self.status_label, 1)
+        top_layout.addWidget(self.mode_combo)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top_layout)
+        layout.addWidget(self.stack)
+        self.setLayout(layout)
+
+        self.worker = None
+        self.retired_workers = []
+        self.entry_path = None
+        self.size = None
+        self.is_image = False
+        self.buffer = bytearray()
+        self.requested = 0  # Bytes asked from the worker so far
+        self.complete = False
+        self.rendered_kind = None
+        self.rendered_length = 0  # Bytes of the buffer already in the text view
+        self.decoder = None
+        self.clear()
+
+    def show_entry(self, archive_path, entry_path, size=None, switches=()):
+        self.clear()
+        self.entry_path = entry_path
+        self.size = size
+        self.is_image = is_image_entry(entry_path)
+        if self.is_image and size is not None and size > MAX_IMAGE_SIZE:
+            self.show_message(f"{os.path.basename(entry_path)} is too large to preview.")
+            return
+
+        # An image is only shown once it is complete, anything else starts with its first chunk
+        self.requested = MAX_IMAGE_SIZE if self.is_image else TEXT_CHUNK
+        self.worker = sevenz_engine.PreviewStreamWorker(self.s7zip_bin, archive_path, entry_path, self.requested,
+                                                        switches)
+        self.worker.data_ready.connect(self.on_data_ready)
+        self.worker.stream_finished.connect(self.on_stream_finished)
+        self.worker.stream_failed.connect(self.on_stream_failed)
+        self.worker.start()
+        self.show_message("Loading…")
+        self.update_status()
+
+    def clear(self):
+        self.stop_worker()
+        self.entry_path = None
+        self.buffer = bytearray()
+        self.requested = 0
+        self.complete = False
+        self.rendered_kind = None
+        self.text_view.clear()
+        self.image_label.clear()
+        self.status_label.setText("")
+        self.show_message("Select a file to preview it.")
+
+    def stop_worker(self):
+        worker = self.worker
+        if worker is None:
+            return
+        self.worker = None
+        worker.data_ready.disconnect(self.on_data_ready)
+        worker.stream_finished.disconnect(self.on_stream_finished)
+        worker.stream_failed.disconnect(self.on_stream_failed)
+        worker.cancel()
+
+        # Keep a reference until the thread is really gone
+        if worker.isFinished():
+            return
+        self.retired_workers.append(worker)
+        worker.finished.connect(lambda: self.retired_workers.remove(worker))
+
+    def show_message(self, text):
+        self.message_label.setText(text)
+        self.stack.setCurrentWidget(self.message_label)
+
+    def on_data_ready(self, chunk):
+        self.buffer += chunk
+        self.render()
+
+    def on_stream_finished(self):
+        self.complete = True
+        self.stop_worker()
+        self.render()
+
+    def on_stream_failed(self, message):
+        self.stop_worker()
+        self.show_message(f"Cannot preview {os.path.basename(self.entry_path)}.\n\n{message.strip()}")
+        self.status_label.setText("")
+
+    def kind(self):
+        mode = self.mode_combo.currentText()
+        if mode != MODE_AUTO:
+            return mode
+        if self.is_image:
+            return MODE_IMAGE
+        if len(self.buffer) < SNIFF_SIZE and not self.complete:
+            return None  # Too little to tell yet
+        return MODE_HEX if b'\0' in self.buffer[:SNIFF_SIZE] else MODE_TEXT
+
+    def render(self):
+        if self.entry_path is None:
+            return
+        kind = self.kind()
+        if kind == MODE_IMAGE:
+            if self.complete:
+                self.render_image()
+        elif kind is not None and (self.buffer or self.complete):
+            if kind != self.rendered_kind:
+                self.rendered_kind = kind
+                self.rendered_length = 0
+                self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                self.text_view.clear()
+            self.stack.setCurrentWidget(self.text_view)
+            self.append_text(kind)
+        self.update_status()
+
+    def render_image(self):
+        pixmap = QPixmap()
+        if pixmap.loadFromData(bytes(self.buffer)):
+            self.image_label.setPixmap(pixmap)
+            self.stack.setCurrentWidget(self.image_area)
+        else:
+            self.show_message(f"{os.path.basename(self.entry_path)} is not an image Qt can read.")
+
+    def append_text(self, kind):
+        if kind == MODE_TEXT:
+            new_data = bytes(self.buffer[self.rendered_length:])
+            text = self.decoder.decode(new_data, self.complete)
+            self.rendered_length = len(self.buffer)
+        else:
+            # Only whole rows, the last partial one is shown once the entry is complete
+            end = len(self.buffer) if self.complete else len(self.buffer) - len(self.buffer) % HEX_WIDTH
+            text = format_hex_lines(self.buffer[self.rendered_length:end], self.rendered_length)
+            if text and self.rendered_length:
+                text = '\n' + text
+            self.rendered_length = end
+        if not text:
+            return
+        # Appending must not move the view, the user may be reading the top
+        scroll_bar = self.text_view.verticalScrollBar()
+        position = scroll_bar.value()
+        cursor = self.text_view.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(text)
+        scroll_bar.setValue(position)
+
+    def on_scrolled(self, value):
+        scroll_bar = self.text_view.verticalScrollBar()
+        if value < scroll_bar.maximum() or self.worker is None:
+            return
+        if len(self.buffer) < self.requested or self.requested >= MAX_BUFFER:
+            return  # The last chunk is still coming, or the preview is as long as it gets
+        chunk = HEX_CHUNK if self.rendered_kind == MODE_HEX else TEXT_CHUNK
+        chunk = min(chunk, MAX_BUFFER - self.requested)
+        self.requested += chunk
+        self.worker.read_more(chunk)
+        self.update_status()
+
+    def update_status(self):
+        if self.entry_path is None:
+            return
+        name = os.path.basename(self.entry_path)
+        if self.complete:
+            self.status_label.setText(f"{name} - {format_size(len(self.buffer))}")
+            return
+        total = f" of {format_size(self.size)}" if self.size is not None else ""
+        note = " (preview limit reached)" if len(self.buffer) >= MAX_BUFFER else ""
+        self.status_label.setText(f"{name} - {format_size(len(self.buffer))}{total} loaded{note}")
@@ -0,0 +1,176 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import system_resources
+from preview_cache import tree_size
+from qsetting_manager import SettingsManager
+
+DEFAULT_QUOTA_MB = 4096
+MEMORY_DIR = '/dev/shm'
+SMALL_ITEM_SIZE = 64 * 1024 * 1024  # Items up to this size may be kept in memory
+MEMORY_RESERVE = system_resources.GIB  # Memory a RAM item must leave free for everything else
+SESSION_PREFIX = 'session-'
+
+
+def get_scratch_name():
+    # One folder per user, other users' sessions are none of our business
+    return f'7zGUI-scratch-{os.getuid()}' if hasattr(os, 'getuid') else '7zGUI-scratch'
+
+
+def get_disk_root():
+    return os.path.join(tempfile.gettempdir(), get_scratch_name())
+
+
+def get_memory_root():
+    """Folder on a RAM backed file system, None where there is none."""
+    if os.path.isdir(MEMORY_DIR) and os.access(MEMORY_DIR, os.W_OK):
+        return os.path.join(MEMORY_DIR, get_scratch_name())
+    return None
+
+
+def is_process_running(pid):
+    if sys.platform == "win32":
+        return True  # os.kill would end the process, its folder is left alone
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class ScratchSpace:
+    """Owns every temporary extraction and work file, e.g. the files put on the clipboard and 7zz listfiles.
+
+    Each process works in its own session folder, removed on exit; folders of sessions whose process
+    is gone (after a crash) are removed on the next start. Small items go to memory when there is
+    plenty of it, the oldest items are removed to stay within the quota unless they are pinned.
+    There is one scratch space per application, shared like the SettingsManager; worker threads may use it too.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ScratchSpace, cls).__new__(cls)
+            cls._instance.initialize()
+        return cls._instance
+
+    def initialize(self):
+        self.settings_manager = SettingsManager()
+        self.quota = int(self.settings_manager.get_value("scratch_quota_mb", DEFAULT_QUOTA_MB)) * 1024 * 1024
+        self.roots = [root for root in (get_memory_root(), get_disk_root()) if root]
+        self.session_name = f'{SESSION_PREFIX}{os.getpid()}'
+        self.items = {}  # Folder -> time it was allocated
+        self.pinned = {}  # Folder -> users still working in it (a running extraction, the clipboard), never evicted
+        self.released = set()  # Pinned folders given back, removed once the last user unpins them
+        self.lock = threading.Lock()
+        self.remove_stale_sessions()
+        atexit.register(self.cleanup)
+
+    def set_quota_mb(self, quota_mb):
+        self.settings_manager.set_value("scratch_quota_mb", quota_mb)
+        self.quota = quota_mb * 1024 * 1024
+        self.make_room(0)
+
+    def allocate(self, expected_size=None):
+        """Return a new empty folder for about `expected_size` bytes, give it back with release()."""
+        self.make_room(expected_size or 0)
+        session = os.path.join(self.choose_root(expected_size), self.session_name)
+        os.makedirs(session, exist_ok=True)
+        folder = tempfile.mkdtemp(prefix='item-', dir=session)
+        with self.lock:
+            self.items[folder] = time.time()
+        return folder
+
+    def create_file(self, prefix='', suffix=''):
+        """Return (fd, path) of a new file in the session, for small work files that need no quota."""
+        session = os.path.join(get_disk_root(), self.session_name)
+        os.makedirs(session, exist_ok=True)
+        return tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=session)
+
+    def choose_root(self, expected_size):
+        memory_root = get_memory_root()
+        if memory_root is None or expected_size is None or expected_size > SMALL_ITEM_SIZE:
+            return get_disk_root()
+        # Files in memory count against the RAM, they must not push anything into swap
+        available = system_resources.available_memory()
+        try:
+            memory_free = shutil.disk_usage(MEMORY_DIR).free
+        except OSError:
+            return get_disk_root()
+        if available is None or available - expected_size < MEMORY_RESERVE or memory_free < 2 * expected_size:
+            return get_disk_root()
+        return memory_root
+
+    def pin(self, folder):
+        with self.lock:
+            self.pinned[folder] = self.pinned.get(folder, 0) + 1
+
+    def unpin(self, folder):
+        with self.lock:
+            count = self.pinned.pop(folder, 0) - 1
+            if count > 0:
+                self.pinned[folder] = count
+                return
+            if folder not in self.released:
+                return
+        self.release(folder)
+
+    def release(self, folder):
+        """Give a folder back, it is removed now or once nobody has it pinned."""
+        with self.lock:
+            if folder in self.pinned:
+                self.released.add(folder)
+                return
+            self.released.discard(folder)
+            self.items.pop(folder, None)
+        shutil.rmtree(folder, ignore_errors=True)
+
+    def usage(self):
+        with self.lock:
+            folders = list(self.items)
+        return sum(tree_size(folder) for folder in folders)
+
+    def make_room(self, needed):
+        with self.lock:
+            items = sorted(self.items, key=self.items.get)
+            pinned = set(self.pinned)
+        sizes = {folder: tree_size(folder) for folder in items}
+        total = sum(sizes.values())
+        for folder in items:
+            if total + needed <= self.quota:
+                break
+            if folder in pinned:
+                continue
+            total -= sizes[folder]
+            self.release(folder)
+
+    def remove_stale_sessions(self):
+        for root in self.roots:
+            try:
+                names = os.listdir(root)
+            except OSError:
+                continue
+            for name in names:
+                if not name.startswith(SESSION_PREFIX):
+                    continue
+                try:
+                    pid = int(name[len(SESSION_PREFIX):])
+                except ValueError:
+                    continue
+                if pid != os.getpid() and not is_process_running(pid):
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    def cleanup(self):
+        for root in self.roots:
+            shutil.rmtree(os.path.join(root, self.session_name), ignore_errors=True)
+        with self.lock:
+            self.items = {}
+            self.pinned = {}
+            self.released = set()
@@ -0,0 +1,734 @@
+"""The 7zz workers shared by the GUI and the command line, they need QtCore but no widgets."""
+import functools
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+import archive_commands
+import archive_listing
+import listing_cache
+import sevenz_process
+from archive_index import ArchiveIndex
+
+LISTFILE_MIN_ITEMS = 100  # More selected entries than this are passed to 7zz in a listfile
+
+
+def resource_path(relative_path):
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+
+def run_with_progress(command, progress_callback=None):
+    """Run a 7zz command that needs no answers, report its percentages and return (success, stderr text)."""
+    process = sevenz_process.SevenZipProcess(command, interactive=False)
+    try:
+        process.start()
+    except OSError as e:
+        return False, str(e)
+    for event in process.events():
+        if progress_callback is not None and isinstance(event, sevenz_process.ProgressEvent):
+            progress_callback(event.percent)
+    return process.wait() == 0, process.error_output
+
+
+class StderrReader:
+    """Collects the stderr of a process on a thread while its stdout is read.
+
+    Reading stderr only after stdout ended deadlocks once 7zz fills the stderr pipe, e.g. with the
+    errors of a damaged archive. At most MAX_SIZE bytes are kept, the rest is read and dropped.
+    """
+    MAX_SIZE = 1024 * 1024
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.data = bytearray()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        for chunk in iter(lambda: self.stream.read(self.CHUNK_SIZE), b''):
+            if len(self.data) < self.MAX_SIZE:
+                self.data += chunk[:self.MAX_SIZE - len(self.data)]
+        self.stream.close()
+
+    def text(self):
+        """Wait for the end of stderr and return it."""
+        self.thread.join()
+        return self.data.decode('utf-8', 'replace')
+
+
+@functools.lru_cache(maxsize=None)
+def determine_7zip_binary():
+    # Looked up once, every Extractor, Archiver and pane shares the result
+    if sys.platform == "win32":
+        return ""  # Path to 7-Zip binary on Windows
+
+    elif sys.platform == "darwin":
+        if 'APP_SANDBOX_CONTAINER_ID' in os.environ:
+            return resource_path('./bin/macos/7zz-mango')
+        return "./bin/macos/7zz"
+
+    elif sys.platform.startswith("linux"):
+        return ""  # Path to 7-Zip binary on Linux
+
+    else:
+        raise Exception("Unsupported OS platform")
+
+
+def get_supported_extensions():
+    return (
+        '.7z', '.apfs', '.img', '.apm', '.ar', '.a', '.deb', '.udeb', '.lib', '.arj', '.b64', '.obj', '.cab',
+        '.chm',
+        '.chi', '.chq', '.chw',
+        '.msi', '.msp', '.doc', '.xls', '.ppt', '.cpio', '.cramfs', '.dmg', '.elf', '.ext', '.ext2', '.ext3',
+        '.ext4',
+        '.fat', '.flv', '.gpt',
+        '.mbr', '.hfs', '.hfsx', '.hxs', '.hxi', '.hxr', '.hxq', '.hxw', '.lit', '.ihex', '.iso', '.lpimg', '.lzh',
+        '.lha', '.mbr', '.macho',
+        '.mslz', '.mub', '.ntfs', '.nsis', '.exe', '.dll', '.sys', '.pmd', '.qcow', '.qcow2', '.qcow2c', '.rar',
+        '.r00',
+        '.rpm', '.swf', '.simg',
+        '.001', '.squashfs', '.te', '.scap', '.uefif', '.udf', '.vdi', '.vhd', '.vhdx', '.avhdx', '.vmdk', '.xar',
+        '.pkg', '.xip', '.z', '.taz', '.zip',
+        '.bz2', '.bzip2', '.tbz2', '.tbz', '.gz', '.gzip', '.tgz', '.tpz', '.apk', '.lzma', '.lzma86', '.tar',
+        '.ova',
+        '.wim', '.swm', '.esd', '.ppkg', '.xz', '.txz')
+
+
+class ExtractionThread(QThread):
+    progress_updated = Signal(int, str)
+    extraction_finished = Signal()
+    extraction_break = Signal()
+    extraction_failed = Signal(str)
+    file_conflict_made = Signal(str)
+    password_required = Signal()
+
+    PROMPT_TIMEOUT = 30 * 60  # Seconds a question may stay unanswered before the extraction is abandoned
+
+    def __init__(self, s7zip_bin, file_path, destination, selected_items, command_option, switches=()):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.file_path = file_path
+        self.destination = destination
+        self.master_fd = None
+        self.paused = False
+        self.stop_requested = False
+        self.process = None
+        self.prompts = sevenz_process.PromptChannel()
+        self.command_option = command_option
+        self.selected_items = selected_items
+        self.switches = list(switches)  # e.g. a password or an overwrite mode chosen up front
+
+    def run(self):
+        if len(self.selected_items) <= LISTFILE_MIN_ITEMS:
+            self.extract(self.selected_items)
+            return
+        # Thousands of paths, e.g. all search matches, would overflow the command line
+        listfile_path = archive_commands.write_listfile(self.selected_items)
+        try:
+            self.extract(['-scsUTF-8', '@' + listfile_path])
+        finally:
+            archive_commands.remove_listfile(listfile_path)
+
+    def extract(self, selected_items):
+        command = [self.s7zip_bin, self.command_option, self.file_path, *selected_items, '-o' + self.destination,
+                   '-bsp1', *self.switches]
+
+        print(command)
+
+        self.process = sevenz_process.SevenZipProcess(command)
+        try:
+            self.process.start()
+        except OSError as e:
+            self.extraction_failed.emit(str(e))
+            return
+
+        for event in self.process.events():
+            if isinstance(event, sevenz_process.ProgressEvent):
+                self.progress_updated.emit(event.percent, f"Extracting... {event.text}")
+
+            elif isinstance(event, sevenz_process.PromptEvent):
+                self.answer_prompt(event)
+
+        # After extraction process ends
+        return_code = self.process.wait()
+        error_message = self.process.error_output
+        if self.stop_requested and return_code != 0:
+            self.extraction_break.emit()
+        elif not error_message:
+            self.extraction_finished.emit()
+        elif "Break signaled" in error_message:
+            self.extraction_break.emit()
+        else:
+            self.extraction_failed.emit(error_message)
+
+    def answer_prompt(self, event):
+        if event.kind == sevenz_process.PROMPT_OVERWRITE:
+            send_question = lambda: self.file_conflict_made.emit(event.text)
+            give_up = 'Q'
+        else:
+            send_question = self.password_required.emit
+            give_up = ''
+        try:
+            reply = self.prompts.ask(send_question, self.PROMPT_TIMEOUT)
+        except sevenz_process.PromptCancelled:
+            reply = None
+        if reply is None:
+            # Nobody answered in time or the extraction was stopped
+            self.stop_requested = True
+            self.process.answer(give_up)
+            self.process.kill()
+            return
+        self.process.answer(reply)
+
+    def pause_extraction(self):
+        if self.process:
+            self.process.send_signal(signal.SIGSTOP)
+            self.paused = True
+
+    def resume_extraction(self):
+        if self.process and self.paused:
+            self.process.send_signal(signal.SIGCONT)
+            self.paused = False
+
+    def stop_extraction(self):
+        self.prompts.cancel()
+        if self.process:
+            self.process.send_signal(signal.SIGTERM)
+            self.stop_requested = True
+
+
+class ArchivingThread(QThread):
+    progress_updated = Signal(int, str)
+    archive_failed = Signal(str)
+    archive_finished = Signal()
+    archive_break = Signal()
+
+    def __init__(self, s7zip_bin, source_files, destination, archive_type, password=None, compression_level='normal',
+                 switches=()):
+        super().__init__()
+        self.stop_requested = None
+        self.s7zip_bin = s7zip_bin
+        self.source_files = source_files
+        self.destination = destination
+        self.archive_type = archive_type
+        self.password = password
+        self.compression_level = compression_level
+        self.switches = list(switches)  # Threads, dictionary, word and solid block size
+        self.process = None
+        self.paused = False
+
+    def run(self):
+        command = [
+            self.s7zip_bin,
+            'a',  # 'a' command to add files to the archive
+            '-t' + self.archive_type,  # Archive type (e.g., zip, 7z)
+            self.destination,  # Destination archive file
+        ]
+
+        # List of source files to be archived
+        command.extend(self.source_files)
+
+        command.append('-bsp1')
+
+        # If password is provided, add it to the command
+        if self.password:
+            command += ['-p' + self.password]
+
+        # Add compression level if provided
+        if self.compression_level:
+            command += ['-mx=' + self.compression_level]
+
+        command += self.switches
+
+        print(command)
+
+        # Start the 7-Zip process, it never needs an answer on stdin
+        self.process = sevenz_process.SevenZipProcess(command, interactive=False)
+        try:
+            self.process.start()
+        except OSError as e:
+            self.archive_failed.emit(str(e))
+            return
+
+        for event in self.process.events():
+            if isinstance(event, sevenz_process.ProgressEvent):
+                self.progress_updated.emit(event.percent, f"Archiving... {event.text}")
+
+        # After extraction process ends
+        return_code = self.process.wait()
+        error_message = self.process.error_output
+        if self.stop_requested and return_code != 0:
+            self.archive_break.emit()
+        elif not error_message:
+            self.archive_finished.emit()
+        elif "Break signaled" in error_message:
+            self.archive_break.emit()
+        else:
+            self.archive_failed.emit(error_message)
+
+    def pause_archive(self):
+        if self.process:
+            self.process.send_signal(signal.SIGSTOP)
+            self.paused = True
+
+    def resume_archive(self):
+        if self.process and self.paused:
+            self.process.send_signal(signal.SIGCONT)
+            self.paused = False
+
+    def stop_archive(self):
+        if self.process:
+            self.process.send_signal(signal.SIGTERM)
+            self.stop_requested = True
+
+
+class AddFilesThread(QThread):
+    progress_updated = Signal(int, str)
+    add_files_failed = Signal(str)
+    add_files_finished = Signal()
+    archive_break = Signal()
+
+    def __init__(self, s7zip_bin, archive_path, files_to_add, sub_dir=None):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.files_to_add = files_to_add
+        self.sub_dir = sub_dir  # The subdirectory within the archive where files will be added
+        self.process = None
+        self.process = None
+        self.paused = False
+        self.stop_requested = None
+
+    def run(self):
+
+        command = [
+            self.s7zip_bin,
+            'a',  # 'a' command to add files to the archive
+            self.archive_path,  # Archive to which files will be added
+        ]
+
+        if self.sub_dir:
+            # If a subdirectory is specified, prepend it to each file
+            command.extend([f"{self.sub_dir}/{file}" for file in self.files_to_add])
+        else:
+            command.extend(self.files_to_add)
+
+        command.append('-bsp1')
+
+        self.process = sevenz_process.SevenZipProcess(command, interactive=False)
+        try:
+            self.process.start()
+        except OSError as e:
+            self.add_files_failed.emit(str(e))
+            return
+
+        for event in self.process.events():
+            if isinstance(event, sevenz_process.ProgressEvent):
+                self.progress_updated.emit(event.percent, f"Adding files... {event.text}")
+
+        return_code = self.process.wait()
+        error_message = self.process.error_output
+        if self.stop_requested and return_code != 0:
+            self.archive_break.emit()
+        elif not error_message:
+            self.add_files_finished.emit()
+        else:
+            self.add_files_failed.emit(error_message)
+
+    def pause_archive(self):
+        if self.process:
+            self.process.send_signal(signal.SIGSTOP)
+            self.paused = True
+
+    def resume_archive(self):
+        if self.process and self.paused:
+            self.process.send_signal(signal.SIGCONT)
+            self.paused = False
+
+    def stop_archive(self):
+        if self.process:
+            self.process.send_signal(signal.SIGTERM)
+            self.stop_requested = True
+
+
+class RenameFilesThread(QThread):
+    rename_files_finished = Signal()
+    rename_files_failed = Signal(str)
+
+    def __init__(self, s7zip_bin, files_to_add, archive_path, sub_dir):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.files_to_add = files_to_add
+        self.archive_path = archive_path
+        self.sub_dir = sub_dir
+        self.process = None
+
+    def run(self):
+        # Move every added item below sub_dir with one rewrite of the archive
+        rename_pairs = []
+        for file in self.files_to_add:
+            # Extract just the filename from the file path
+            filename = os.path.basename(file.rstrip(os.sep))
+            rename_pairs.append((filename, f"{self.sub_dir}/{filename}"))
+
+        listfile_path = archive_commands.write_listfile(archive_commands.rename_listfile_names(rename_pairs))
+        command = archive_commands.get_rename_command(self.s7zip_bin, self.archive_path, listfile_path)
+        try:
+            success, error_message = run_with_progress(command)
+        finally:
+            archive_commands.remove_listfile(listfile_path)
+
+        if success:
+            # If all files are renamed successfully, emit the finish signal
+            self.rename_files_finished.emit()
+        else:
+            self.rename_files_failed.emit(f"Failed to rename files. Error: {error_message}")
+
+
+class DeleteWorker(QThread):
+    """Deletes any number of entries with a single `7zz d`, so the archive is rewritten once."""
+    finished = Signal(bool, str)
+    progress_updated = Signal(int)
+
+    def __init__(self, s7zip_bin, archive_path, item_full_paths, switches=()):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.item_full_paths = item_full_paths
+        self.switches = switches  # e.g. the code page the names were listed with
+
+    def run(self):
+        listfile_path = archive_commands.write_listfile(self.item_full_paths)
+        command = archive_commands.get_delete_command(self.s7zip_bin, self.archive_path, listfile_path,
+                                                      self.switches)
+        try:
+            success, error_message = run_with_progress(command, self.progress_updated.emit)
+        finally:
+            archive_commands.remove_listfile(listfile_path)
+        self.finished.emit(success, "" if success else f"Failed to delete the file.\n{error_message}".strip())
+
+
+class RenameWorker(QThread):
+    """Renames any number of entries with a single `7zz rn`, so the archive is rewritten once."""
+    finished = Signal(bool, str)
+    progress_updated = Signal(int)
+
+    def __init__(self, s7zip_bin, archive_path, rename_pairs, switches=()):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.rename_pairs = rename_pairs
+        self.switches = switches
+
+    def run(self):
+        listfile_path = archive_commands.write_listfile(archive_commands.rename_listfile_names(self.rename_pairs))
+        command = archive_commands.get_rename_command(self.s7zip_bin, self.archive_path, listfile_path,
+                                                      self.switches)
+        try:
+            success, error_message = run_with_progress(command, self.progress_updated.emit)
+        finally:
+            archive_commands.remove_listfile(listfile_path)
+        self.finished.emit(success, "" if success else f"Failed to rename the file.\n{error_message}".strip())
+
+
+class TestArchiveWorker(QThread):
+    finished = Signal(str)
+
+    def __init__(self, archive_path, s7zip_bin):
+        super().__init__()
+        self.archive_path = archive_path
+        self.s7zip_bin = s7zip_bin
+        self.passed = False
+
+    def run(self):
+        # 7zz prints the names as UTF-8, nothing has to be detected
+        command = [self.s7zip_bin, 't', '-sccUTF-8', self.archive_path]
+        try:
+            raw_output = subprocess.check_output(command)
+            output = raw_output.decode('utf-8', 'replace')
+            self.passed = True
+            self.finished.emit(output)
+        except (subprocess.CalledProcessError, OSError):
+            self.finished.emit("Failed to test the archive.")
+
+
+class StreamEntryWorker(QThread):
+    """Writes one entry of an archive to a file through `7zz e -so`, without any temp folder of 7zz."""
+    progress_updated = Signal(int, str)
+    stream_finished = Signal()
+    stream_break = Signal()
+    stream_failed = Signal(str)
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, s7zip_bin, archive_path, entry_path, destination, switches=(), size=None):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.entry_path = entry_path
+        self.destination = destination
+        self.switches = list(switches)
+        self.size = size  # Unpacked size from the listing, for the progress only
+        self.process = None
+        self.cancelled = False
+
+    def run(self):
+        command = archive_commands.get_stream_command(self.s7zip_bin, self.archive_path, self.entry_path,
+                                                      self.switches)
+        name = os.path.basename(self.entry_path)
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE)
+            stderr_reader = StderrReader(self.process.stderr)
+            with open(self.destination, 'wb') as destination:
+                written = 0
+                while not self.cancelled:
+                    chunk = self.process.stdout.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    destination.write(chunk)
+                    written += len(chunk)
+                    if self.size:
+                        self.progress_updated.emit(min(99, written * 100 // self.size), f"Reading {name}...")
+        except OSError as e:
+            if self.process is not None:
+                self.process.kill()
+                self.process.wait()
+            self.stream_failed.emit(str(e))
+            return
+
+        self.process.stdout.close()
+        return_code = self.process.wait()
+        error_message = stderr_reader.text()
+        if self.cancelled:
+            self.stream_break.emit()
+        elif return_code != 0:
+            self.stream_failed.emit(error_message or f"7zz could not read {self.entry_path}.")
+        else:
+            self.stream_finished.emit()
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+class PreviewStreamWorker(QThread):
+    """Reads the start of an entry through `7zz e -so` into memory, more is read only when asked for.
+
+    While nothing more is wanted the pipe stays full and 7zz waits on it, so a preview of a huge entry
+    decompresses little more than what is shown. Nothing is written to disk.
+    """
+    data_ready = Signal(bytes)
+    stream_finished = Signal()  # The whole entry was read
+    stream_failed = Signal(str)
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, s7zip_bin, archive_path, entry_path, limit, switches=()):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.entry_path = entry_path
+        self.limit = limit  # Bytes to read before waiting for read_more()
+        self.switches = list(switches)
+        self.process = None
+        self.cancelled = False
+        self.condition = threading.Condition()
+
+    def run(self):
+        command = archive_commands.get_stream_command(self.s7zip_bin, self.archive_path, self.entry_path,
+                                                      self.switches)
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE)
+        except OSError as e:
+            self.stream_failed.emit(str(e))
+            return
+        stderr_reader = StderrReader(self.process.stderr)
+
+        received = 0
+        while True:
+            with self.condition:
+                while received >= self.limit and not self.cancelled:
+                    self.condition.wait()
+                if self.cancelled:
+                    break
+                wanted = min(self.CHUNK_SIZE, self.limit - received)
+            chunk = self.process.stdout.read1(wanted)
+            if not chunk:
+                break
+            received += len(chunk)
+            self.data_ready.emit(chunk)
+
+        if self.cancelled:
+            self.process.kill()
+            self.process.wait()
+            return
+        if self.process.wait() != 0:
+            self.stream_failed.emit(stderr_reader.text() or f"7zz could not read {self.entry_path}.")
+        else:
+            self.stream_finished.emit()
+
+    def read_more(self, size):
+        with self.condition:
+            self.limit += size
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify()
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+class ListArchiveWorker(QThread):
+    entries_ready = Signal(list)
+    index_loaded = Signal(object)  # A whole ArchiveIndex restored from the listing cache
+    listing_finished = Signal()
+    listing_failed = Signal(str)
+
+    BATCH_SIZE = 2000
+    BATCH_INTERVAL = 0.1  # Seconds between two batches at most
+    DETECT_SAMPLE_SIZE = 64 * 1024
+
+    def __init__(self, s7zip_bin, archive_path, force_utf8=False, cache=None, code_page=None):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+        self.force_utf8 = force_utf8  # Skip the fallback detection, for a 7zz that ignores -sccUTF-8
+        self.cache = cache
+        self.code_page = code_page  # -mcp for archives whose names are not stored as Unicode
+        self.cache_variant = 'utf-8' if force_utf8 else 'detect'
+        if code_page:
+            self.cache_variant += f':{code_page}'
+        self.identity = None  # Taken before listing so a file changed meanwhile is not cached as current
+        self.from_cache = False
+        self.process = None
+        self.cancelled = False
+
+    def run(self):
+        if self.cache is not None:
+            self.identity = listing_cache.get_identity(self.archive_path)
+            if self.identity is not None and self.load_cached_index():
+                return
+
+        command = archive_listing.get_list_command(self.s7zip_bin, self.archive_path, self.code_page)
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            self.listing_failed.emit(str(e))
+            return
+        stderr_reader = StderrReader(self.process.stderr)
+
+        # The names in a bounded sample of the listing are checked, the rest is streamed
+        sample_lines = []
+        if self.force_utf8:
+            encoding = 'utf-8'
+        else:
+            sample_size = 0
+            for raw_line in self.process.stdout:
+                sample_lines.append(raw_line)
+                sample_size += len(raw_line)
+                if sample_size >= self.DETECT_SAMPLE_SIZE:
+                    break
+            encoding = archive_listing.detect_name_encoding(sample_lines)
+
+        batch = []
+        last_emit = time.monotonic()
+        lines = itertools.chain(sample_lines, self.process.stdout)
+        for entry in archive_listing.iter_slt_entries(lines, encoding):
+            if self.cancelled:
+                break
+            batch.append(entry)
+            if len(batch) >= self.BATCH_SIZE or time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                self.entries_ready.emit(batch)
+                batch = []
+                last_emit = time.monotonic()
+
+        if self.cancelled:
+            self.process.stdout.close()
+            self.process.wait()
+            return
+
+        if batch:
+            self.entries_ready.emit(batch)
+
+        if self.process.wait() != 0:
+            self.listing_failed.emit(stderr_reader.text())
+        else:
+            self.listing_finished.emit()
+
+    def load_cached_index(self):
+        data = self.cache.load(self.identity, self.cache_variant)
+        if data is None:
+            return False
+        try:
+            archive_index = ArchiveIndex.from_bytes(data)
+        except ValueError:
+            self.cache.invalidate(self.archive_path)
+            return False
+        if self.cancelled:
+            return True
+        self.from_cache = True
+        self.index_loaded.emit(archive_index)
+        self.listing_finished.emit()
+        return True
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+class ArchiveSummaryWorker(QThread):
+    """Reads the file count and total size 7zz reports for an archive, used to verify a patched listing.
+
+    7zz prints every entry before the totals and all of it is read, only parsing the entries is saved
+    compared with a relist. Meant for small archives.
+    """
+    summary_ready = Signal(object)  # (ArchiveIdentity, files, size), None if 7zz failed
+
+    def __init__(self, s7zip_bin, archive_path):
+        super().__init__()
+        self.s7zip_bin = s7zip_bin
+        self.archive_path = archive_path
+
+    def run(self):
+        identity = listing_cache.get_identity(self.archive_path)
+        command = archive_listing.get_summary_command(self.s7zip_bin, self.archive_path)
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+        except OSError:
+            self.summary_ready.emit(None)
+            return
+        summary = archive_listing.read_summary(process.stdout)
+        process.stdout.read()
+        if process.wait() != 0 or summary is None or identity is None:
+            self.summary_ready.emit(None)
+        else:
+            self.summary_ready.emit((identity, *summary))
+
+
+class StoreListingWorker(QThread):
+    """Writes a serialized listing to the listing cache off the GUI thread."""
+
+    def __init__(self, cache, identity, data, variant):
+        super().__init__()
+        self.cache = cache
+        self.identity = identity
+        self.data = data
+        self.variant = variant
+
+    def run(self):
+        self.cache.store(self.identity, self.data, self.variant)
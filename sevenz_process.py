@@ -0,0 +1,232 @@
+import codecs
+import queue
+import re
+import subprocess
+import threading
+from collections import namedtuple
+
+# Events produced from the output of a running 7zz
+ProgressEvent = namedtuple('ProgressEvent', ['percent', 'files', 'current', 'text'])  # One -bsp1 progress frame
+FileEvent = namedtuple('FileEvent', ['operation', 'path'])  # A file was started, from -bb1 log lines
+PromptEvent = namedtuple('PromptEvent', ['kind', 'text'])  # 7zz waits for an answer on stdin
+LogEvent = namedtuple('LogEvent', ['line'])
+ErrorEvent = namedtuple('ErrorEvent', ['message'])  # A line 7zz wrote to stderr
+
+PROMPT_OVERWRITE = 'overwrite'
+PROMPT_PASSWORD = 'password'
+
+OVERWRITE_HEADER = 'Would you like to replace'
+OVERWRITE_QUESTION = '(Q)uit?'
+
+# Text up to a line end, a carriage return or the backspaces 7zz uses to redraw its progress line
+SEGMENT = re.compile(r'([^\r\n\x08]*)([\r\n\x08]+)')
+PROGRESS_FRAME = re.compile(r'(\d{1,3})%(?:\s+(\d+))?(?:\s+(\S)\s+(.*))?')
+FILE_LINE = re.compile(r'([-+=UDRT]) (.+)')
+
+
+class OutputParser:
+    """Turns the stdout of 7zz into events.
+
+    Text is fed in arbitrary chunks. Progress frames, which 7zz redraws many times per second,
+    are collapsed to the latest one per chunk. Prompts are recognised in the unterminated tail,
+    since 7zz does not end them with a newline.
+    """
+
+    def __init__(self):
+        self.pending = ''
+        self.prompt_lines = None  # Lines of an overwrite question while it is being printed
+
+    def feed(self, text):
+        events = []
+        progress = None
+        data = self.pending + text
+        end = 0
+        for match in SEGMENT.finditer(data):
+            end = match.end()
+            line = match.group(1)
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            frame = PROGRESS_FRAME.fullmatch(stripped)
+            if frame is not None:
+                percent, files, _, current = frame.groups()
+                progress = ProgressEvent(int(percent), int(files) if files else None, current or '', stripped)
+                continue
+
+            if self.prompt_lines is not None:
+                self.prompt_lines.append(line)
+            elif OVERWRITE_HEADER in stripped:
+                self.prompt_lines = []
+            else:
+                file_line = FILE_LINE.fullmatch(stripped) if '\n' in match.group(2) else None
+                if file_line is not None:
+                    events.append(FileEvent(*file_line.groups()))
+                else:
+                    events.append(LogEvent(stripped))
+
+        if progress is not None:
+            events.append(progress)
+
+        self.pending = data[end:]
+        events.extend(self.check_prompt())
+        return events
+
+    def check_prompt(self):
+        tail = self.pending.rstrip()
+        if self.prompt_lines is not None and tail.endswith(OVERWRITE_QUESTION):
+            # Same layout the conflict dialog expects: both file descriptions, then the question
+            text = '\n'.join(self.prompt_lines + [self.pending])
+            self.prompt_lines = None
+            self.pending = ''
+            return [PromptEvent(PROMPT_OVERWRITE, text)]
+        if 'Enter password' in tail and tail.endswith(':'):
+            self.pending = ''
+            return [PromptEvent(PROMPT_PASSWORD, tail)]
+        return []
+
+    def flush(self):
+        events = []
+        if self.prompt_lines:
+            events.extend(LogEvent(line.strip()) for line in self.prompt_lines if line.strip())
+        stripped = self.pending.strip()
+        if stripped:
+            events.append(LogEvent(stripped))
+        self.pending = ''
+        self.prompt_lines = None
+        return events
+
+
+class PromptCancelled(Exception):
+    pass
+
+
+class PromptChannel:
+    """Carries one question at a time from a worker thread to the GUI and the answer back.
+
+    The worker blocks in ask() on a condition variable, answer() and cancel() wake it immediately.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = False
+        self.reply = None
+        self.cancelled = False
+
+    def ask(self, send_question, timeout=None):
+        """Call send_question() and wait for the answer.
+
+        Returns the answer, or None if nobody answered within `timeout` seconds.
+        Raises PromptCancelled if cancel() was called before or while waiting.
+        """
+        with self.condition:
+            if self.cancelled:
+                raise PromptCancelled()
+            self.pending = True
+            self.reply = None
+            send_question()
+            answered = self.condition.wait_for(lambda: not self.pending or self.cancelled, timeout)
+            self.pending = False
+            if self.cancelled:
+                raise PromptCancelled()
+            return self.reply if answered else None
+
+    def answer(self, reply):
+        """Deliver an answer, returns False if no question is waiting for one (e.g. it timed out)."""
+        with self.condition:
+            if not self.pending:
+                return False
+            self.reply = reply
+            self.pending = False
+            self.condition.notify_all()
+            return True
+
+    def cancel(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
+
+
+class SevenZipProcess:
+    """Runs 7zz and yields typed events from its output.
+
+    stdout and stderr are read as bytes in large chunks by two reader threads and decoded incrementally,
+    so verbose output costs a few Python calls per chunk rather than one per byte.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, command, interactive=True, encoding='utf-8'):
+        self.command = command
+        self.interactive = interactive  # Without it stdin is closed, a prompt makes 7zz fail instead of waiting
+        self.encoding = encoding
+        self.popen = None
+        self.chunks = queue.Queue()
+        self.error_lines = []
+
+    def start(self):
+        """Start 7zz, raises OSError if it cannot be run."""
+        self.popen = subprocess.Popen(self.command, stdin=subprocess.PIPE if self.interactive else subprocess.DEVNULL,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        for stream, name in ((self.popen.stdout, 'stdout'), (self.popen.stderr, 'stderr')):
+            threading.Thread(target=self.read_stream, args=(stream, name), daemon=True).start()
+
+    def read_stream(self, stream, name):
+        try:
+            while True:
+                chunk = stream.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.chunks.put((name, chunk))
+        except (OSError, ValueError):
+            pass
+        self.chunks.put((name, None))
+
+    def events(self):
+        """Yield events until both output streams are closed."""
+        parser = OutputParser()
+        decoders = {name: codecs.getincrementaldecoder(self.encoding)('replace') for name in ('stdout', 'stderr')}
+        error_pending = ''
+        open_streams = 2
+        while open_streams:
+            name, chunk = self.chunks.get()
+            final = chunk is None
+            if final:
+                open_streams -= 1
+            text = decoders[name].decode(b'' if final else chunk, final)
+
+            if name == 'stdout':
+                yield from parser.feed(text)
+                if final:
+                    yield from parser.flush()
+                continue
+
+            lines = (error_pending + text).split('\n')
+            error_pending = '' if final else lines.pop()
+            for line in lines:
+                line = line.strip()
+                if line:
+                    self.error_lines.append(line)
+                    yield ErrorEvent(line)
+
+    @property
+    def error_output(self):
+        return '\n'.join(self.error_lines)
+
+    def answer(self, text):
+        """Reply to a prompt."""
+        try:
+            self.popen.stdin.write(text.encode(self.encoding) + b'\n')
+            self.popen.stdin.flush()
+        except (OSError, ValueError):
+            pass
+
+    def send_signal(self, sig):
+        if self.popen is not None and self.popen.poll() is None:
+            self.popen.send_signal(sig)
+
+    def kill(self):
+        if self.popen is not None and self.popen.poll() is None:
+            self.popen.kill()
+
+    def wait(self):
+        return self.popen.wait()
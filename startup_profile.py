@@ -0,0 +1,64 @@
+import builtins
+import contextlib
+import sys
+import time
+
+FIRST_PAINT_TARGET = 0.3  # Seconds from the start of main.py to the first paint of the window
+
+
+class StartupProfile:
+    """Times imports and construction steps from the start of main.py until the window is first painted.
+
+    Disabled it costs one flag check per step. Enabled, every module imported for the first time is
+    timed through builtins.__import__; the times include the modules each one imports in turn.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.steps = []  # (name, seconds)
+        self.imports = {}  # module name -> seconds including its own imports
+        self.original_import = None
+        if enabled:
+            self.original_import = builtins.__import__
+            builtins.__import__ = self.timed_import
+
+    def timed_import(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self.original_import(name, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return self.original_import(name, *args, **kwargs)
+        finally:
+            self.imports.setdefault(name, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def step(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self, stream=sys.stderr, top=15):
+        """Print the breakdown and stop timing imports."""
+        total = time.perf_counter() - self.start
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+        print("Startup steps:", file=stream)
+        for name, seconds in self.steps:
+            print(f"  {seconds * 1000:8.1f} ms  {name}", file=stream)
+        print("Slowest imports (including the modules they import):", file=stream)
+        for name, seconds in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}", file=stream)
+        verdict = "within" if total <= FIRST_PAINT_TARGET else "over"
+        print(f"First paint after {total * 1000:.1f} ms, {verdict} the {FIRST_PAINT_TARGET * 1000:.0f} ms target",
+              file=stream)
+
+
+profile = StartupProfile('--profile-startup' in sys.argv)
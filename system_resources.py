@@ -0,0 +1,147 @@
+import math
+import os
+import subprocess
+import sys
+
+GIB = 1024 ** 3
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+def cpu_count():
+    """Number of CPUs this process may run on, limited by a cgroup CPU quota (e.g. in a container)."""
+    if hasattr(os, 'sched_getaffinity'):
+        count = max(1, len(os.sched_getaffinity(0)))
+    else:
+        count = os.cpu_count() or 1
+    quota = cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+def available_memory():
+    """Bytes of memory that can be used without swapping, None if unknown.
+
+    Inside a cgroup with a memory limit, what is left of the limit if that is less.
+    """
+    if sys.platform.startswith('linux'):
+        available = None
+        try:
+            with open('/proc/meminfo') as meminfo:
+                for line in meminfo:
+                    if line.startswith('MemAvailable:'):
+                        available = int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError, IndexError):
+            pass
+        limit = cgroup_memory_left()
+        if limit is not None:
+            available = limit if available is None else min(available, limit)
+        if available is not None:
+            return available
+
+    if sys.platform == 'darwin':
+        # Free and inactive pages can be handed out without swapping
+        try:
+            output = subprocess.check_output(['vm_stat'], text=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        page_size = 4096
+        pages = 0
+        for line in output.splitlines():
+            if 'page size of' in line:
+                page_size = int(line.split('page size of')[1].split()[0])
+            elif line.startswith(('Pages free:', 'Pages inactive:', 'Pages speculative:')):
+                pages += int(line.split(':')[1].strip().rstrip('.'))
+        return pages * page_size
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def is_rotational(path):
+    """True if `path` is on a spinning disk, False for solid state, None if unknown."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        device = os.stat(path).st_dev
+    except OSError:
+        return None
+    block = f'/sys/dev/block/{os.major(device)}:{os.minor(device)}'
+    # Partitions have no queue of their own, it belongs to the parent disk
+    for queue in (os.path.join(block, 'queue', 'rotational'), os.path.join(block, '..', 'queue', 'rotational')):
+        try:
+            with open(queue) as rotational:
+                return rotational.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+
+def cgroup_paths():
+    """Map of cgroup v1 controller (or '' for v2) to the directory holding this process's cgroup files."""
+    paths = {}
+    try:
+        with open('/proc/self/cgroup') as cgroup:
+            lines = cgroup.read().splitlines()
+    except OSError:
+        return paths
+    for line in lines:
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        for controller in controllers.split(',') if controllers else ['']:
+            base = os.path.join(CGROUP_ROOT, controller) if controller else CGROUP_ROOT
+            # In a container the cgroup is usually mounted at the root of the hierarchy
+            candidate = os.path.join(base, path.lstrip('/'))
+            paths[controller] = candidate if os.path.isdir(candidate) else base
+    return paths
+
+
+def read_cgroup_value(directory, name):
+    try:
+        with open(os.path.join(directory, name)) as value:
+            return value.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota():
+    """CPUs' worth of time the cgroup quota allows, None without a quota."""
+    paths = cgroup_paths()
+    if '' in paths:
+        value = read_cgroup_value(paths[''], 'cpu.max')
+        if value:
+            quota, _, period = value.partition(' ')
+            if quota != 'max' and period:
+                return int(quota) / int(period)
+    if 'cpu' in paths:
+        quota = read_cgroup_value(paths['cpu'], 'cpu.cfs_quota_us')
+        period = read_cgroup_value(paths['cpu'], 'cpu.cfs_period_us')
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_left():
+    """Bytes left before the cgroup memory limit, None without a limit."""
+    paths = cgroup_paths()
+    candidates = []
+    if '' in paths:
+        candidates.append((paths[''], 'memory.max', 'memory.current'))
+    if 'memory' in paths:
+        candidates.append((paths['memory'], 'memory.limit_in_bytes', 'memory.usage_in_bytes'))
+    for directory, limit_name, usage_name in candidates:
+        limit = read_cgroup_value(directory, limit_name)
+        usage = read_cgroup_value(directory, usage_name)
+        if not limit or limit == 'max' or not usage:
+            continue
+        limit = int(limit)
+        # cgroup v1 reports "no limit" as a huge page-aligned number
+        if limit >= 2 ** 60:
+            continue
+        return max(0, limit - int(usage))
+    return None
@@ -0,0 +1,24 @@
+import os
+import sys
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_index import ArchiveIndex  # noqa: E402
+from archive_listing import ArchiveEntry  # noqa: E402
+
+
+def archive_entry(path, size=1, mtime=None, is_dir=False, **fields):
+    """An ArchiveEntry with plain defaults, folders have no size; other fields are passed by name."""
+    values = dict(path=path, size=None if is_dir else size, packed_size=None if is_dir else size, mtime=mtime,
+                  attributes='D' if is_dir else 'A', crc=None, method='', encrypted=False, is_dir=is_dir)
+    values.update(fields)
+    return ArchiveEntry(**values)
+
+
+def build_index(*paths):
+    """A finalized ArchiveIndex of the paths, a trailing / makes a folder."""
+    index = ArchiveIndex()
+    index.add_entries(archive_entry(path.rstrip('/'), is_dir=path.endswith('/')) for path in paths)
+    index.finalize()
+    return index
@@ -0,0 +1,66 @@
+import pytest
+
+from archive_changes import ChangeSet, names_by_pattern, plan_renames
+from conftest import build_index
+
+
+def renames(index, new_names_by_path):
+    return plan_renames(index, {index.find(path): name for path, name in new_names_by_path.items()})
+
+
+def test_single_rename():
+    index = build_index('a/', 'a/x.txt')
+    pairs, changes = renames(index, {'a/x.txt': 'y.txt'})
+    assert pairs == [('a/x.txt', 'a/y.txt')]
+    assert changes.renamed == [('a/x.txt', 'a/y.txt')]
+
+
+def test_nested_renames_are_ordered_for_7zz_and_for_the_index():
+    index = build_index('a/', 'a/b/', 'a/b/c.txt')
+    pairs, changes = renames(index, {'a': 'A', 'a/b': 'B', 'a/b/c.txt': 'C.txt'})
+    # 7zz applies the first matching pair, so the deepest entries come first with final paths
+    assert pairs == [('a/b/c.txt', 'A/B/C.txt'), ('a/b', 'A/B'), ('a', 'A')]
+    # The index is patched pair by pair, parents first and already renamed
+    assert changes.renamed == [('a', 'A'), ('A/b', 'A/B'), ('A/B/c.txt', 'A/B/C.txt')]
+
+    for old_path, new_path in changes.renamed:
+        assert index.move(index.find(old_path), new_path)
+    assert index.find('A/B/C.txt') is not None
+
+
+def test_swapping_names_is_allowed():
+    index = build_index('x', 'y')
+    pairs, _ = renames(index, {'x': 'y', 'y': 'x'})
+    assert sorted(pairs) == [('x', 'y'), ('y', 'x')]
+
+
+@pytest.mark.parametrize('name', ['', 'a/b', '.', '..'])
+def test_invalid_names_are_rejected(name):
+    index = build_index('x')
+    with pytest.raises(ValueError):
+        renames(index, {'x': name})
+
+
+def test_clashing_names_are_rejected():
+    index = build_index('d/', 'd/x', 'd/y')
+    with pytest.raises(ValueError, match="d/y"):
+        renames(index, {'d/x': 'y'})
+
+
+def test_names_by_pattern():
+    index = build_index('d/', 'd/img_1.png', 'd/img_2.png', 'd/sub/', 'd/sub/img_3.png', 'other.txt')
+    folder = index.find('d')
+    files = [index.find('d/img_1.png'), index.find('d/img_2.png')]
+
+    by_prefix = names_by_pattern(index, files, 'img_', 'photo_')
+    assert sorted(by_prefix.values()) == ['photo_1.png', 'photo_2.png']
+
+    by_regex = names_by_pattern(index, [folder], r'img_(\d)', r'\1_img', use_regex=True, recursive=True)
+    assert sorted(by_regex.values()) == ['1_img.png', '2_img.png', '3_img.png']
+
+    assert names_by_pattern(index, files, 'nomatch', 'x') == {}
+
+
+def test_change_set_truth():
+    assert not ChangeSet()
+    assert ChangeSet(deleted=['a'])
@@ -0,0 +1,134 @@
+import pytest
+
+from archive_index import ArchiveIndex, ROOT
+from conftest import archive_entry, build_index
+
+
+def child_names(index, node=ROOT):
+    return sorted(index.name(child) for child in index.children(node))
+
+
+def test_removed_nodes_stay_removed_after_round_trip():
+    index = build_index('a/', 'a/x', 'b')
+    index.remove(index.find('a'))
+
+    restored = ArchiveIndex.from_bytes(index.to_bytes())
+    assert restored.find('a') is None
+    assert restored.find('a/x') is None
+    assert child_names(restored) == ['b']
+
+    restored.add_entry(archive_entry('a', is_dir=True))
+    restored.add_entry(archive_entry('a/y'))
+    node = restored.find('a/y')
+    assert node is not None
+    assert restored.parent(node) == restored.find('a')
+    assert child_names(restored) == ['a', 'b']
+    assert child_names(restored, restored.find('a')) == ['y']
+
+
+def test_rejected_move_creates_no_folders():
+    index = build_index('a/', 'a/x', 'b')
+    node_count = len(index)
+
+    assert not index.move(index.find('a'), 'a/new/deeper/a')
+    assert len(index) == node_count
+    assert index.find('a/new') is None
+
+    assert not index.move(index.find('a/x'), 'b/new/x')  # b is a file
+    assert len(index) == node_count
+
+
+def test_missing_folders_become_placeholders_until_listed():
+    index = ArchiveIndex()
+    index.add_entry(archive_entry('a/b/c.txt', size=5))
+    folder = index.find('a/b')
+    assert index.is_dir(folder)
+    assert index.entry_count() == 1  # Placeholders are not entries
+
+    index.add_entry(archive_entry('a/b', is_dir=True, mtime=1700000000))
+    assert index.find('a/b') == folder
+    assert index.mtime(folder) == 1700000000
+    assert index.entry_count() == 2
+
+
+def test_node_data_and_navigation():
+    index = ArchiveIndex()
+    index.add_entry(archive_entry('d', is_dir=True))
+    index.add_entry(archive_entry('d/f.bin', size=10, packed_size=4, mtime=1700000000, crc=0x1234ABCD,
+                                  method='LZMA2:24', encrypted=True))
+    index.add_entry(archive_entry('d/g.bin', size=None))
+    index.finalize()
+
+    node = index.find('d/f.bin')
+    assert index.path(node) == 'd/f.bin'
+    assert index.name(node) == 'f.bin'
+    assert index.parent(node) == index.find('d')
+    assert (index.size(node), index.packed_size(node), index.mtime(node)) == (10, 4, 1700000000)
+    assert index.crc(node) == 0x1234ABCD
+    assert index.method(node) == 'LZMA2:24'
+    assert index.is_encrypted(node)
+
+    unknown = index.find('d/g.bin')
+    assert (index.size(unknown), index.mtime(unknown), index.crc(unknown)) == (None, None, None)
+    assert index.find('d/missing') is None
+    assert index.find('') == ROOT
+    assert index.child_count(index.find('d')) == 2
+    assert index.subtree_totals() == (2, 10, 4)
+
+
+def test_remove_takes_the_subtree_with_it():
+    index = build_index('a/', 'a/b/', 'a/b/c', 'a/d', 'e')
+    index.remove(index.find('a/b'))
+    assert index.find('a/b') is None
+    assert index.find('a/b/c') is None
+    assert child_names(index, index.find('a')) == ['d']
+    assert index.entry_count() == 3
+    assert sorted(index.path(node) for node in index.iter_subtree(ROOT)) == ['a', 'a/d', 'e']
+
+
+def test_move_renames_and_relocates():
+    index = build_index('a/', 'a/x', 'b')
+    folder = index.find('a')
+    assert index.move(folder, 'renamed')
+    assert index.find('renamed/x') is not None
+    assert index.find('a') is None
+
+    assert index.move(index.find('b'), 'new/deep/b')
+    assert index.is_dir(index.find('new/deep'))
+    assert child_names(index) == ['new', 'renamed']
+
+    assert not index.move(index.find('renamed/x'), 'new/deep/b')  # Target exists
+
+
+def test_round_trip_keeps_the_tree_and_data():
+    index = ArchiveIndex()
+    index.add_entry(archive_entry('d/f.bin', size=10, packed_size=4, mtime=1700000000, crc=0xFFFFFFFF, method='Copy'))
+    index.add_entry(archive_entry('d/ü名.txt', size=3))
+    index.add_entry(archive_entry('e', is_dir=True))
+
+    restored = ArchiveIndex.from_bytes(index.to_bytes())
+    assert sorted(restored.path(node) for node in restored.iter_subtree(ROOT)) == ['d', 'd/f.bin', 'd/ü名.txt', 'e']
+    node = restored.find('d/f.bin')
+    assert (restored.size(node), restored.packed_size(node), restored.mtime(node)) == (10, 4, 1700000000)
+    assert restored.crc(node) == 0xFFFFFFFF
+    assert restored.method(node) == 'Copy'
+    assert restored.subtree_totals() == index.subtree_totals()
+
+
+def test_round_trip_after_edits_matches_the_edited_tree():
+    index = build_index('a/', 'a/x', 'a/s/', 'a/s/t', 'b', 'c/')
+    index.move(index.find('b'), 'z/q/b')
+    index.remove(index.find('a/s'))
+
+    restored = ArchiveIndex.from_bytes(index.to_bytes())
+    expected = sorted(index.path(node) for node in index.iter_subtree(ROOT))
+    assert sorted(restored.path(node) for node in restored.iter_subtree(ROOT)) == expected
+    assert len(restored) < len(index)  # Removed slots are not written
+    assert restored.entry_count() == index.entry_count()
+
+
+def test_from_bytes_rejects_garbage():
+    data = build_index('a', 'b').to_bytes()
+    for broken in (b'', b'\x00\x00', data[:-3], data + b'x'):
+        with pytest.raises(ValueError):
+            ArchiveIndex.from_bytes(broken)
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+import archive_listing
+from archive_listing import iter_slt_entries
+
+LISTING = b"""--
+Path = /tmp/test.7z
+Type = 7z
+Physical Size = 1234
+Headers Size = 200
+Method = LZMA2:24
+Solid = +
+Blocks = 1
+
+----------
+Path = docs
+Size = 0
+Packed Size = 0
+Modified = 2023-11-23 10:20:30.1234567
+Attributes = D_ drwxr-xr-x
+CRC =
+Encrypted = -
+Method =
+Block =
+
+Path = docs/a = b.txt
+Size = 11
+Packed Size = 7
+Modified = 2023-11-23 10:20:30
+Attributes = A_ -rw-r--r--
+CRC = 0A1B2C3D
+Encrypted = +
+Method = LZMA2:24 7zAES:19
+Block = 0
+
+Path =  leading space
+Folder = -
+Size = 1
+Packed Size =
+Modified =
+Attributes = A
+CRC = zz
+Encrypted = -
+Method = Copy
+"""
+
+
+def test_iter_slt_entries_skips_the_archive_header():
+    entries = list(iter_slt_entries(LISTING.splitlines(keepends=True)))
+    assert [entry.path for entry in entries] == ['docs', 'docs/a = b.txt', ' leading space']
+
+
+def test_iter_slt_entries_fields():
+    folder, file, last = iter_slt_entries(LISTING.splitlines(keepends=True))
+    assert folder.is_dir
+    assert folder.crc is None
+    assert folder.mtime == int(time.mktime((2023, 11, 23, 10, 20, 30, 0, 0, -1)))
+
+    assert not file.is_dir
+    assert (file.size, file.packed_size) == (11, 7)
+    assert file.crc == 0x0A1B2C3D
+    assert file.encrypted
+    assert file.method == 'LZMA2:24 7zAES:19'
+
+    # The last block has no blank line after it, unparsable values become None
+    assert not last.is_dir
+    assert (last.packed_size, last.mtime, last.crc) == (None, None, None)
+
+
+def test_iter_slt_entries_handles_crlf_and_encodings():
+    lines = b"Path = caf\xe9.txt\r\nSize = 3\r\nAttributes = A\r\n\r\n".splitlines(keepends=True)
+    (entry,) = iter_slt_entries(lines, 'latin-1')
+    assert entry.path == 'café.txt'
+    assert entry.size == 3
+
+
+def test_iter_slt_entries_reads_a_stream_lazily():
+    def lines():
+        yield b"Path = first\n"
+        yield b"Attributes = A\n"
+        yield b"\n"
+        raise AssertionError("read past the first entry")
+
+    assert next(iter_slt_entries(lines())).path == 'first'
+
+
+def test_detect_name_encoding():
+    assert archive_listing.detect_name_encoding([b"Path = plain.txt\n"]) == 'utf-8'
+    assert archive_listing.detect_name_encoding(["Path = ü名.txt\n".encode('utf-8')]) == 'utf-8'
+
+
+def test_detect_name_encoding_falls_back_to_chardet():
+    pytest.importorskip('chardet')
+    sample = ["Path = Привет мир, это проверка кодировки.txt\n".encode('cp1251')] * 20
+    assert archive_listing.detect_name_encoding(sample).lower() != 'utf-8'
+
+
+def test_read_summary():
+    output = [
+        b"   Date      Time    Attr         Size   Compressed  Name\n",
+        b"------------------- ----- ------------ ------------  ------------------------\n",
+        b"2023-11-23 10:20:30 ....A           11            7  docs/a.txt\n",
+        b"------------------- ----- ------------ ------------  ------------------------\n",
+        b"2023-11-23 10:20:30                 11            7  1 files, 1 folders\n",
+    ]
+    assert archive_listing.read_summary(output) == (1, 11)
+    assert archive_listing.parse_summary_line(b"                    0  0  2 folders\n") == (0, 0)
+    assert archive_listing.read_summary([b"no listing\n"]) is None
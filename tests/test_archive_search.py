@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+import archive_search
+from archive_index import ArchiveIndex
+from conftest import archive_entry, build_index
+
+
+def search(index, text):
+    nodes, complete = archive_search.NameIndex(index).search(archive_search.parse_query(text))
+    assert complete
+    return sorted(index.path(node) for node in nodes)
+
+
+def test_regex_does_not_match_across_names():
+    index = build_index('a', 'b/', 'b/a', 'ab', 'xa')
+    assert search(index, r're:a\s*a') == []
+    # A hit spanning several names must not hide the names after it
+    assert search(index, 're:a[^x]*') == ['a', 'ab', 'b/a', 'xa']
+
+
+def build_files(*files):
+    """(path, size, mtime) tuples, folders are implied."""
+    index = ArchiveIndex()
+    index.add_entries(archive_entry(path, size, mtime) for path, size, mtime in files)
+    index.finalize()
+    return index
+
+
+def timestamp(*date):
+    return int(time.mktime((*date, 0, 0, 0, 0, 0, -1)))
+
+
+def test_parse_query_kinds():
+    substring = archive_search.parse_query('Report')
+    assert (substring.substring, substring.regex, substring.predicates) == ('report', None, [])
+
+    glob = archive_search.parse_query('*.TXT')
+    assert glob.substring == '.txt'
+    assert glob.regex.search('notes.txt') and not glob.regex.search('notes.txt.bak')
+
+    regex = archive_search.parse_query('re:^a.c$')
+    assert regex.substring == ''
+    assert regex.regex.search('ABC')
+
+
+def test_parse_query_predicates():
+    query = archive_search.parse_query('log size>=1k size<2m date<2024')
+    assert query.substring == 'log'
+    assert query.predicates == [
+        archive_search.Predicate('sizes', 1024, archive_search.MAX_VALUE),
+        archive_search.Predicate('sizes', archive_search.UNKNOWN + 1, 2 * 1024 * 1024),
+        archive_search.Predicate('mtimes', archive_search.NO_TIME + 1, timestamp(2024, 1, 1)),
+    ]
+
+
+def test_parse_date_periods():
+    assert archive_search.parse_date('2024') == (timestamp(2024, 1, 1), timestamp(2025, 1, 1))
+    assert archive_search.parse_date('2024-12') == (timestamp(2024, 12, 1), timestamp(2025, 1, 1))
+    assert archive_search.parse_date('2024-02-29') == (timestamp(2024, 2, 29), timestamp(2024, 3, 1))
+
+
+@pytest.mark.parametrize('text', ['size>x', 'size<10q', 'date>2024-1-1-1', 'date=soon', 're:(unclosed'])
+def test_parse_query_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        archive_search.parse_query(text)
+
+
+def test_name_search_kinds():
+    index = build_index('docs/', 'docs/Report.TXT', 'docs/notes.txt', 'src/main.py', 'src/report.py')
+    assert search(index, 'report') == ['docs/Report.TXT', 'src/report.py']
+    assert search(index, '*.txt') == ['docs/Report.TXT', 'docs/notes.txt']
+    assert search(index, 'm?in.*') == ['src/main.py']
+    assert search(index, 're:^(docs|src)$') == ['docs', 'src']
+    assert search(index, '') == ['docs', 'docs/Report.TXT', 'docs/notes.txt', 'src', 'src/main.py',
+                                 'src/report.py']
+
+
+def test_predicates_match_files_only():
+    index = build_files(('old/small.log', 10, timestamp(2020, 6, 1)),
+                        ('old/big.log', 5 * 1024 * 1024, timestamp(2020, 6, 1)),
+                        ('new/big.log', 5 * 1024 * 1024, timestamp(2024, 3, 5)),
+                        ('new/unknown.log', None, None))
+    assert search(index, 'size>1m') == ['new/big.log', 'old/big.log']
+    assert search(index, 'size<1k') == ['old/small.log']
+    assert search(index, 'size=10') == ['old/small.log']
+    assert search(index, 'big date>=2024-03') == ['new/big.log']
+    assert search(index, 'date=2020') == ['old/big.log', 'old/small.log']
+    assert search(index, 'date>2024-03-05') == []
+    assert search(index, 'old') == ['old']
+    assert search(index, 'old size>=0') == []  # The folder has no size of its own
+
+
+def test_many_candidates_take_the_name_path():
+    files = [(f'd/f{number}.txt', number, None) for number in range(200)]
+    index = build_files(*files)
+    name_index = archive_search.NameIndex(index)
+    query = archive_search.parse_query('f1 size<150')
+    assert name_index.candidate_files(query) is None  # 'f1' is rarer than sizes below 150
+    assert search(index, 'f1 size<150') == sorted(f'd/f{number}.txt' for number in range(150) if 'f1' in f'f{number}')
+    query = archive_search.parse_query('f size<3')
+    assert list(name_index.candidate_files(query)) == [index.find('d/f0.txt'), index.find('d/f1.txt'),
+                                                       index.find('d/f2.txt')]
+
+
+def test_removed_nodes_are_not_found():
+    index = build_index('a/', 'a/x.txt', 'b.txt')
+    name_index = archive_search.NameIndex(index)
+    index.remove(index.find('a'))
+    nodes, _ = name_index.search(archive_search.parse_query('.txt'))
+    assert [index.path(node) for node in nodes] == ['b.txt']
+
+
+def test_search_limit():
+    index = build_index(*[f'f{number}' for number in range(10)])
+    nodes, complete = archive_search.NameIndex(index).search(archive_search.parse_query('f'), limit=3)
+    assert len(nodes) == 3
+    assert not complete
+    nodes, complete = archive_search.NameIndex(index).search(archive_search.parse_query('f'), limit=10)
+    assert len(nodes) == 10
+    assert complete
@@ -0,0 +1,62 @@
+from compression_tuning import CompressionSettings, DEFLATE, DEFLATE64, GIB, KIB, LZMA2, MIB, PPMD, COPY, \
+    SOLID_OFF, auto_tune, effective_method, get_switches, size_switch
+
+NO_SETTINGS = CompressionSettings(None, None, None, None)
+
+
+def test_size_switch():
+    assert size_switch(64 * KIB) == '64k'
+    assert size_switch(32 * MIB) == '32m'
+    assert size_switch(4 * GIB) == '4g'
+    assert size_switch(1500) == '1500b'
+
+
+def test_effective_method():
+    assert effective_method('7z', PPMD, '5') == PPMD
+    assert effective_method('7z', PPMD, '0') == COPY
+    assert effective_method('zip', LZMA2, '5') == DEFLATE  # Not a zip method, the zip default is used
+    assert effective_method('tar', DEFLATE, '9') == COPY
+
+
+def test_switches_7z_lzma2():
+    settings = CompressionSettings(4, 64 * MIB, 64, 16 * MIB)
+    assert get_switches('7z', LZMA2, '9', settings) == ['-mmt=4', '-m0=LZMA2', '-md=64m', '-mfb=64', '-ms=16m']
+    assert get_switches('7z', LZMA2, '5', NO_SETTINGS) == ['-m0=LZMA2']
+    assert get_switches('7z', LZMA2, '5', CompressionSettings(None, None, None, SOLID_OFF)) == ['-m0=LZMA2', '-ms=off']
+
+
+def test_switches_ppmd():
+    settings = CompressionSettings(2, 16 * MIB, 8, None)
+    assert get_switches('7z', PPMD, '5', settings) == ['-mmt=2', '-m0=PPMd:mem=16m:o=8']
+    assert get_switches('zip', PPMD, '5', settings) == ['-mmt=2', '-mm=PPMd', '-mmem=16m', '-mo=8']
+
+
+def test_switches_zip_deflate():
+    # Deflate has no dictionary, and zip no solid blocks
+    settings = CompressionSettings(None, 64 * MIB, 128, 16 * MIB)
+    assert get_switches('zip', DEFLATE64, '9', settings) == ['-mm=Deflate64', '-mfb=128']
+    # A word size Deflate does not know is dropped
+    assert get_switches('zip', DEFLATE, '9', CompressionSettings(None, None, 273, None)) == ['-mm=Deflate']
+
+
+def test_switches_copy():
+    assert get_switches('7z', COPY, '5', CompressionSettings(4, None, None, None)) == ['-m0=Copy']
+    assert get_switches('zip', LZMA2, '0', NO_SETTINGS) == []
+    assert get_switches('tar', COPY, '5', NO_SETTINGS) == []
+
+
+def test_auto_tune_fits_memory():
+    roomy = auto_tune('7z', LZMA2, '9', cpus=8, memory=64 * GIB)
+    assert roomy == CompressionSettings(8, 64 * MIB, None, None)
+
+    tight = auto_tune('7z', LZMA2, '9', cpus=8, memory=256 * MIB)
+    assert tight.threads < 8 or tight.dictionary < 64 * MIB
+
+    assert auto_tune('zip', DEFLATE, '5', cpus=4, memory=GIB) == CompressionSettings(4, None, None, None)
+
+
+def test_auto_tune_shrinks_the_dictionary_to_the_input(tmp_path):
+    source = tmp_path / 'small.txt'
+    source.write_bytes(b'x' * 100 * KIB)
+    settings = auto_tune('7z', LZMA2, '9', [str(source)], cpus=2, memory=64 * GIB)
+    assert 100 * KIB <= settings.dictionary < 64 * MIB
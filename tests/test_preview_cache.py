@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import preview_cache
+from listing_cache import ArchiveIdentity
+from preview_cache import PreviewCache
+
+OLD = ArchiveIdentity('/archives/a.7z', 10, 1, 5)
+NEW = ArchiveIdentity('/archives/a.7z', 12, 2, 5)
+OTHER = ArchiveIdentity('/archives/b.7z', 10, 1, 6)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(preview_cache, 'get_preview_dir', lambda: str(tmp_path))
+    monkeypatch.setattr(PreviewCache, '_instance', None)
+    return PreviewCache()
+
+
+def add(cache, identity, entry_path):
+    partial_folder = cache.reserve()
+    with open(os.path.join(partial_folder, os.path.basename(entry_path)), 'wb') as entry:
+        entry.write(b'data')
+    return cache.commit(identity, entry_path, None, partial_folder)
+
+
+def test_lookup_leaves_other_identities_alone(cache):
+    old_path = add(cache, OLD, 'docs/x.txt')
+    assert cache.lookup(NEW, 'docs/x.txt') is None
+    assert os.path.exists(old_path)
+
+
+def test_drop_other_identities_keeps_current_pinned_and_other_archives(cache):
+    stale_path = add(cache, OLD, 'docs/x.txt')
+    pinned_path = add(cache, OLD, 'docs/y.txt')
+    current_path = add(cache, NEW, 'docs/x.txt')
+    other_path = add(cache, OTHER, 'docs/x.txt')
+    cache.pin(pinned_path)
+
+    cache.drop_other_identities(NEW)
+    assert not os.path.exists(stale_path)
+    assert os.path.exists(pinned_path)
+    assert cache.lookup(NEW, 'docs/x.txt') == current_path
+    assert cache.lookup(OTHER, 'docs/x.txt') == other_path
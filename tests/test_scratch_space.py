@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import scratch_space
+from scratch_space import ScratchSpace
+
+
+@pytest.fixture
+def space(tmp_path, monkeypatch):
+    monkeypatch.setattr(scratch_space, 'get_disk_root', lambda: str(tmp_path))
+    monkeypatch.setattr(scratch_space, 'get_memory_root', lambda: None)
+    monkeypatch.setattr(ScratchSpace, '_instance', None)
+    space = ScratchSpace()
+    space.quota = 100
+    yield space
+    space.cleanup()
+
+
+def fill(folder, size):
+    with open(os.path.join(folder, 'data'), 'wb') as data:
+        data.write(b'x' * size)
+
+
+def test_make_room_skips_pinned_folders(space):
+    in_use = space.allocate()
+    fill(in_use, 80)
+    space.pin(in_use)
+    space.allocate(50)
+    assert os.path.isdir(in_use)
+
+    space.unpin(in_use)
+    space.allocate(50)
+    assert not os.path.exists(in_use)
+
+
+def test_release_waits_for_the_last_pin(space):
+    folder = space.allocate()
+    space.pin(folder)
+    space.pin(folder)
+    space.release(folder)
+    space.unpin(folder)
+    assert os.path.isdir(folder)
+    space.unpin(folder)
+    assert not os.path.exists(folder)
+    assert folder not in space.items
+
+
+def test_files_live_in_the_session(space, tmp_path):
+    fd, path = space.create_file(prefix='7zgui-', suffix='.lst')
+    os.close(fd)
+    assert os.path.dirname(path) == os.path.join(str(tmp_path), space.session_name)
+    space.cleanup()
+    assert not os.path.exists(path)
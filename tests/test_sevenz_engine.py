@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+import sevenz_engine
+
+NOISY_SCRIPT = "import sys; sys.stderr.write('ERROR: Headers Error\\n' * 200000); sys.stderr.flush(); print('done')"
+
+
+def test_stderr_reader_keeps_a_full_stderr_pipe_from_blocking():
+    process = subprocess.Popen([sys.executable, '-c', NOISY_SCRIPT], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_reader = sevenz_engine.StderrReader(process.stderr)
+    assert process.stdout.read().strip() == b'done'
+    assert process.wait(timeout=30) == 0
+    text = stderr_reader.text()
+    assert text.startswith('ERROR: Headers Error\n')
+    assert len(text) == sevenz_engine.StderrReader.MAX_SIZE
@@ -1,7 +1,6 @@
 from PySide6.QtWidgets import QToolBar, QStyle, QMessageBox, QWidget, QSizePolicy
 from PySide6.QtGui import QAction
 from PySide6.QtCore import Qt
-from extractor import Extractor
 from SevenZUtils import ArchiveTester, show_file_properties
 
 
@@ -49,26 +48,39 @@ class ToolBar(QToolBar):
         self.addAction(self.close_archive_action)  # Add action after the spacer
         self.close_archive_action.triggered.connect(self.handle_close_archive)
 
-        self.extractor = Extractor(self.parent())
+        self.extractor = None  # Built when something is first extracted
         self.archive_tester = ArchiveTester(self.parent())
 
+    def ensure_extractor(self):
+        if self.extractor is None:
+            from extractor import Extractor  # Brings in the job scheduler, caches and scratch space
+
+            self.extractor = Extractor(self.parent())
+        return self.extractor
+
     def handle_extract(self):
         # Check which pane is active
         if self.parent().nav_pane.hasFocus():
+            # Several selected files are extracted as a batch
+            file_paths = self.parent().nav_pane.get_current_selected_files()
+            if len(file_paths) > 1:
+                self.ensure_extractor().extract_batch_from_navigation_pane(file_paths)
+                return
+
             # Get the currently selected file from the navigation pane
             file_path = self.parent().nav_pane.get_current_selected_file()
             if file_path:
-                self.extractor.extract_from_navigation_pane(file_path)
+                self.ensure_extractor().extract_from_navigation_pane(file_path)
             else:
                 QMessageBox.warning(self.parent(), "Warning", "Please select a file to extract.")
 
-        elif self.parent().main_pane.tree_widget.hasFocus():
+        elif self.parent().main_pane.tree_view.hasFocus():
             # For now, we'll just extract the whole archive. Later, we can enhance this to handle selected items.
             file_path = self.parent().main_pane.current_archive_path()
             selected_items = self.parent().main_pane.get_selected_items()
             if file_path is None:
                 return
-            self.extractor.extract_from_main_pane(file_path, selected_items)
+            self.ensure_extractor().extract_from_main_pane(file_path, selected_items)
 
     def handle_close_archive(self):
         # Add code to handle closing the archive
@@ -81,7 +93,7 @@ class ToolBar(QToolBar):
             # Get the currently selected file from the navigation pane
             file_path = self.parent().nav_pane.get_current_selected_file()
 
-        if self.parent().main_pane.tree_widget.hasFocus():
+        if self.parent().main_pane.tree_view.hasFocus():
             file_path = self.parent().main_pane.current_archive_path()
 
         if file_path is not None:
@@ -97,7 +109,7 @@ class ToolBar(QToolBar):
             else:
                 QMessageBox.warning(self.parent(), "Warning", "Please select a file to test.")
 
-        if self.parent().main_pane.tree_widget.hasFocus():
+        if self.parent().main_pane.tree_view.hasFocus():
             file_path = self.parent().main_pane.current_archive_path()
             self.archive_tester.test_archive(file_path)
 